@@ -3,21 +3,16 @@ from django.shortcuts import render, redirect, get_object_or_404
 from .forms import SleeperLeagueIDForm, CustomSignupForm, AddLeagueForm
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.models import User
-import requests
 from django.db import transaction
 from django.conf import settings
 from django.urls import reverse
 from allauth.account.views import SignupView
 from django import forms
 from django.contrib.auth.decorators import login_required
-from ffjournal.models import League, Article, LeagueMemberEmail
-from ffjournal.sleeper_api import (
-    fetch_league_data,
-    fetch_roster_data,
-    fetch_team_data,
-    fetch_all_matchup_data,
-    fetch_all_transactions_data,
-)
+from ffjournal.models import League, Article, LeagueMemberEmail, Job
+from ffjournal.jobs import BACKFILL_PRIORITY, enqueue
+from ffjournal.sleeper_api import apply_league_snapshot, fetch_league_snapshot
+from ffjournal.sleeper_client import SleeperAPIError, get_client
 from ffjournal.decorators import user_is_league_owner
 
 def error_view(request):
@@ -32,11 +27,12 @@ def league_id_check_view(request):
             league_id = form.cleaned_data['league_id']
 
             # Check the league status via the Sleeper API
-            url = f"https://api.sleeper.app/v1/league/{league_id}"
-            response = requests.get(url)
+            try:
+                league_data = get_client().get(f"league/{league_id}")
+            except SleeperAPIError:
+                league_data = None
 
-            if response.status_code == 200:
-                league_data = response.json()
+            if league_data:
                 league_status = league_data.get('status')
 
                 # Reject if the league is complete
@@ -121,15 +117,14 @@ def payment_success_view(request):
 
     if league_id:
         try:
+            # Only the league, rosters and users are fetched now; history is backfilled by a job
+            snapshot = fetch_league_snapshot(league_id, history=False)
+
             with transaction.atomic():
                 # Pass the current user as the owner
-                league = fetch_league_data(league_id, owner=request.user)
-                
-                if league.status != 'complete':
-                    fetch_roster_data(league_id)
-                    fetch_team_data(league_id)
-                    fetch_all_matchup_data(league_id)
-                    fetch_all_transactions_data(league_id)
+                apply_league_snapshot(snapshot, owner=request.user)
+                if not snapshot.is_complete:
+                    enqueue('backfill_league', priority=BACKFILL_PRIORITY, league_id=league_id)
 
                 # Ensure the object is retrieved fresh from the database
                 league = League.objects.get(sleeper_league_id=league_id)
@@ -157,10 +152,23 @@ def payment_success_view(request):
     else:
         return redirect('my_leagues')
 
+def leagues_with_backfill(profile):
+    """The profile's leagues, each with `backfill_job` set to its unfinished history backfill (or None)."""
+    leagues = list(profile.leagues.all())
+    jobs = Job.objects.filter(
+        kind='backfill_league',
+        sleeper_league_id__in=[league.sleeper_league_id for league in leagues],
+        status__in=['queued', 'running'],
+    )
+    backfill_jobs = {job.sleeper_league_id_id: job for job in jobs}
+    for league in leagues:
+        league.backfill_job = backfill_jobs.get(league.sleeper_league_id)
+    return leagues
+
 @login_required
 def my_leagues_view(request):
     profile = request.user.profile
-    leagues = profile.leagues.all()
+    leagues = leagues_with_backfill(profile)
     add_league_form = AddLeagueForm()
 
     if request.method == 'POST':
@@ -169,11 +177,12 @@ def my_leagues_view(request):
             league_id = add_league_form.cleaned_data['league_id']
 
             # Check the league status via the Sleeper API
-            url = f"https://api.sleeper.app/v1/league/{league_id}"
-            response = requests.get(url)
+            try:
+                league_data = get_client().get(f"league/{league_id}")
+            except SleeperAPIError:
+                league_data = None
 
-            if response.status_code == 200:
-                league_data = response.json()
+            if league_data:
                 league_status = league_data.get('status')
 
                 # Reject if the league is complete
@@ -239,15 +248,14 @@ def additional_league_payment_success_view(request):
 
     if league_id:
         try:
+            # Only the league, rosters and users are fetched now; history is backfilled by a job
+            snapshot = fetch_league_snapshot(league_id, history=False)
+
             with transaction.atomic():
                 # Pass the current user as the owner
-                league = fetch_league_data(league_id, owner=request.user)
-                
-                if league.status != 'complete':
-                    fetch_roster_data(league_id)
-                    fetch_team_data(league_id)
-                    fetch_all_matchup_data(league_id)
-                    fetch_all_transactions_data(league_id)
+                apply_league_snapshot(snapshot, owner=request.user)
+                if not snapshot.is_complete:
+                    enqueue('backfill_league', priority=BACKFILL_PRIORITY, league_id=league_id)
 
                 # Ensure the object is retrieved fresh from the database
                 league = League.objects.get(sleeper_league_id=league_id)
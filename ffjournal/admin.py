@@ -1,10 +1,8 @@
 from django.contrib import admin, messages
 from django.urls import path, reverse
 from django.shortcuts import redirect, HttpResponseRedirect
-from django.core.management import call_command
-from .models import League, Roster, Team, Matchup, Player, Event, Article
-from .sleeper_api import fetch_league_data, fetch_roster_data, fetch_team_data, fetch_all_matchup_data, fetch_all_transactions_data
-from django.db import transaction
+from .jobs import enqueue
+from .models import CachedCompletion, CompletionBatch, DraftPick, Job, League, LeagueSeason, LeagueSyncState, Roster, Team, Matchup, Player, Event, Article
 from allauth.account.models import EmailAddress
 from django.contrib.auth.models import Group, User
 from accounts.models import CustomUser, Profile
@@ -14,20 +12,8 @@ from django.contrib.auth.admin import UserAdmin
 # Admin action to refresh all league data
 @admin.action(description='Refresh all league data')
 def refresh_all_leagues(modeladmin, request, queryset):
-    leagues = League.objects.all()
-    for league in leagues:
-        try:
-            with transaction.atomic():
-                fetch_league_data(league.sleeper_league_id)
-                if league.status != 'complete':
-                    fetch_roster_data(league.sleeper_league_id)
-                    fetch_team_data(league.sleeper_league_id)
-                    fetch_all_matchup_data(league.sleeper_league_id)
-                    fetch_all_transactions_data(league.sleeper_league_id)
-        except Exception as e:
-            modeladmin.message_user(request, f"Error refreshing league {league.name}: {str(e)}", level='error')
-        else:
-            modeladmin.message_user(request, f"Successfully refreshed league {league.name}", level='success')
+    job = enqueue('refresh_leagues')
+    modeladmin.message_user(request, f"Refresh of all leagues queued (job #{job.pk})", level='success')
 
 @admin.register(League)
 class LeagueAdmin(admin.ModelAdmin):
@@ -35,6 +21,34 @@ class LeagueAdmin(admin.ModelAdmin):
     search_fields = ('name', 'sleeper_league_id')
     actions = [refresh_all_leagues]
 
+@admin.register(LeagueSyncState)
+class LeagueSyncStateAdmin(admin.ModelAdmin):
+    list_display = ('sleeper_league_id', 'finalized_matchup_weeks', 'closed_transaction_weeks', 'updated_at')
+    search_fields = ('sleeper_league_id__sleeper_league_id',)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'priority', 'progress', 'message', 'sleeper_league_id', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('kind', 'sleeper_league_id__sleeper_league_id')
+
+@admin.register(CompletionBatch)
+class CompletionBatchAdmin(admin.ModelAdmin):
+    list_display = ('batch_id', 'week', 'status', 'request_count', 'succeeded_count', 'failed_count', 'created_at', 'completed_at')
+    list_filter = ('status', 'week')
+    search_fields = ('batch_id', 'input_sha256')
+
+@admin.register(CachedCompletion)
+class CachedCompletionAdmin(admin.ModelAdmin):
+    list_display = ('key', 'model', 'created_at', 'expires_at')
+    list_filter = ('model',)
+    search_fields = ('key',)
+
+@admin.register(LeagueSeason)
+class LeagueSeasonAdmin(admin.ModelAdmin):
+    list_display = ('league', 'season', 'sleeper_league_id', 'name', 'champion_roster_id', 'fetched_at')
+    search_fields = ('sleeper_league_id', 'league__sleeper_league_id', 'name')
+
 @admin.register(Roster)
 class RosterAdmin(admin.ModelAdmin):
     list_display = ('sleeper_league_id', 'roster_id', 'owner_id')
@@ -50,6 +64,11 @@ class MatchupAdmin(admin.ModelAdmin):
     list_display = ('sleeper_league_id', 'matchup_id', 'week', 'points')
     search_fields = ('sleeper_league_id__sleeper_league_id', 'week')
 
+@admin.register(DraftPick)
+class DraftPickAdmin(admin.ModelAdmin):
+    list_display = ('sleeper_league_id', 'draft_id', 'pick_no', 'round', 'roster_id', 'player_id', 'position')
+    search_fields = ('sleeper_league_id__sleeper_league_id', 'draft_id', 'player_id')
+
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
     list_display = ('player_id', 'full_name', 'team', 'position', 'rank_ave')
@@ -79,13 +98,8 @@ class MyAdminSite(admin.AdminSite):
         return custom_urls + urls
 
     def fetch_players(self, request):
-        try:
-            call_command('fetch_players')
-            self.message_user(request, "Player data has been updated successfully!", messages.SUCCESS)
-            print("Fetch Players Command Executed")  # Add this line for debugging
-        except Exception as e:
-            self.message_user(request, f"Error: {str(e)}", messages.ERROR)
-            print(f"Error: {str(e)}")  # Add this line for debugging
+        job = enqueue('fetch_players')
+        self.message_user(request, f"Player fetch queued (job #{job.pk})", messages.SUCCESS)
         return HttpResponseRedirect(reverse('admin:index'))
 
     def index(self, request, extra_context=None):
@@ -113,10 +127,16 @@ class CustomUserAdmin(UserAdmin):
 admin_site = MyAdminSite(name='myadmin')
 
 admin_site.register(League, LeagueAdmin)
+admin_site.register(LeagueSyncState, LeagueSyncStateAdmin)
+admin_site.register(Job, JobAdmin)
+admin_site.register(CompletionBatch, CompletionBatchAdmin)
+admin_site.register(CachedCompletion, CachedCompletionAdmin)
+admin_site.register(LeagueSeason, LeagueSeasonAdmin)
 admin_site.register(Roster, RosterAdmin)
 admin_site.register(Team, TeamAdmin)
 admin_site.register(Matchup, MatchupAdmin)
 admin_site.register(Player, PlayerAdmin)
+admin_site.register(DraftPick, DraftPickAdmin)
 admin_site.register(Event, EventAdmin)
 admin_site.register(Article, ArticleAdmin)
 admin_site.register(Group)
@@ -0,0 +1,16 @@
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500):
+    """Insert `objs`, updating `update_fields` on rows that collide on `unique_fields`.
+
+    Issues one INSERT ... ON CONFLICT DO UPDATE per batch, so `unique_fields`
+    must match a unique constraint on the model.
+    """
+    if not objs:
+        return 0
+    model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+    return len(objs)
@@ -0,0 +1,43 @@
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import DraftPick, PlayerStats
+from .nfl_state import fetch_current_nfl_week
+
+
+def draft_picks_with_points(league_id, through_week=None):
+    """The league's draft picks annotated with the PPR points each player has scored this season.
+
+    The points come from PlayerStats in the same query, so no Sleeper
+    requests are made. Each pick also gets `points_rank` (1 = most points
+    among this draft's picks) and `value` (pick_no minus points_rank;
+    positive means the player outscored where they were taken).
+
+    PlayerStats is keyed on week and player only, so weeks this season
+    hasn't reached yet still hold last season's rows. `through_week`
+    therefore defaults to the last completed week of the current season.
+    """
+    if through_week is None:
+        through_week = (fetch_current_nfl_week() or 1) - 1
+    stats = PlayerStats.objects.filter(player_id=OuterRef('player_id'), week__lte=through_week)
+    season_points = stats.values('player_id').annotate(total=Sum('pts_ppr')).values('total')
+
+    return (
+        DraftPick.objects.filter(sleeper_league_id_id=league_id)
+        .annotate(points=Coalesce(Subquery(season_points, output_field=FloatField()), Value(0.0)))
+        .annotate(points_rank=Window(RowNumber(), partition_by=[F('draft_id')], order_by=[F('points').desc(), F('pick_no').asc()]))
+        .annotate(value=F('pick_no') - F('points_rank'))
+        .order_by('pick_no')
+    )
+
+
+def draft_steals(league_id, limit=5, through_week=None):
+    """Picks that have outscored their draft slot by the most."""
+    picks = draft_picks_with_points(league_id, through_week=through_week)
+    return sorted((pick for pick in picks if pick.value > 0), key=lambda pick: pick.value, reverse=True)[:limit]
+
+
+def draft_busts(league_id, limit=5, through_week=None):
+    """Picks that have fallen furthest short of their draft slot."""
+    picks = draft_picks_with_points(league_id, through_week=through_week)
+    return sorted((pick for pick in picks if pick.value < 0), key=lambda pick: pick.value)[:limit]
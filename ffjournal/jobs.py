@@ -0,0 +1,238 @@
+import io
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job, League, LeagueSyncState
+from .nfl_state import fetch_current_nfl_week
+from .sleeper_api import (
+    apply_matchup_data,
+    apply_transactions_data,
+    draft_to_sync,
+    matchup_weeks_to_sync,
+    refresh_leagues,
+    save_draft_picks,
+    transaction_weeks_to_sync,
+)
+from .sleeper_client import get_client
+
+logger = logging.getLogger(__name__)
+
+# kind -> callable(job); register new kinds with @job_handler
+JOB_HANDLERS = {}
+
+# Onboarding backfills jump ahead of routine refreshes
+BACKFILL_PRIORITY = 10
+BACKFILL_CHUNK_SIZE = 4  # Weeks fetched and written per step
+
+
+def job_handler(kind):
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, priority=0, league_id=None):
+    """Queue a job, or return the matching one that is already queued or running."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    payload = payload or {}
+    existing = Job.objects.filter(
+        kind=kind,
+        payload=payload,
+        sleeper_league_id_id=league_id,
+        status__in=['queued', 'running'],
+    ).first()
+    if existing:
+        return existing
+    return Job.objects.create(kind=kind, payload=payload, priority=priority, sleeper_league_id_id=league_id)
+
+
+def claim_job(worker):
+    """Lock and mark the next runnable job as running, or return None.
+
+    SKIP LOCKED lets any number of workers poll the same table without
+    handing the same job to two of them.
+    """
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_after__lte=timezone.now())
+            .order_by('-priority', 'created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.worker = worker
+        job.attempts += 1
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'attempts', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def run_job(job):
+    handler = JOB_HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+        with heartbeat(job, settings.JOB_HEARTBEAT_INTERVAL):
+            handler(job)
+    except Exception:
+        logger.exception(f"Job {job.pk} ({job.kind}) failed")
+        job.status = 'failed'
+        job.error = traceback.format_exc()
+    else:
+        job.status = 'succeeded'
+        job.progress = 100
+    job.finished_at = timezone.now()
+    # A worker that stalled past its lease may find the job requeued and running elsewhere
+    written = Job.objects.filter(pk=job.pk, status='running', worker=job.worker).update(
+        status=job.status,
+        error=job.error,
+        progress=job.progress,
+        finished_at=job.finished_at,
+    )
+    if not written:
+        logger.warning(f"Job {job.pk} ({job.kind}) lost its lease while {job.worker} ran it; dropping its {job.status} result")
+    return job
+
+
+def set_progress(job, progress, message=None):
+    """Record progress without touching the rest of the row."""
+    job.progress = max(0, min(100, int(progress)))
+    update = {'progress': job.progress}
+    if message is not None:
+        job.message = message[:255]
+        update['message'] = job.message
+    Job.objects.filter(pk=job.pk).update(**update)
+
+
+@contextmanager
+def heartbeat(job, interval):
+    """Refresh the job's lease every `interval` seconds until the block exits.
+
+    The beat runs on its own thread so handlers that block for minutes in
+    one call (a full refresh, fetch_players) still look alive.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    Job.objects.filter(pk=job.pk, status='running', worker=job.worker).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception(f"Heartbeat for job {job.pk} failed")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f"job-{job.pk}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def requeue_stale_jobs(timeout, max_attempts):
+    """Put jobs back in the queue whose worker stopped heartbeating, i.e. died while running them.
+
+    Jobs that are merely slow keep their lease fresh and are left alone. A
+    job that has already taken down `max_attempts` workers (say, one that
+    runs out of memory every time) is failed instead of handed out again.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = Job.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed',
+        worker='',
+        finished_at=now,
+        error=f"Worker stopped responding on the last of {max_attempts} attempts",
+    )
+    if failed:
+        logger.warning(f"Failed {failed} stale jobs that ran out of attempts")
+    return stale.filter(attempts__lt=max_attempts).update(status='queued', worker='')
+
+
+@job_handler('refresh_leagues')
+def refresh_leagues_job(job):
+    league_ids = job.payload.get('league_ids')
+    leagues = League.objects.all()
+    if league_ids:
+        leagues = leagues.filter(sleeper_league_id__in=league_ids)
+    leagues = list(leagues)
+
+    done = 0
+    failed = []
+
+    def on_result(league, error):
+        nonlocal done
+        done += 1
+        if error is not None:
+            failed.append(league.sleeper_league_id)
+        set_progress(job, done * 100 / len(leagues), f"{done}/{len(leagues)} leagues refreshed, {len(failed)} failed")
+
+    refresh_leagues(leagues, full=job.payload.get('full', False), on_result=on_result)
+    if failed:
+        raise RuntimeError(f"Failed to refresh leagues: {', '.join(failed)}")
+
+
+@job_handler('fetch_players')
+def fetch_players_job(job):
+    output = io.StringIO()
+    set_progress(job, 0, "Fetching players")
+    call_command('fetch_players', stdout=output)
+    lines = output.getvalue().strip().splitlines()
+    set_progress(job, 100, lines[-1] if lines else "Players fetched")
+
+
+@job_handler('backfill_league')
+def backfill_league_job(job):
+    """Fetch a new league's draft picks, then its past matchups and transactions, most recent weeks first."""
+    league_id = job.sleeper_league_id_id
+    current_week = fetch_current_nfl_week()
+    if not current_week:
+        return
+
+    sync_state = LeagueSyncState.objects.filter(sleeper_league_id_id=league_id).first()
+    client = get_client()
+    league = job.sleeper_league_id
+    draft_id = draft_to_sync(league.draft_id, league.status, sync_state)
+    if draft_id:
+        picks = client.get(f"draft/{draft_id}/picks")
+        if picks is not None:
+            save_draft_picks(league_id, draft_id, picks)
+
+    steps = [('matchups', week) for week in reversed(matchup_weeks_to_sync(sync_state, current_week))]
+    steps += [('transactions', week) for week in reversed(transaction_weeks_to_sync(sync_state, current_week))]
+
+    for start in range(0, len(steps), BACKFILL_CHUNK_SIZE):
+        chunk = steps[start:start + BACKFILL_CHUNK_SIZE]
+        results = client.get_many(f"league/{league_id}/{kind}/{week}" for kind, week in chunk)
+        fetched = {'matchups': {}, 'transactions': {}}
+        for (kind, week), data in zip(chunk, results):
+            fetched[kind][week] = data
+
+        # A short transaction per chunk so finished weeks show up while the rest download
+        with transaction.atomic():
+            if fetched['matchups']:
+                apply_matchup_data(league_id, current_week, fetched['matchups'])
+            if fetched['transactions']:
+                apply_transactions_data(league_id, current_week, fetched['transactions'])
+
+        done = start + len(chunk)
+        set_progress(job, done * 100 / len(steps), f"Synced {done} of {len(steps)} weeks of history")
@@ -0,0 +1,69 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_object_items(chunks, encoding='utf-8'):
+    """Yield (key, value) pairs from a top-level JSON object arriving in byte chunks.
+
+    Only the member being parsed is held in memory, so a multi-megabyte
+    object can be consumed with a buffer roughly the size of one chunk.
+    """
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ''
+    state = 'open'
+    key = None
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+        pos = 0
+
+        while state != 'done':
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buffer):
+                break
+
+            char = buffer[pos]
+            if state == 'open':
+                if char != '{':
+                    raise ValueError("Expected a JSON object")
+                state = 'key'
+                pos += 1
+            elif state == 'colon':
+                if char != ':':
+                    raise ValueError(f"Expected ':' after key {key!r}")
+                state = 'value'
+                pos += 1
+            elif state == 'next':
+                if char == ',':
+                    state = 'key'
+                elif char == '}':
+                    state = 'done'
+                else:
+                    raise ValueError(f"Expected ',' or '}}' after value for {key!r}")
+                pos += 1
+            elif state == 'key' and char == '}':
+                state = 'done'
+                pos += 1
+            else:
+                try:
+                    parsed, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # The member continues in the next chunk
+                if end >= len(buffer):
+                    break  # A number or literal could still be cut short
+                if state == 'key':
+                    key = parsed
+                    state = 'colon'
+                else:
+                    yield key, parsed
+                    state = 'next'
+                pos = end
+
+        buffer = buffer[pos:]
+
+    if state != 'done':
+        raise ValueError("JSON object ended early")
@@ -0,0 +1,97 @@
+import logging
+from collections import defaultdict
+
+from .models import Matchup, PlayerProjection, PlayerStats, Roster, Team
+from .player_table import get_players
+
+logger = logging.getLogger(__name__)
+
+
+class LeagueWeekContext:
+    """Everything the article generators read for one league and week, loaded up front.
+
+    Rosters, teams, this week's and last week's matchups, this week's
+    projections and last week's stats come from a fixed handful of queries,
+    and players come from the process-wide player table. Generators then
+    read from memory, so the query count per league no longer grows with
+    the number of starters.
+    """
+
+    def __init__(self, league, week):
+        self.league = league
+        self.week = week
+        self.rosters = {}  # roster_id -> Roster
+        self.teams = {}  # sleeper_user_id -> Team
+        self.matchups = defaultdict(list)  # week -> [Matchup]
+        self.players = {}  # player_id -> PlayerCard from the process-wide player table
+        self.projections = {}  # player_id -> projected PPR points for `week`
+        self.stats = {}  # player_id -> PPR points scored in `week - 1`
+
+    @classmethod
+    def load(cls, league, week):
+        context = cls(league, week)
+        league_id = league.sleeper_league_id
+
+        context.rosters = {roster.roster_id: roster for roster in Roster.objects.filter(sleeper_league_id=league_id)}
+        context.teams = {team.sleeper_user_id: team for team in Team.objects.filter(sleeper_league_id=league_id)}
+        for matchup in Matchup.objects.filter(sleeper_league_id=league_id, week__in=[week - 1, week]).order_by('matchup_id', 'roster_id'):
+            context.matchups[matchup.week].append(matchup)
+
+        player_ids = set()
+        for roster in context.rosters.values():
+            player_ids.update(str(player_id) for player_id in roster.players or [])
+            player_ids.update(str(player_id) for player_id in roster.starters or [])
+        for matchups in context.matchups.values():
+            for matchup in matchups:
+                player_ids.update(matchup.starters or [])
+        context.load_players(player_ids)
+
+        context.projections = dict(
+            PlayerProjection.objects.filter(week=week, player_id__in=player_ids).values_list('player_id', 'pts_ppr')
+        )
+        context.stats = dict(
+            PlayerStats.objects.filter(week=week - 1, player_id__in=player_ids).values_list('player_id', 'pts_ppr')
+        )
+        logger.info(f"Loaded context for {league.name} week {week}: {len(context.rosters)} rosters, {len(context.players)} players")
+        return context
+
+    def load_players(self, player_ids):
+        """Add players not yet in the context (e.g. trending free agents) from the player table."""
+        missing = [player_id for player_id in player_ids if player_id not in self.players]
+        if missing:
+            self.players.update(get_players(missing))
+
+    def player(self, player_id):
+        return self.players.get(str(player_id))
+
+    def projection(self, player_id):
+        return self.projections.get(str(player_id))
+
+    def roster(self, roster_id):
+        return self.rosters.get(roster_id)
+
+    def team(self, roster):
+        return self.teams.get(roster.owner_id) if roster else None
+
+    def team_name(self, roster):
+        team = self.team(roster)
+        return team.team_name if team else f"Team {roster.owner_id}"
+
+    def matchups_by_id(self, week):
+        """{matchup_id: [Matchup, ...]} for `week`, in matchup order."""
+        grouped = {}
+        for matchup in self.matchups.get(week, []):
+            grouped.setdefault(matchup.matchup_id, []).append(matchup)
+        return grouped
+
+    @property
+    def rostered_player_ids(self):
+        return {str(player_id) for roster in self.rosters.values() for player_id in roster.players or []}
+
+    def roster_of(self, player_id):
+        """The roster in this league that has `player_id`, or None."""
+        player_id = str(player_id)
+        for roster in self.rosters.values():
+            if player_id in {str(rostered) for rostered in roster.players or []}:
+                return roster
+        return None
@@ -0,0 +1,174 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+
+from .models import LeagueSeason, SeasonMatchup, SeasonRoster
+from .nfl_state import REGULAR_SEASON_WEEKS
+from .sleeper_client import get_client
+
+logger = logging.getLogger(__name__)
+
+
+def walk_previous_seasons(league, max_depth=10):
+    """League payloads for each earlier season not yet archived, newest first.
+
+    Follows previous_league_id from `league` and stops at the first season
+    that is already archived, since everything before it is archived too.
+    """
+    client = get_client()
+    seasons = []
+    previous_id = league.previous_league_id
+    while previous_id and previous_id != '0' and len(seasons) < max_depth:
+        if LeagueSeason.objects.filter(sleeper_league_id=previous_id).exists():
+            break
+        league_data = client.get(f"league/{previous_id}")
+        if not league_data:
+            logger.warning(f"Could not fetch previous season {previous_id} of league {league.sleeper_league_id}")
+            break
+        seasons.append(league_data)
+        previous_id = league_data.get('previous_league_id')
+    return seasons
+
+
+def fetch_season_archive(league_data):
+    """Fetch everything archived for one completed season in a single concurrent batch."""
+    league_id = league_data['league_id']
+    last_week = (league_data.get('settings') or {}).get('last_scored_leg') or REGULAR_SEASON_WEEKS
+    weeks = list(range(1, last_week + 1))
+    paths = [f"league/{league_id}/rosters", f"league/{league_id}/users", f"league/{league_id}/winners_bracket"]
+    paths += [f"league/{league_id}/matchups/{week}" for week in weeks]
+    results = get_client().get_many(paths)
+    return {
+        'league': league_data,
+        'rosters': results[0] or [],
+        'users': results[1] or [],
+        'winners_bracket': results[2] or [],
+        'matchups': dict(zip(weeks, results[3:])),
+    }
+
+
+def champion_roster_id(archive):
+    metadata = archive['league'].get('metadata') or {}
+    if metadata.get('latest_league_winner_roster_id'):
+        return int(metadata['latest_league_winner_roster_id'])
+    # The championship is the bracket match that decides first place
+    for match in archive['winners_bracket']:
+        if match.get('p') == 1 and match.get('w'):
+            return int(match['w'])
+    return None
+
+
+def save_season_archive(league, archive):
+    """Write one archived season. Seasons are immutable, so this only ever inserts."""
+    league_data = archive['league']
+    users = {user.get('user_id'): user for user in archive['users']}
+
+    with transaction.atomic():
+        season = LeagueSeason.objects.create(
+            league=league,
+            sleeper_league_id=league_data['league_id'],
+            season=str(league_data.get('season')),
+            name=league_data.get('name') or league.name,
+            previous_league_id=league_data.get('previous_league_id'),
+            champion_roster_id=champion_roster_id(archive),
+            data=league_data,
+        )
+
+        rosters = []
+        for roster in archive['rosters']:
+            settings = roster.get('settings') or {}
+            user = users.get(roster.get('owner_id')) or {}
+            rosters.append(SeasonRoster(
+                season=season,
+                roster_id=roster['roster_id'],
+                owner_id=roster.get('owner_id'),
+                display_name=user.get('display_name'),
+                team_name=(user.get('metadata') or {}).get('team_name'),
+                wins=settings.get('wins', 0),
+                losses=settings.get('losses', 0),
+                ties=settings.get('ties', 0),
+                points_for=settings.get('fpts', 0) + settings.get('fpts_decimal', 0) / 100,
+                points_against=settings.get('fpts_against', 0) + settings.get('fpts_against_decimal', 0) / 100,
+                players=roster.get('players') or [],
+            ))
+        SeasonRoster.objects.bulk_create(rosters)
+
+        SeasonMatchup.objects.bulk_create([
+            SeasonMatchup(
+                season=season,
+                week=week,
+                matchup_id=matchup.get('matchup_id'),
+                roster_id=matchup['roster_id'],
+                points=matchup.get('points'),
+            )
+            for week, matchups in archive['matchups'].items()
+            for matchup in matchups or []
+        ], batch_size=1000)
+    return season
+
+
+def ingest_league_history(league, max_depth=10):
+    """Archive every completed earlier season of `league` that is not stored yet. Returns the new seasons."""
+    previous_seasons = [
+        league_data for league_data in walk_previous_seasons(league, max_depth=max_depth)
+        if league_data.get('status') == 'complete'
+    ]
+    if not previous_seasons:
+        return []
+
+    def fetch(league_data):
+        try:
+            return fetch_season_archive(league_data)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(previous_seasons)) as executor:
+        archives = list(executor.map(fetch, previous_seasons))
+
+    # Oldest first, so an interrupted run leaves a contiguous archived tail of the chain
+    return [save_season_archive(league, archive) for archive in reversed(archives)]
+
+
+def season_champions(league):
+    """(season, SeasonRoster) for every archived season of `league` with a known champion, newest first."""
+    champions = []
+    for season in league.seasons.exclude(champion_roster_id=None).order_by('-season').prefetch_related('rosters'):
+        roster = next((roster for roster in season.rosters.all() if roster.roster_id == season.champion_roster_id), None)
+        if roster:
+            champions.append((season.season, roster))
+    return champions
+
+
+def head_to_head(league, owner_id, opponent_id):
+    """All-time record of `owner_id` against `opponent_id` across the archived seasons of `league`."""
+    roster_ids = defaultdict(dict)
+    for season_id, roster_id, roster_owner in SeasonRoster.objects.filter(
+        season__league=league, owner_id__in=[owner_id, opponent_id]
+    ).values_list('season_id', 'roster_id', 'owner_id'):
+        roster_ids[season_id][roster_owner] = roster_id
+
+    pairings = defaultdict(dict)
+    matchups = SeasonMatchup.objects.filter(
+        season_id__in=list(roster_ids),
+        roster_id__in={roster_id for rosters in roster_ids.values() for roster_id in rosters.values()},
+    ).exclude(matchup_id=None).values_list('season_id', 'week', 'matchup_id', 'roster_id', 'points')
+    for season_id, week, matchup_id, roster_id, points in matchups:
+        pairings[(season_id, week, matchup_id)][roster_id] = points or 0
+
+    record = {'wins': 0, 'losses': 0, 'ties': 0, 'points_for': 0.0, 'points_against': 0.0}
+    for (season_id, week, matchup_id), scores in pairings.items():
+        rosters = roster_ids[season_id]
+        mine, theirs = rosters.get(owner_id), rosters.get(opponent_id)
+        if mine not in scores or theirs not in scores:
+            continue
+        record['points_for'] += scores[mine]
+        record['points_against'] += scores[theirs]
+        if scores[mine] > scores[theirs]:
+            record['wins'] += 1
+        elif scores[mine] < scores[theirs]:
+            record['losses'] += 1
+        else:
+            record['ties'] += 1
+    return record
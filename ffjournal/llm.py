@@ -0,0 +1,467 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+
+import openai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from openai import AsyncOpenAI, OpenAI
+from openai.types.chat import ChatCompletion
+
+from .bulk import bulk_upsert
+from .models import Article, CachedCompletion, CompletionBatch
+
+logger = logging.getLogger(__name__)
+
+# Rough output allowance per completion when the request doesn't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+BACKOFF_BASE = 1.0  # Seconds
+BACKOFF_CAP = 60.0  # Seconds
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+BATCH_ENDPOINT = '/v1/chat/completions'
+BATCH_COMPLETION_WINDOW = '24h'
+
+
+def client_options():
+    """Keyword arguments for OpenAI clients; OPENAI_BASE_URL points them at a stand-in."""
+    return {'api_key': settings.OPENAI_API_KEY, 'base_url': settings.OPENAI_BASE_URL or None}
+
+
+def estimate_tokens(messages, params):
+    """Cheap upper-ish estimate of a request's prompt plus completion tokens (about 4 characters per token)."""
+    characters = sum(len(message.get('content') or '') for message in messages)
+    characters += len(json.dumps(params.get('functions') or params.get('tools') or []))
+    return characters // 4 + (params.get('max_tokens') or DEFAULT_COMPLETION_TOKENS)
+
+
+def completion_cache_key(model, messages, params):
+    """sha256 of everything that determines a completion, so identical prompts share a cache entry.
+
+    The endpoint is part of the key so stand-in responses are never served to real runs.
+    """
+    payload = json.dumps(
+        {'base_url': settings.OPENAI_BASE_URL, 'model': model, 'messages': messages, 'params': params}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass
+class CompletionRequest:
+    model: str
+    messages: list
+    params: dict = field(default_factory=dict)
+    label: str = ''
+    on_result: object = None  # Called with the completion, or None if the request failed
+    completion: object = None
+    error: Exception = None
+    attempts: int = 0
+    cached: bool = False  # The completion came from, or has been written to, the completion cache
+
+    @property
+    def estimated_tokens(self):
+        return estimate_tokens(self.messages, self.params)
+
+    @property
+    def cache_key(self):
+        return completion_cache_key(self.model, self.messages, self.params)
+
+    @property
+    def done(self):
+        return self.completion is not None or self.error is not None
+
+
+class RateBudget:
+    """Async token bucket holding up to `per_minute` units, refilled continuously."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount=1):
+        # A single request larger than the whole budget waits for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+    def debit(self, amount):
+        """Charge usage beyond what was acquired up front; the balance may go negative."""
+        self._refill()
+        self.available -= amount
+
+
+class GenerationExecutor:
+    """Runs chat completions concurrently within concurrency, RPM and TPM limits.
+
+    Rate-limit and transient errors are retried with full-jitter backoff.
+    A 429 also pauses every request for its Retry-After, so the whole
+    fan-out slows down instead of each task hammering the API on its own.
+    """
+
+    def __init__(self, client=None, max_concurrency=None, requests_per_minute=None, tokens_per_minute=None, max_retries=None):
+        self.client = client
+        self.max_concurrency = max_concurrency or settings.OPENAI_MAX_CONCURRENCY
+        self.requests_per_minute = requests_per_minute or settings.OPENAI_REQUESTS_PER_MINUTE
+        self.tokens_per_minute = tokens_per_minute or settings.OPENAI_TOKENS_PER_MINUTE
+        self.max_retries = settings.OPENAI_MAX_RETRIES if max_retries is None else max_retries
+        self.paused_until = 0.0
+
+    def execute(self, requests):
+        return asyncio.run(self.run(requests))
+
+    async def run(self, requests):
+        requests = [request for request in requests if not request.done]
+        if not requests:
+            return requests
+        if self.client is None:
+            # Retries are handled here so they share the rate budgets
+            self.client = AsyncOpenAI(**client_options(), max_retries=0)
+
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.request_budget = RateBudget(self.requests_per_minute)
+        self.token_budget = RateBudget(self.tokens_per_minute)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(self.complete(request) for request in requests))
+        failed = sum(1 for request in requests if request.error is not None)
+        logger.info(f"Generated {len(requests) - failed} of {len(requests)} completions in {time.perf_counter() - start:.1f}s")
+        return requests
+
+    async def complete(self, request):
+        estimated = request.estimated_tokens
+        async with self.semaphore:
+            while True:
+                request.attempts += 1
+                await self.request_budget.acquire(1)
+                await self.token_budget.acquire(estimated)
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+
+                try:
+                    request.completion = await self.client.chat.completions.create(
+                        model=request.model, messages=request.messages, **request.params
+                    )
+                except RETRYABLE_ERRORS as e:
+                    if request.attempts > self.max_retries:
+                        logger.error(f"Giving up on completion {request.label} after {request.attempts} attempts: {e}")
+                        request.error = e
+                        return
+                    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (request.attempts - 1)))
+                    retry_after = self.retry_after(e)
+                    if retry_after is not None:
+                        delay = max(delay, retry_after)
+                        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+                    logger.warning(f"Completion {request.label} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                except Exception as e:
+                    logger.error(f"Completion {request.label} failed: {e}")
+                    request.error = e
+                    return
+
+                usage = getattr(request.completion, 'usage', None)
+                if usage is not None and usage.total_tokens > estimated:
+                    self.token_budget.debit(usage.total_tokens - estimated)
+                break
+
+        # Cache each completion as it lands, so a run that dies halfway doesn't pay for these again
+        try:
+            await sync_to_async(store_completions)([request])
+        except Exception:
+            logger.exception(f"Caching completion {request.label} failed")
+
+    @staticmethod
+    def retry_after(error):
+        response = getattr(error, 'response', None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+
+
+class GenerationBatch:
+    """Collects completions from any number of generators and leagues, then runs them together.
+
+    Generators `add` their requests with an `on_result` callback and may
+    register `then` callbacks for work that needs every result (such as
+    combining matchup write-ups into one article). `run` sends everything
+    through the executor (live concurrent calls by default, or a
+    BatchExecutor), then calls the callbacks in the order they were added,
+    from the calling thread, so they can write to the database. Requests
+    whose prompts were completed within OPENAI_CACHE_TTL are answered from
+    the CachedCompletion table and never reach the executor.
+    """
+
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.requests = []
+        self.callbacks = []
+
+    def __len__(self):
+        return len(self.requests)
+
+    def add(self, model, messages, label='', on_result=None, **params):
+        request = CompletionRequest(model=model, messages=messages, params=params, label=label, on_result=on_result)
+        self.requests.append(request)
+        return request
+
+    def then(self, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        requests, callbacks = self.requests, self.callbacks
+        self.requests, self.callbacks = [], []
+        if requests:
+            reused = load_cached_completions(requests)
+            if reused:
+                logger.info(f"Reused {reused} of {len(requests)} completions from the cache")
+            (self.executor or GenerationExecutor()).execute(requests)
+            store_completions(requests)
+            prune_completion_cache()
+
+        for request in requests:
+            if request.on_result is None:
+                continue
+            try:
+                request.on_result(request.completion)
+            except Exception:
+                logger.exception(f"Handling completion {request.label} failed")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Batch callback failed")
+        return requests
+
+
+class BatchExecutor:
+    """Runs completions through the provider's Batch API instead of live calls.
+
+    Requests are written to a JSONL file named after the hash of its
+    contents, uploaded, and submitted as one batch; `execute` then polls
+    until the batch finishes and fills in each request's completion. The
+    batch is recorded as a CompletionBatch, so running again with the same
+    prompts (say, after the process was restarted) resumes polling the
+    existing batch instead of paying for a second one.
+    """
+
+    def __init__(self, client=None, week=None, leagues=(), batch_dir=None, poll_interval=None):
+        self.client = client
+        self.week = week
+        self.leagues = list(leagues)
+        self.batch_dir = Path(batch_dir or settings.OPENAI_BATCH_DIR)
+        self.poll_interval = settings.OPENAI_BATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.job = None
+
+    def execute(self, requests):
+        requests = [request for request in requests if not request.done]
+        if not requests:
+            return requests
+        if self.client is None:
+            self.client = OpenAI(**client_options())
+
+        by_id = {f"{index}:{request.label}": request for index, request in enumerate(requests)}
+        lines = [
+            json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': {'model': request.model, 'messages': request.messages, **request.params},
+            })
+            for custom_id, request in by_id.items()
+        ]
+        content = ('\n'.join(lines) + '\n').encode()
+
+        self.job = self.submit(content, len(requests))
+        batch = self.wait(self.job)
+        self.ingest(batch, by_id)
+        return requests
+
+    def submit(self, content, request_count):
+        sha = hashlib.sha256(content).hexdigest()
+        job = (
+            CompletionBatch.objects.filter(input_sha256=sha)
+            .exclude(status__in=['failed', 'expired', 'cancelled'])
+            .order_by('-created_at')
+            .first()
+        )
+        if job is not None:
+            logger.info(f"Resuming batch {job.batch_id} for {request_count} requests")
+            return job
+
+        self.batch_dir.mkdir(parents=True, exist_ok=True)
+        path = self.batch_dir / f"{sha[:16]}.jsonl"
+        path.write_bytes(content)
+
+        input_file = self.client.files.create(file=(path.name, content), purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+            metadata={'week': str(self.week or '')},
+        )
+        logger.info(f"Submitted batch {batch.id} with {request_count} requests from {path}")
+        return CompletionBatch.objects.create(
+            batch_id=batch.id,
+            input_sha256=sha,
+            input_file=str(path),
+            week=self.week,
+            leagues=self.leagues,
+            status=batch.status,
+            request_count=request_count,
+        )
+
+    def wait(self, job):
+        while True:
+            batch = self.client.batches.retrieve(job.batch_id)
+            if batch.status != job.status:
+                logger.info(f"Batch {job.batch_id} is {batch.status}")
+                job.status = batch.status
+                job.save(update_fields=['status'])
+            if batch.status in CompletionBatch.TERMINAL_STATUSES:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def ingest(self, batch, by_id):
+        # Expired and cancelled batches still return whatever finished in time
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                request = by_id.get(result.get('custom_id'))
+                if request is None:
+                    continue
+                response = result.get('response') or {}
+                if response.get('status_code') == 200:
+                    request.completion = ChatCompletion.model_validate(response['body'])
+                else:
+                    error = result.get('error') or response.get('body', {}).get('error') or response
+                    request.error = RuntimeError(f"Batch request {request.label} failed: {error}")
+
+        for request in by_id.values():
+            if not request.done:
+                request.error = RuntimeError(f"Batch {batch.id} ended {batch.status} without a result for {request.label}")
+
+        job = self.job
+        job.succeeded_count = sum(1 for request in by_id.values() if request.completion is not None)
+        job.failed_count = len(by_id) - job.succeeded_count
+        job.error = '' if batch.status == 'completed' else str(getattr(batch, 'errors', None) or '')
+        job.completed_at = timezone.now()
+        job.save(update_fields=['succeeded_count', 'failed_count', 'error', 'completed_at'])
+        logger.info(f"Batch {batch.id} {batch.status}: {job.succeeded_count} of {len(by_id)} completions")
+
+
+def load_cached_completions(requests):
+    """Fill in completions for requests whose prompts have an unexpired cache entry; returns how many."""
+    if not settings.OPENAI_CACHE_TTL:
+        return 0
+    by_key = {}
+    for request in requests:
+        if not request.done:
+            by_key.setdefault(request.cache_key, []).append(request)
+    if not by_key:
+        return 0
+
+    reused = 0
+    entries = CachedCompletion.objects.filter(key__in=list(by_key), expires_at__gt=timezone.now()).values_list('key', 'response')
+    for key, response in entries:
+        completion = ChatCompletion.model_validate(response)
+        for request in by_key[key]:
+            request.completion = completion
+            request.cached = True
+            reused += 1
+    return reused
+
+
+def store_completions(requests):
+    """Write new completions to the cache for OPENAI_CACHE_TTL seconds."""
+    if not settings.OPENAI_CACHE_TTL:
+        return 0
+    # Truncated completions are worth retrying, so they are not kept
+    fresh = [
+        request for request in requests
+        if request.completion is not None and not request.cached and request.completion.choices[0].finish_reason != 'length'
+    ]
+    if not fresh:
+        return 0
+
+    now = timezone.now()
+    entries = {
+        request.cache_key: CachedCompletion(
+            key=request.cache_key,
+            model=request.model,
+            response=request.completion.model_dump(mode='json'),
+            expires_at=now + timedelta(seconds=settings.OPENAI_CACHE_TTL),
+        )
+        for request in fresh
+    }
+    written = bulk_upsert(CachedCompletion, list(entries.values()), unique_fields=['key'], update_fields=['model', 'response', 'expires_at'])
+    for request in fresh:
+        request.cached = True
+    return written
+
+
+def prune_completion_cache():
+    return CachedCompletion.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+def pregenerated_leagues(week, labels):
+    """sleeper_league_ids a completed batch generated for `week` that have an Article for every label in `labels`.
+
+    The Article rows decide it, not the batch's counts: a league whose
+    script failed, or whose result couldn't be parsed, is missing articles
+    and gets generated again at send time.
+    """
+    candidates = set()
+    for batch_leagues in CompletionBatch.objects.filter(week=week, status='completed').values_list('leagues', flat=True):
+        candidates.update(batch_leagues)
+    if not candidates:
+        return set()
+
+    saved = defaultdict(set)
+    articles = Article.objects.filter(sleeper_league_id__in=candidates, week=week, label__in=labels).values_list('sleeper_league_id', 'label')
+    for league_id, label in articles:
+        saved[league_id].add(label)
+    return {league_id for league_id in candidates if saved[league_id] >= set(labels)}
+
+
+def function_arguments(completion):
+    """Parsed arguments of a forced function call, or None if the completion is missing or malformed."""
+    if completion is None:
+        return None
+    arguments = completion.choices[0].message.function_call.arguments
+    try:
+        return json.loads(arguments)
+    except json.JSONDecodeError:
+        # Models occasionally emit raw control characters inside strings
+        try:
+            return json.loads(''.join(char for char in arguments if ord(char) >= 32))
+        except json.JSONDecodeError:
+            logger.error(f"Could not parse function arguments: {arguments[:200]}")
+            return None
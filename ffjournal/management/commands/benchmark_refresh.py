@@ -0,0 +1,61 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from ffjournal.models import League
+from ffjournal.sleeper_api import refresh_leagues
+from ffjournal.sleeper_client import get_client
+
+class Command(BaseCommand):
+    help = 'Time a full league refresh, normally against the sleeper_standin replay server. Writes to the configured database; point it at a scratch one.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('league_ids', nargs='*', help='Sleeper league IDs to refresh (defaults to every league in the database).')
+        parser.add_argument('--workers', type=int, default=None, help='Leagues refreshed concurrently (defaults to SLEEPER_REFRESH_WORKERS).')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs.')
+        parser.add_argument('--use-cache', action='store_true', help='Keep the on-disk response cache enabled.')
+        parser.add_argument('--live', action='store_true', help='Allow running against the real Sleeper API.')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive', help='Overwrite league data without asking for confirmation.')
+
+    def handle(self, *args, **kwargs):
+        if not settings.SLEEPER_STANDIN_URL and not kwargs['live']:
+            raise CommandError('SLEEPER_STANDIN_URL is not set. Start sleeper_standin and set it, or pass --live.')
+
+        if kwargs['league_ids']:
+            leagues = [League(sleeper_league_id=league_id, name=league_id) for league_id in kwargs['league_ids']]
+        else:
+            leagues = list(League.objects.all())
+        if not leagues:
+            raise CommandError('No leagues to refresh.')
+
+        # The refresh threads write through their own connections, so the runs can't be rolled back afterwards
+        if kwargs['interactive']:
+            confirm = input(
+                f"This writes the refreshed data for {len(leagues)} leagues into the database "
+                f"{connection.settings_dict['NAME']!r}, overwriting what is stored there.\n"
+                "Type 'yes' to continue, or 'no' to cancel: "
+            )
+            if confirm != 'yes':
+                raise CommandError('Benchmark cancelled.')
+
+        client = get_client()
+        if not kwargs['use_cache']:
+            client.cache = None
+
+        self.stdout.write(f"Refreshing {len(leagues)} leagues against {settings.SLEEPER_STANDIN_URL or 'the live Sleeper API'}")
+        for run in range(1, kwargs['repeat'] + 1):
+            client.stats.clear()
+            start = time.perf_counter()
+            results = refresh_leagues(leagues, max_workers=kwargs['workers'], full=True)
+            elapsed = time.perf_counter() - start
+
+            failed = [league for league, error in results if error is not None]
+            stats = client.stats
+            self.stdout.write(
+                f"run {run}: {elapsed:7.2f}s  {len(leagues) / elapsed:6.2f} leagues/s  "
+                f"{stats['requests'] / elapsed:7.1f} req/s  {stats['requests']} requests, "
+                f"{stats['retries']} retries, {stats['cache_hits']} cache hits, {len(failed)} failed"
+            )
+            for league, error in results:
+                if error is not None:
+                    self.stdout.write(self.style.ERROR(f"  {league.sleeper_league_id}: {error}"))
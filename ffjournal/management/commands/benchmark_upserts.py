@@ -0,0 +1,147 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from ffjournal.models import League, Roster, Matchup
+from ffjournal.sleeper_api import save_matchup_data, save_roster_data
+
+
+def legacy_save_roster_data(league_id, rosters_data):
+    """The original row-at-a-time roster write, kept for comparison."""
+    for roster in rosters_data:
+        roster_dict = {
+            'sleeper_league_id_id': league_id,
+            'roster_id': roster.get('roster_id'),
+            'owner_id': roster.get('owner_id'),
+            'co_owners': roster.get('co_owners'),
+            'keepers': roster.get('keepers'),
+            'players': roster.get('players'),
+            'starters': roster.get('starters')
+        }
+        existing_roster = Roster.objects.filter(
+            sleeper_league_id=league_id,
+            roster_id=roster_dict['roster_id']
+        ).first()
+        if existing_roster:
+            for key, value in roster_dict.items():
+                setattr(existing_roster, key, value)
+            existing_roster.save()
+        else:
+            Roster.objects.create(**roster_dict)
+
+
+def legacy_save_matchup_data(league_id, week, matchups_data):
+    """The original row-at-a-time matchup write, kept for comparison."""
+    for matchup in matchups_data:
+        matchup_dict = {
+            'sleeper_league_id_id': league_id,
+            'matchup_id': matchup.get('matchup_id'),
+            'roster_id': matchup.get('roster_id'),
+            'points': matchup.get('points'),
+            'custom_points': matchup.get('custom_points'),
+            'week': week,
+            'players': matchup.get('players'),
+            'starters': matchup.get('starters'),
+            'starters_points': matchup.get('starters_points'),
+            'players_points': matchup.get('players_points')
+        }
+        existing_matchup = Matchup.objects.filter(
+            sleeper_league_id=league_id,
+            matchup_id=matchup_dict['matchup_id'],
+            roster_id=matchup_dict['roster_id'],
+            week=week
+        ).first()
+        if existing_matchup:
+            for key, value in matchup_dict.items():
+                setattr(existing_matchup, key, value)
+            existing_matchup.save()
+        else:
+            Matchup.objects.create(**matchup_dict)
+
+
+def fake_rosters(teams):
+    return [
+        {
+            'roster_id': roster_id,
+            'owner_id': f"bench_owner_{roster_id}",
+            'co_owners': None,
+            'keepers': None,
+            'players': [str(random.randint(1000, 9999)) for _ in range(16)],
+            'starters': [str(random.randint(1000, 9999)) for _ in range(9)],
+        }
+        for roster_id in range(1, teams + 1)
+    ]
+
+
+def fake_matchups(teams):
+    matchups = []
+    for roster_id in range(1, teams + 1):
+        starters = [str(random.randint(1000, 9999)) for _ in range(9)]
+        players = starters + [str(random.randint(1000, 9999)) for _ in range(7)]
+        matchups.append({
+            'matchup_id': (roster_id + 1) // 2,
+            'roster_id': roster_id,
+            'points': round(random.uniform(60, 160), 2),
+            'custom_points': None,
+            'players': players,
+            'starters': starters,
+            'starters_points': [round(random.uniform(0, 30), 2) for _ in starters],
+            'players_points': {player_id: round(random.uniform(0, 30), 2) for player_id in players},
+        })
+    return matchups
+
+
+class Command(BaseCommand):
+    help = 'Benchmark row-by-row vs. bulk upserts for roster and matchup ingestion. All writes are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=5, help='Number of synthetic leagues.')
+        parser.add_argument('--teams', type=int, default=12, help='Teams per league.')
+        parser.add_argument('--weeks', type=int, default=17, help='Weeks of matchups per league.')
+
+    def handle(self, *args, **options):
+        leagues, teams, weeks = options['leagues'], options['teams'], options['weeks']
+        rosters = fake_rosters(teams)
+        matchups = {week: fake_matchups(teams) for week in range(1, weeks + 1)}
+        rows_per_pass = leagues * (len(rosters) + sum(len(rows) for rows in matchups.values()))
+
+        self.stdout.write(f"{leagues} leagues x {teams} teams x {weeks} weeks = {rows_per_pass} rows per pass")
+
+        for label, save_rosters, save_matchups in (
+            ('row-by-row', legacy_save_roster_data, legacy_save_matchup_data),
+            ('bulk upsert', save_roster_data, save_matchup_data),
+        ):
+            timings = self.run(leagues, rosters, matchups, save_rosters, save_matchups)
+            for phase, elapsed in timings:
+                self.stdout.write(
+                    f"{label:<12} {phase:<7} {elapsed:8.3f}s  {rows_per_pass / elapsed:10.0f} rows/s"
+                )
+
+    def run(self, leagues, rosters, matchups, save_rosters, save_matchups):
+        """Write every league twice (insert, then update) inside a transaction that is rolled back."""
+        timings = []
+        with transaction.atomic():
+            league_ids = []
+            for index in range(leagues):
+                league = League.objects.create(
+                    sleeper_league_id=f"benchmark_{index}",
+                    name=f"Benchmark League {index}",
+                    status='in_season',
+                    playoff_teams=6,
+                    num_teams=len(rosters),
+                    playoff_week_start=15,
+                    total_rosters=len(rosters),
+                    data={},
+                )
+                league_ids.append(league.sleeper_league_id)
+
+            for phase in ('insert', 'update'):
+                start = time.perf_counter()
+                for league_id in league_ids:
+                    save_rosters(league_id, rosters)
+                    for week, rows in matchups.items():
+                        save_matchups(league_id, week, rows)
+                timings.append((phase, time.perf_counter() - start))
+
+            transaction.set_rollback(True)
+        return timings
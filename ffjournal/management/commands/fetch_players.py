@@ -1,250 +1,282 @@
-import requests
+import argparse
+import hashlib
+import json
 import logging
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from django.core.management.base import BaseCommand
+from ffjournal.bulk import bulk_upsert
+from ffjournal.json_stream import iter_object_items
 from ffjournal.models import Player, Roster, PlayerProjection, PlayerStats
+from ffjournal.nfl_state import fetch_current_nfl_week, get_current_season
+from ffjournal.player_names import PlayerNameIndex
+from ffjournal.player_table import bump_version
+from ffjournal.sleeper_client import SleeperAPIError, get_client
 from fantasy_rankings_scraper import scrape
 from django.db.models import F
 
 # Configure logging
 logging.basicConfig(filename='fetch_players.log', level=logging.INFO, format='%(asctime)s - %(message)s')
 
+# Columns copied straight from the Sleeper payload
+PLAYER_COLUMNS = [
+    'first_name', 'last_name', 'full_name', 'position', 'team', 'age', 'college', 'status',
+    'height', 'weight', 'injury_status', 'injury_body_part', 'injury_start_date', 'injury_notes',
+    'practice_participation', 'practice_description', 'birth_date', 'birth_city', 'birth_state',
+    'birth_country', 'years_exp', 'high_school', 'fantasy_positions', 'number', 'depth_chart_position',
+    'depth_chart_order', 'search_rank'
+]
+PLAYER_SYNC_FIELDS = PLAYER_COLUMNS + ['data', 'data_digest']
+# Keys that already have a column, so Player.data doesn't store them twice
+PROMOTED_KEYS = frozenset(PLAYER_COLUMNS + ['player_id'])
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Weekly projections and stats, fetched for every player at once
+WEEKLY_POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF']
+WEEKLY_ENDPOINTS = {
+    'projections': (PlayerProjection, "https://api.sleeper.com/projections/nfl"),
+    'stats': (PlayerStats, "https://api.sleeper.com/stats/nfl"),
+}
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def player_digest(player_info):
+    """Stable sha256 of a player's Sleeper payload."""
+    payload = json.dumps(player_info, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def slim_player_data(player_info):
+    """The part of a Sleeper payload worth keeping in Player.data: keys without a column, minus empty values."""
+    return {
+        key: value for key, value in player_info.items()
+        if key not in PROMOTED_KEYS and value not in (None, '', [], {})
+    }
+
+def build_player(player_id, player_info, digest):
+    player = Player(player_id=player_id, data=slim_player_data(player_info), data_digest=digest)
+    for column in PLAYER_COLUMNS:
+        setattr(player, column, player_info.get(column))
+    # Team defenses and some free agents come back without a full_name
+    if not player.full_name and (player.first_name or player.last_name):
+        player.full_name = f"{player.first_name or ''} {player.last_name or ''}".strip()
+    return player
+
 class Command(BaseCommand):
     help = 'Fetch player data, update the database, and fetch player projections'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stream', action=argparse.BooleanOptionalAction, default=True,
+            help='Parse the players dump incrementally instead of loading it whole (default: on).'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Players written per batch.')
+
     def handle(self, *args, **kwargs):
-        self.fetch_player_data()
+        counts = self.fetch_player_data(stream=kwargs.get('stream', True), batch_size=kwargs.get('batch_size', 1000))
+        # Workers reload their in-process player tables on their next version check.
+        # Bump before the rankings scrape too, so a scraper failure can't hide fresh player rows.
+        if counts and (counts['inserted'] or counts['changed']):
+            bump_version()
         self.update_player_rankings()
+        bump_version()
         self.fetch_player_stats()
         self.fetch_player_projections()
 
-    def fetch_player_data(self):
-        url = "https://api.sleeper.app/v1/players/nfl"
-        response = requests.get(url)
-        
-        if response.status_code == 200:
-            players_data = response.json()
-            
-            players_to_create = []
-            players_to_update = []
-
-            for player_id, player_info in players_data.items():
-                player_dict = {
-                    'player_id': str(player_id),
-                    'first_name': player_info.get('first_name'),
-                    'last_name': player_info.get('last_name'),
-                    'full_name': player_info.get('full_name'),
-                    'position': player_info.get('position'),
-                    'team': player_info.get('team'),
-                    'age': player_info.get('age'),
-                    'college': player_info.get('college'),
-                    'status': player_info.get('status'),
-                    'height': player_info.get('height'),
-                    'weight': player_info.get('weight'),
-                    'injury_status': player_info.get('injury_status'),
-                    'injury_body_part': player_info.get('injury_body_part'),
-                    'injury_start_date': player_info.get('injury_start_date'),
-                    'injury_notes': player_info.get('injury_notes'),
-                    'practice_participation': player_info.get('practice_participation'),
-                    'practice_description': player_info.get('practice_description'),
-                    'birth_date': player_info.get('birth_date'),
-                    'birth_city': player_info.get('birth_city'),
-                    'birth_state': player_info.get('birth_state'),
-                    'birth_country': player_info.get('birth_country'),
-                    'years_exp': player_info.get('years_exp'),
-                    'high_school': player_info.get('high_school'),
-                    'data': player_info
-                }
-                
-                existing_player = Player.objects.filter(player_id=str(player_id)).first()
-
-                if existing_player:
-                    for key, value in player_dict.items():
-                        setattr(existing_player, key, value)
-                    players_to_update.append(existing_player)
-                else:
-                    players_to_create.append(Player(**player_dict))
-            
-            # Bulk create and update
+    def fetch_player_data(self, stream=True, batch_size=1000):
+        client = get_client()
+        if stream:
+            response = client.get_stream("players/nfl")
+            if response is None:
+                logging.error("Failed to fetch player data.")
+                return
+            with response:
+                counts = self.sync_players(iter_object_items(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)), batch_size)
+        else:
+            players_data = client.get("players/nfl")
+            if players_data is None:
+                logging.error("Failed to fetch player data.")
+                return
+            counts = self.sync_players(players_data.items(), batch_size)
+
+        summary = (
+            f"Players: {counts['inserted']} inserted, {counts['changed']} changed, {counts['unchanged']} unchanged "
+            f"({'streamed' if stream else 'buffered'}, peak RSS {peak_rss_mb():.1f} MB)"
+        )
+        logging.info(summary)
+        self.stdout.write(summary)
+        logging.info("Player data has been updated in the database.")
+        return counts
+
+    def sync_players(self, player_items, batch_size):
+        """Write new and changed players from (player_id, payload) pairs, batch_size rows at a time."""
+        # One query for every existing player's id and digest
+        existing_players = {
+            player_id: (pk, digest)
+            for pk, player_id, digest in Player.objects.values_list('pk', 'player_id', 'data_digest')
+        }
+
+        counts = {'inserted': 0, 'changed': 0, 'unchanged': 0, 'missing_names': 0}
+        players_to_create = []
+        players_to_update = []
+
+        def flush():
             if players_to_create:
-                Player.objects.bulk_create(players_to_create)
+                Player.objects.bulk_create(players_to_create, batch_size=batch_size)
                 logging.info(f"Created {len(players_to_create)} new players.")
-
             if players_to_update:
-                Player.objects.bulk_update(players_to_update, [
-                    'first_name', 'last_name', 'full_name', 'position', 'team', 'age', 'college', 'status',
-                    'height', 'weight', 'injury_status', 'injury_body_part', 'injury_start_date', 'injury_notes',
-                    'practice_participation', 'practice_description', 'birth_date', 'birth_city', 'birth_state',
-                    'birth_country', 'years_exp', 'high_school', 'data'
-                ])
+                Player.objects.bulk_update(players_to_update, PLAYER_SYNC_FIELDS, batch_size=batch_size)
                 logging.info(f"Updated {len(players_to_update)} players.")
-            
-            # Update full_name for players where it is null
-            players_to_update_fullname = Player.objects.filter(full_name__isnull=True)
-            logging.info(f"Found {players_to_update_fullname.count()} players with null full_name")
-
-            for player in players_to_update_fullname:
-                if player.first_name or player.last_name:
-                    player.full_name = f"{player.first_name or ''} {player.last_name or ''}".strip()
-                    player.save()
-                    logging.info(f"Updated full_name for player: {player.player_id} to '{player.full_name}'")
-                else:
-                    logging.warning(f"Unable to update full_name for player: {player.player_id}. Both first_name and last_name are missing.")
-
-            # Double-check if any players still have null full_name
-            remaining_null_fullname = Player.objects.filter(full_name__isnull=True).count()
-            logging.info(f"After update, {remaining_null_fullname} players still have null full_name")
-
-            logging.info("Player data has been updated in the database.")
-        else:
-            logging.error(f"Failed to fetch player data. Status code: {response.status_code}")
+            counts['missing_names'] += sum(1 for player in players_to_create + players_to_update if not player.full_name)
+            players_to_create.clear()
+            players_to_update.clear()
+
+        for player_id, player_info in player_items:
+            player_id = str(player_id)
+            digest = player_digest(player_info)
+            existing = existing_players.get(player_id)
+
+            if existing and existing[1] == digest:
+                counts['unchanged'] += 1
+                continue
+
+            player = build_player(player_id, player_info, digest)
+            if existing:
+                player.pk = existing[0]
+                players_to_update.append(player)
+                counts['changed'] += 1
+            else:
+                players_to_create.append(player)
+                counts['inserted'] += 1
+
+            if len(players_to_create) + len(players_to_update) >= batch_size:
+                flush()
+        flush()
+
+        if counts['missing_names']:
+            logging.warning(f"{counts['missing_names']} written players have no full_name, first_name or last_name")
+        return counts
 
     def update_player_rankings(self):
         data = scrape('fantasypros.com')
         player_rankings = data.get_format(1)
 
-        players_to_update = []
-        total_players = len(player_rankings)
-        players_found = 0
+        start = time.perf_counter()
+        index = PlayerNameIndex.build()
+        rankings = {}
+        rules = Counter()
         players_not_found = 0
 
         for player_data in player_rankings:
             player_name = player_data['player_name']
             player_team_id = player_data['player_team_id']
             player_position_id = player_data['player_position_id']
-            rank_ave = player_data['rank_ave']
-
-            player = Player.objects.filter(
-                full_name__iexact=player_name,
-                team__iexact=player_team_id,
-                position__iexact=player_position_id
-            ).first()
 
-            if player:
-                player.rank_ave = float(rank_ave)
-                players_to_update.append(player)
-                players_found += 1
-                logging.info(f"Found player: {player_name}, {player_team_id}, {player_position_id}, rank_ave: {rank_ave}")
+            pk, rule = index.match(player_name, player_team_id, player_position_id)
+            if pk is not None:
+                rankings[pk] = float(player_data['rank_ave'])
+                rules[rule] += 1
             else:
                 players_not_found += 1
                 logging.warning(f"Player not found: {player_name}, {player_team_id}, {player_position_id}")
 
-        if players_to_update:
-            Player.objects.bulk_update(players_to_update, ['rank_ave'])
-            logging.info(f"Updated rankings for {len(players_to_update)} players.")
+        if rankings:
+            Player.objects.bulk_update(
+                [Player(pk=pk, rank_ave=rank_ave) for pk, rank_ave in rankings.items()],
+                ['rank_ave'],
+                batch_size=1000
+            )
         else:
             logging.warning("No players were updated with new rankings.")
 
-        logging.info(f"Total players processed: {total_players}")
-        logging.info(f"Players found and updated: {players_found}")
-        logging.info(f"Players not found: {players_not_found}")
-        logging.info("Player rankings update process completed.")
+        total_players = len(player_rankings)
+        match_rate = (total_players - players_not_found) / total_players * 100 if total_players else 0
+        summary = (
+            f"Rankings: matched {total_players - players_not_found}/{total_players} ({match_rate:.1f}%), "
+            f"{', '.join(f'{count} {rule}' for rule, count in rules.most_common()) or 'none'}; "
+            f"{len(rankings)} players updated in {time.perf_counter() - start:.2f}s"
+        )
+        logging.info(summary)
+        self.stdout.write(summary)
 
     def fetch_player_projections(self):
-        # Get unique player IDs from all rosters
-        player_ids = set()
-        for roster in Roster.objects.all():
-            player_ids.update(roster.players)
-
-        # Remove team defenses (usually represented by team abbreviations)
-        player_ids = {pid for pid in player_ids if not pid.isalpha()}
-
-        # Get the current NFL week (you may need to implement this logic)
-        current_nfl_week = self.get_current_nfl_week()
-        projection_week = current_nfl_week + 1
-
-        base_url = "https://api.sleeper.com/projections/nfl/player"
-        
-        for player_id in player_ids:
-            url = f"{base_url}/{player_id}?season_type=regular&season=2024&week={projection_week}"
-            response = requests.get(url)
-            
-            if response.status_code == 200:
-                projection_data = response.json()
-                
-                # Extract relevant data from the projection, defaulting to None if not found
-                pts_ppr = None
-                opponent = None
-                
-                if projection_data:
-                    stats = projection_data.get('stats', {})
-                    if isinstance(stats, dict):
-                        pts_ppr = stats.get('pts_ppr')
-                    opponent = projection_data.get('opponent')
-                
-                player = Player.objects.filter(player_id=player_id).first()
-                if player:
-                    PlayerProjection.objects.update_or_create(
-                        player=player,
-                        week=projection_week,
-                        defaults={
-                            'pts_ppr': pts_ppr,
-                            'opponent': opponent
-                        }
-                    )
-                    logging.info(f"Updated projection for player {player_id} for week {projection_week}")
-                else:
-                    logging.warning(f"Player with ID {player_id} not found in the database")
-            else:
-                logging.error(f"Failed to fetch projection for player {player_id}. Status code: {response.status_code}")
-
-        logging.info("Player projections have been updated in the database.")
+        # Projections are for the upcoming week
+        self.sync_weekly_points('projections', self.get_current_nfl_week() + 1)
 
     def fetch_player_stats(self):
-            # Get unique player IDs from all rosters
+        self.sync_weekly_points('stats', self.get_current_nfl_week())
+
+    def sync_weekly_points(self, kind, week):
+        """Pull every player's projections or stats for one week and upsert them in one pass."""
+        model, base_url = WEEKLY_ENDPOINTS[kind]
+        season = get_current_season()
+        client = get_client()
+
+        # One request for the whole week, split by position server-side
+        try:
+            rows = client.get(
+                f"{base_url}/{season}/{week}",
+                params={'season_type': 'regular', 'position[]': WEEKLY_POSITIONS}
+            )
+        except SleeperAPIError as e:
+            logging.error(str(e))
+            rows = None
+        source = 'bulk'
+        failed = []
+
+        if not isinstance(rows, list):
+            logging.warning(f"Bulk {kind} request failed for {season} week {week}, falling back to per-player requests")
+            source = 'per-player'
             player_ids = set()
-            for roster in Roster.objects.all():
-                player_ids.update(roster.players)
+            for players in Roster.objects.values_list('players', flat=True):
+                player_ids.update(players or [])
 
             # Remove team defenses (usually represented by team abbreviations)
-            player_ids = {pid for pid in player_ids if not pid.isalpha()}
-
-            # Get the current NFL week (you may need to implement this logic)
-            current_nfl_week = self.get_current_nfl_week()
-            stat_week = current_nfl_week
-
-            base_url = "https://api.sleeper.com/stats/nfl/player"
-            
-            for player_id in player_ids:
-                url = f"{base_url}/{player_id}?season_type=regular&season=2024&week={stat_week}"
-                response = requests.get(url)
-                
-                if response.status_code == 200:
-                    stat_data = response.json()
-                    
-                    # Extract relevant data from the projection, defaulting to None if not found
-                    pts_ppr = None
-                    opponent = None
-                    
-                    if stat_data:
-                        stats = stat_data.get('stats', {})
-                        if isinstance(stats, dict):
-                            pts_ppr = stats.get('pts_ppr')
-                        opponent = stat_data.get('opponent')
-                    
-                    player = Player.objects.filter(player_id=player_id).first()
-                    if player:
-                        PlayerStats.objects.update_or_create(
-                            player=player,
-                            week=stat_week,
-                            defaults={
-                                'pts_ppr': pts_ppr,
-                                'opponent': opponent
-                            }
-                        )
-                        logging.info(f"Updated stats for player {player_id} for week {stat_week}")
-                    else:
-                        logging.warning(f"Player with ID {player_id} not found in the database")
-                else:
-                    logging.error(f"Failed to fetch stats for player {player_id}. Status code: {response.status_code}")
-
-            logging.info("Player stats have been updated in the database.")
+            player_ids = sorted(pid for pid in player_ids if not pid.isalpha())
+
+            # The API is already struggling here, so one player's error mustn't discard everyone else's
+            def fetch_player(player_id):
+                try:
+                    return client.get(f"{base_url}/player/{player_id}?season_type=regular&season={season}&week={week}")
+                except SleeperAPIError as e:
+                    logging.error(str(e))
+                    failed.append(player_id)
+                    return None
+
+            with ThreadPoolExecutor(max_workers=max(1, min(client.max_concurrency, len(player_ids)))) as executor:
+                responses = list(executor.map(fetch_player, player_ids))
+            rows = [
+                dict(response, player_id=player_id)
+                for player_id, response in zip(player_ids, responses)
+                if isinstance(response, dict)
+            ]
+
+        known_player_ids = set(Player.objects.values_list('player_id', flat=True))
+        records = {}
+        for row in rows:
+            player_id = str(row.get('player_id'))
+            if player_id not in known_player_ids:
+                continue
+            stats = row.get('stats')
+            records[player_id] = model(
+                player_id=player_id,
+                week=week,
+                pts_ppr=stats.get('pts_ppr') if isinstance(stats, dict) else None,
+                opponent=row.get('opponent'),
+            )
+
+        written = bulk_upsert(model, list(records.values()), unique_fields=['week', 'player'], update_fields=['pts_ppr', 'opponent'])
+        details = f"{source}, {len(rows) - len(records)} skipped" + (f", {len(failed)} players failed" if failed else "")
+        summary = f"Player {kind}: {written} rows for {season} week {week} ({details})"
+        logging.info(summary)
+        self.stdout.write(summary)
 
     def get_current_nfl_week(self):
-        url = "https://api.sleeper.app/v1/state/nfl"
-        response = requests.get(url)
-        if response.status_code == 200:
-            nfl_state = response.json()
-            return nfl_state['week']
-        logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-        return None
+        return fetch_current_nfl_week()
 
@@ -1,9 +1,9 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from openai import OpenAI
 from ffjournal.models import League, Matchup, Roster, Player, Article, Team
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 from django.db.models import Q
@@ -179,14 +179,3 @@ class Command(BaseCommand):
                 print("Traceback:")
                 import traceback
                 traceback.print_exc()
-
-
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
@@ -1,9 +1,10 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team
+from ffjournal.models import League, Matchup, Roster, Article, Team
+from ffjournal.player_table import get_player
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 
@@ -25,16 +26,6 @@ class MatchupData(BaseModel):
     starters: List[PlayerData]
     points: float
 
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
-
 def generate_matchup_article(league, week):
     print(f"Entering generate_matchup_article for League: {league.name}, Week: {week}")
     logging.info(f"Fetching matchups for League: {league.name}, Week: {week}")
@@ -68,11 +59,11 @@ def generate_matchup_article(league, week):
             
             starter_data = []
             for starter in starters:
-                player = Player.objects.filter(player_id=starter).first()
-                if player and 'fantasy_positions' in player.data:
+                player = get_player(starter)
+                if player and player.fantasy_positions:
                     starter_data.append(PlayerData(
                         name=player.full_name,
-                        position=player.data['fantasy_positions'][0] if isinstance(player.data['fantasy_positions'], list) else player.data['fantasy_positions'],
+                        position=player.primary_position,
                         team=player.team if hasattr(player, 'team') else None,  # Include the team if available
                         rank_ave=player.rank_ave
                     ))
@@ -1,9 +1,10 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from openai import OpenAI
-from ffjournal.models import League, Roster, Player, Article, Team
+from ffjournal.models import League, Roster, Article, Team
+from ffjournal.player_table import get_player
+from ffjournal.nfl_state import fetch_current_nfl_week
 from django.db.models import Q
 import json
 
@@ -33,11 +34,11 @@ def generate_roast_article(league):
         starters = []
         bench = []
         for player_id in roster.players:
-            player = Player.objects.filter(player_id=player_id).first()
-            if player and 'fantasy_positions' in player.data:
+            player = get_player(player_id)
+            if player and player.fantasy_positions:
                 player_data = {
                     "name": player.full_name,
-                    "position": player.data['fantasy_positions'][0] if isinstance(player.data['fantasy_positions'], list) else player.data['fantasy_positions'],
+                    "position": player.primary_position,
                     "team": player.team if hasattr(player, 'team') else None,
                     "rank_ave": player.rank_ave
                 }
@@ -135,14 +136,4 @@ class Command(BaseCommand):
                 print(f"Error details: {str(e)}")
                 print("Traceback:")
                 import traceback
-                traceback.print_exc()
-
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
\ No newline at end of file
+                traceback.print_exc()
\ No newline at end of file
@@ -0,0 +1,46 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from ffjournal.league_history import ingest_league_history
+from ffjournal.models import League
+
+class Command(BaseCommand):
+    help = 'Archive completed previous seasons of leagues by following previous_league_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('league_ids', nargs='*', help='Sleeper league IDs to archive history for (defaults to every league in the database).')
+        parser.add_argument('--workers', type=int, default=None, help='Leagues processed concurrently (defaults to SLEEPER_REFRESH_WORKERS).')
+        parser.add_argument('--max-depth', type=int, default=10, help='Maximum number of earlier seasons to follow per league.')
+
+    def handle(self, *args, **kwargs):
+        leagues = League.objects.exclude(previous_league_id__isnull=True).exclude(previous_league_id__in=['', '0'])
+        if kwargs['league_ids']:
+            leagues = leagues.filter(sleeper_league_id__in=kwargs['league_ids'])
+        leagues = list(leagues)
+        if not leagues:
+            self.stdout.write("No leagues with previous seasons")
+            return
+
+        def ingest(league):
+            try:
+                return league, ingest_league_history(league, max_depth=kwargs['max_depth']), None
+            except Exception as e:
+                logging.error(f"Error archiving history for league {league.sleeper_league_id}: {e}")
+                return league, [], e
+            finally:
+                connection.close()
+
+        workers = min(kwargs['workers'] or settings.SLEEPER_REFRESH_WORKERS, len(leagues))
+        archived = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for league, seasons, error in executor.map(ingest, leagues):
+                if error is not None:
+                    self.stdout.write(self.style.ERROR(f"{league.name}: {error}"))
+                    continue
+                archived += len(seasons)
+                if seasons:
+                    self.stdout.write(f"{league.name}: archived {', '.join(season.season for season in seasons)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} seasons across {len(leagues)} leagues"))
@@ -1,19 +1,15 @@
 import os
 import logging
-from django.conf import settings
 from django.core.management.base import BaseCommand
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch
+from ffjournal.models import League, Article
 from dotenv import load_dotenv
 from pydantic import BaseModel
 
 # Load environment variables
 load_dotenv()
 
-# Configure OpenAI
-api_key = settings.OPENAI_API_KEY
-client = OpenAI(api_key=api_key)
-
 # Configure logging
 logging.basicConfig(filename='detailed_comparison.log', level=logging.INFO, format='%(asctime)s - %(message)s')
 
@@ -21,25 +17,24 @@ logging.basicConfig(filename='detailed_comparison.log', level=logging.INFO, form
 class ArticleContent(BaseModel):
     content: str
 
-def generate_main_article(league_id, week):
-    # Query week 1 matchups, starters, and projected points
-    matchups = Matchup.objects.filter(sleeper_league_id=league_id, week=week)
+def generate_main_article(league_id, week, context=None):
+    # Week's matchups, rosters, teams and starters all come from one prefetched context
+    context = context or LeagueWeekContext.load(League.objects.get(sleeper_league_id=league_id), week)
     
     matchup_data = []
-    for matchup in matchups:
-        roster = Roster.objects.filter(sleeper_league_id=league_id, roster_id=matchup.roster_id).first()
+    for matchup in context.matchups.get(week, []):
+        roster = context.roster(matchup.roster_id)
         
         # Fetch the team name
-        team = Team.objects.filter(sleeper_league_id=league_id, sleeper_user_id=roster.owner_id).first()
-        team_name = team.team_name if team else f"Team {roster.owner_id}"
+        team_name = context.team_name(roster)
         
         starters = roster.starters
         
         starter_data = []
         for starter in starters:
-            player = Player.objects.filter(player_id=starter).first()
-            if player is not None and 'fantasy_positions' in player.data:
-                starter_data.append(f"{player.full_name} - {player.data['fantasy_positions']} - {player.rank_ave}")
+            player = context.player(starter)
+            if player is not None and player.fantasy_positions:
+                starter_data.append(f"{player.full_name} - {player.fantasy_positions} - {player.rank_ave}")
             else:
                 logging.warning(f"Skipping player with ID {starter} due to missing data")
         
@@ -53,7 +48,9 @@ def generate_main_article(league_id, week):
     prompt = f"Generate a fantasy football article for Week {week} based on the following matchup data:\n\n{matchup_data_str}"
 
     try:
-        completion = client.chat.completions.create(
+        # A batch of one still goes through the shared rate limits and retries
+        batch = GenerationBatch()
+        request = batch.add(
             model="gpt-4o-mini-2024-07-18",  # or whichever model you're using
             messages=[
                 {"role": "system", "content": "You are a fantasy football analyst writing weekly articles. Provide your response in JSON format."},
@@ -61,8 +58,13 @@ def generate_main_article(league_id, week):
             ],
             response_format={"type": "json_object"},
             temperature=0.7,
-            max_tokens=3000
+            max_tokens=3000,
+            label=f"{league_id}:main_article",
         )
+        batch.run()
+        if request.error is not None:
+            raise request.error
+        completion = request.completion
         
         # Print the raw response from OpenAI
         print("OpenAI API Response:")
@@ -74,7 +76,7 @@ def generate_main_article(league_id, week):
         
         # Save the generated article to the database
         Article.objects.create(
-            sleeper_league_id=League.objects.get(sleeper_league_id=league_id),
+            sleeper_league_id=context.league,
             week=week,
             content=article_content.content
         )
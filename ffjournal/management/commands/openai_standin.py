@@ -0,0 +1,243 @@
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand, CommandError
+
+STANDIN_TEXT = "Stand-in response"
+
+def standin_completion(body):
+    """A well-formed chat completion for `body` that fills forced function calls and JSON mode with placeholder text."""
+    model = body.get('model', 'standin')
+    prompt = next((message.get('content') or '' for message in reversed(body.get('messages', [])) if message.get('role') == 'user'), '')
+    text = f"{STANDIN_TEXT} to: {' '.join(prompt.split())[:80]}"
+
+    message = {'role': 'assistant', 'content': None}
+    finish_reason = 'stop'
+    function_call = body.get('function_call')
+    if isinstance(function_call, dict):
+        spec = next((function for function in body.get('functions', []) if function['name'] == function_call['name']), {})
+        properties = spec.get('parameters', {}).get('properties', {})
+        message['function_call'] = {'name': function_call['name'], 'arguments': json.dumps({name: f"{text} ({name})" for name in properties})}
+        finish_reason = 'function_call'
+    elif (body.get('response_format') or {}).get('type') == 'json_object':
+        message['content'] = json.dumps({'content': text})
+    else:
+        message['content'] = text
+
+    prompt_tokens = sum(len(message.get('content') or '') for message in body.get('messages', [])) // 4
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason, 'logprobs': None}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': 50, 'total_tokens': prompt_tokens + 50},
+    }
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Enough of the OpenAI API for the article generators: chat completions, files and batches."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = self.api_path()
+        if path.startswith('/batches/'):
+            batch = self.server.get_batch(path.split('/')[2])
+            if batch is None:
+                return self.send_json(404, {'error': {'message': 'No such batch'}})
+            return self.send_json(200, batch)
+        if path.startswith('/files/') and path.endswith('/content'):
+            stored = self.server.files.get(path.split('/')[2])
+            if stored is None:
+                return self.send_json(404, {'error': {'message': 'No such file'}})
+            return self.send_body(200, stored['content'], 'application/octet-stream')
+        self.send_json(404, {'error': {'message': f"Unknown path {path}"}})
+
+    def do_POST(self):
+        server = self.server
+        path = self.api_path()
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        if path == '/chat/completions':
+            delay = server.latency + random.uniform(0, server.jitter)
+            if delay:
+                time.sleep(delay)
+            roll = random.random()
+            if roll < server.throttle_rate:
+                server.count('throttled')
+                return self.send_json(429, {'error': {'message': 'Rate limit reached', 'type': 'requests'}}, {'Retry-After': '1'})
+            if roll < server.throttle_rate + server.error_rate:
+                server.count('errors')
+                return self.send_json(500, {'error': {'message': 'injected'}})
+            server.count('completions')
+            return self.send_json(200, standin_completion(json.loads(body)))
+
+        if path == '/files':
+            fields = self.form_fields(body)
+            filename, content = fields.get('file', ('upload.jsonl', b''))
+            purpose = fields.get('purpose', (None, b'batch'))[1].decode()
+            stored = server.add_file(filename or 'upload.jsonl', content, purpose)
+            return self.send_json(200, server.file_object(stored))
+
+        if path == '/batches':
+            request = json.loads(body)
+            if request.get('input_file_id') not in server.files:
+                return self.send_json(400, {'error': {'message': 'Unknown input_file_id'}})
+            return self.send_json(200, server.add_batch(request))
+
+        self.send_json(404, {'error': {'message': f"Unknown path {path}"}})
+
+    def api_path(self):
+        path = self.path.split('?', 1)[0]
+        return path[len('/v1'):] if path.startswith('/v1/') else path
+
+    def form_fields(self, body):
+        """{name: (filename, bytes)} from a multipart/form-data body."""
+        message = BytesParser(policy=policy.default).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body
+        )
+        return {
+            part.get_param('name', header='content-disposition'): (part.get_filename(), part.get_payload(decode=True))
+            for part in message.iter_parts()
+        }
+
+    def send_json(self, status, payload, headers=None):
+        self.send_body(status, json.dumps(payload).encode(), 'application/json', headers)
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency, jitter, error_rate, throttle_rate, batch_delay, verbose):
+        super().__init__(address, StandinHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.batch_delay = batch_delay
+        self.verbose = verbose
+        self.files = {}
+        self.batches = {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def add_file(self, filename, content, purpose):
+        stored = {'id': f"file-{uuid.uuid4().hex[:24]}", 'filename': filename, 'content': content, 'purpose': purpose, 'created_at': int(time.time())}
+        with self._lock:
+            self.files[stored['id']] = stored
+        return stored
+
+    def file_object(self, stored):
+        return {
+            'id': stored['id'], 'object': 'file', 'bytes': len(stored['content']), 'created_at': stored['created_at'],
+            'filename': stored['filename'], 'purpose': stored['purpose'], 'status': 'processed',
+        }
+
+    def add_batch(self, request):
+        batch = {
+            'id': f"batch_{uuid.uuid4().hex[:24]}",
+            'object': 'batch',
+            'endpoint': request['endpoint'],
+            'input_file_id': request['input_file_id'],
+            'completion_window': request.get('completion_window', '24h'),
+            'metadata': request.get('metadata'),
+            'status': 'in_progress',
+            'created_at': int(time.time()),
+            'output_file_id': None,
+            'error_file_id': None,
+            'request_counts': {'total': 0, 'completed': 0, 'failed': 0},
+        }
+        with self._lock:
+            self.batches[batch['id']] = batch
+        self.count('batches')
+        return batch
+
+    def get_batch(self, batch_id):
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None or batch['status'] != 'in_progress' or time.time() - batch['created_at'] < self.batch_delay:
+                return batch
+            lines = self.files[batch['input_file_id']]['content'].decode().splitlines()
+
+        # Answer every line of the input file, failing roughly --error-rate of them
+        output, failed = [], 0
+        for line in lines:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if random.random() < self.error_rate:
+                failed += 1
+                response = {'status_code': 500, 'request_id': uuid.uuid4().hex, 'body': {'error': {'message': 'injected'}}}
+            else:
+                response = {'status_code': 200, 'request_id': uuid.uuid4().hex, 'body': standin_completion(item['body'])}
+            output.append(json.dumps({'id': f"batch_req_{uuid.uuid4().hex[:24]}", 'custom_id': item['custom_id'], 'response': response, 'error': None}))
+        stored = self.add_file('batch_output.jsonl', ('\n'.join(output) + '\n').encode(), 'batch_output')
+        self.count('batched completions', len(output) - failed)
+
+        with self._lock:
+            batch.update({
+                'status': 'completed',
+                'output_file_id': stored['id'],
+                'completed_at': int(time.time()),
+                'request_counts': {'total': len(output), 'completed': len(output) - failed, 'failed': failed},
+            })
+            return batch
+
+class Command(BaseCommand):
+    help = 'Serve a local stand-in for the OpenAI chat completions, files and batches endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--latency', type=float, default=0, help='Milliseconds added to every chat completion.')
+        parser.add_argument('--jitter', type=float, default=0, help='Extra random milliseconds, 0 to this value.')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of completions (live or batched) that fail with a 500.')
+        parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of chat completions answered with 429 and Retry-After: 1.')
+        parser.add_argument('--batch-delay', type=float, default=5, help='Seconds before a submitted batch completes.')
+        parser.add_argument('--verbose', action='store_true', help='Log every request.')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['error_rate'] + kwargs['throttle_rate'] > 1:
+            raise CommandError('--error-rate and --throttle-rate together cannot exceed 1.')
+
+        server = StandinServer(
+            (kwargs['host'], kwargs['port']),
+            latency=kwargs['latency'] / 1000,
+            jitter=kwargs['jitter'] / 1000,
+            error_rate=kwargs['error_rate'],
+            throttle_rate=kwargs['throttle_rate'],
+            batch_delay=kwargs['batch_delay'],
+            verbose=kwargs['verbose'],
+        )
+        url = f"http://{kwargs['host']}:{server.server_port}/v1"
+        self.stdout.write(f"Serving an OpenAI stand-in at {url}")
+        self.stdout.write(f"Point the app at it with OPENAI_BASE_URL={url} (any OPENAI_API_KEY works)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(', '.join(f"{count} {key}" for key, count in sorted(server.counts.items())) or 'No requests served')
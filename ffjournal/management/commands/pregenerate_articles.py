@@ -0,0 +1,72 @@
+from importlib import import_module
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import BatchExecutor, GenerationBatch
+from ffjournal.models import League
+from ffjournal.nfl_state import pinned_nfl_state
+from ffjournal.management.commands.run_scheduled_tasks import weekly_script_modules
+
+class Command(BaseCommand):
+    help = "Generate this week's articles for in-season leagues ahead of their send time through the Batch API."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', action='append', default=[], help='Sleeper league ID to include (repeatable; defaults to every in-season league).')
+        parser.add_argument('--poll', type=int, default=settings.OPENAI_BATCH_POLL_INTERVAL, help='Seconds between batch status checks.')
+
+    def handle(self, *args, **kwargs):
+        with pinned_nfl_state() as nfl_state:
+            current_week = nfl_state['week']
+            if not current_week:
+                self.stdout.write(self.style.ERROR("Failed to fetch the current NFL week."))
+                return
+
+            leagues = League.objects.filter(status='in_season')
+            if kwargs['league']:
+                leagues = leagues.filter(sleeper_league_id__in=kwargs['league'])
+            leagues = list(leagues)
+            if not leagues:
+                self.stdout.write("No leagues to generate articles for.")
+                return
+
+            try:
+                script_modules = weekly_script_modules(current_week)
+            except FileNotFoundError:
+                self.stdout.write(self.style.ERROR(f"Weekly scripts directory not found for week {current_week}."))
+                return
+
+            executor = BatchExecutor(week=current_week, poll_interval=kwargs['poll'])
+            batch = GenerationBatch(executor=executor)
+            contexts = {}
+            for league in leagues:
+                try:
+                    contexts[league.id] = LeagueWeekContext.load(league, current_week)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Loading week {current_week} data failed for league {league.name}. Error: {e}"))
+            leagues = [league for league in leagues if league.id in contexts]
+
+            # Only leagues whose every script queued its prompts are recorded as pregenerated
+            queued, failed = set(), set()
+            for script_module in script_modules:
+                script_instance = import_module(script_module).Command()
+                for league in leagues:
+                    queued_before = len(batch)
+                    try:
+                        script_instance.handle(league_id=league.id, context=contexts[league.id], batch=batch)
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"{script_module} failed for league {league.name}. Error: {e}"))
+                        failed.add(league.sleeper_league_id)
+                        continue
+                    if len(batch) > queued_before:
+                        queued.add(league.sleeper_league_id)
+            executor.leagues = sorted(queued - failed)
+
+            self.stdout.write(f"Submitting {len(batch)} completions for {len(leagues)} leagues, week {current_week}...")
+            batch.run()
+
+        job = executor.job
+        if job is None:
+            self.stdout.write("Nothing to generate.")
+            return
+        style = self.style.SUCCESS if job.status == 'completed' and not job.failed_count else self.style.ERROR
+        self.stdout.write(style(f"{job}: {job.succeeded_count} of {job.request_count} completions stored"))
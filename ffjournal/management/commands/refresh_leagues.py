@@ -1,28 +1,18 @@
 from django.core.management.base import BaseCommand
 from ffjournal.models import League
-from ffjournal.sleeper_api import (
-    fetch_league_data,
-    fetch_roster_data,
-    fetch_team_data,
-    fetch_all_matchup_data,
-    fetch_all_transactions_data,
-)
-from django.db import transaction
+from ffjournal.sleeper_api import refresh_leagues
 
 class Command(BaseCommand):
     help = 'Refresh all league data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Number of leagues to refresh concurrently (defaults to SLEEPER_REFRESH_WORKERS).')
+        parser.add_argument('--full', action='store_true', help='Re-fetch every week of the season, including weeks already marked final.')
+
     def handle(self, *args, **kwargs):
         leagues = League.objects.all()
-        for league in leagues:
-            try:
-                with transaction.atomic():
-                    fetch_league_data(league.sleeper_league_id)
-                    if league.status != 'complete':
-                        fetch_roster_data(league.sleeper_league_id)
-                        fetch_team_data(league.sleeper_league_id)
-                        fetch_all_matchup_data(league.sleeper_league_id)
-                        fetch_all_transactions_data(league.sleeper_league_id)
+        for league, error in refresh_leagues(leagues, max_workers=kwargs['workers'], full=kwargs['full']):
+            if error is None:
                 self.stdout.write(self.style.SUCCESS(f"Successfully refreshed league {league.name}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Error refreshing league {league.name}: {str(e)}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Error refreshing league {league.name}: {str(error)}"))
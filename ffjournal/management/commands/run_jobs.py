@@ -0,0 +1,48 @@
+import os
+import signal
+import socket
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from ffjournal.jobs import claim_job, requeue_stale_jobs, run_job
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (league refreshes, player fetches, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling.')
+        parser.add_argument('--poll', type=float, default=settings.JOB_POLL_INTERVAL, help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **kwargs):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        # Finish the current job on SIGTERM (dyno restarts) instead of dying mid-write
+        signal.signal(signal.SIGTERM, self.stop)
+
+        requeued = requeue_stale_jobs(settings.JOB_STALE_AFTER, settings.JOB_MAX_ATTEMPTS)
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs")
+        self.stdout.write(f"Worker {worker} started")
+
+        while not self.stopping:
+            close_old_connections()
+            job = claim_job(worker)
+            if job is None:
+                if kwargs['once']:
+                    break
+                # Idle workers pick up after peers that died mid-job
+                requeue_stale_jobs(settings.JOB_STALE_AFTER, settings.JOB_MAX_ATTEMPTS)
+                time.sleep(kwargs['poll'])
+                continue
+
+            self.stdout.write(f"Running {job}")
+            start = time.perf_counter()
+            job = run_job(job)
+            style = self.style.SUCCESS if job.status == 'succeeded' else self.style.ERROR
+            self.stdout.write(style(f"{job} in {time.perf_counter() - start:.1f}s"))
+
+        self.stdout.write(f"Worker {worker} stopped")
+
+    def stop(self, signum, frame):
+        self.stopping = True
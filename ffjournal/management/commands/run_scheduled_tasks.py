@@ -2,37 +2,48 @@ import os
 from datetime import datetime, timedelta
 import pytz
 from django.core.management.base import BaseCommand
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch, pregenerated_leagues
 from ffjournal.models import League, Article
+from ffjournal.nfl_state import pinned_nfl_state
 from django.utils import timezone
 from django.conf import settings
-import requests
 from importlib import import_module
 from ffjournal.management.commands.send_newsletters import Command as SendNewslettersCommand
 from django.utils.dateparse import parse_date
 
+def weekly_script_modules(week):
+    """Module paths of the article scripts for `week`; raises FileNotFoundError if the week has none."""
+    weekly_scripts_dir = f"ffjournal.management.commands.weekly_scripts.week{week}"
+    script_files = [f for f in os.listdir(os.path.join(settings.BASE_DIR, weekly_scripts_dir.replace(".", "/"))) if f.endswith(".py") and f != "__init__.py"]
+    return [f"{weekly_scripts_dir}.{script_file[:-3]}" for script_file in script_files]
+
 class Command(BaseCommand):
     help = 'Check league schedules and run tasks if scheduled time is reached.'
 
     def handle(self, *args, **kwargs):
         current_time = timezone.now()
-        current_week = self.fetch_current_nfl_week()
 
-        if not current_week:
-            self.stdout.write(self.style.ERROR("Failed to fetch the current NFL week."))
-            return
+        # Every weekly script reads the week from this one state for the whole run
+        with pinned_nfl_state() as nfl_state:
+            current_week = nfl_state['week']
 
-        leagues = League.objects.filter(status='in_season')
-        self.stdout.write(f"Found {leagues.count()} leagues in season.")
+            if not current_week:
+                self.stdout.write(self.style.ERROR("Failed to fetch the current NFL week."))
+                return
 
-        eligible_leagues = []
-        for league in leagues:
-            if self.should_run_task(league, current_time):
-                eligible_leagues.append(league)
+            leagues = League.objects.filter(status='in_season')
+            self.stdout.write(f"Found {leagues.count()} leagues in season.")
 
-        if eligible_leagues:
-            self.run_league_tasks(eligible_leagues, current_week)
-        else:
-            self.stdout.write("No tasks were scheduled to run for any leagues.")
+            eligible_leagues = []
+            for league in leagues:
+                if self.should_run_task(league, current_time):
+                    eligible_leagues.append(league)
+
+            if eligible_leagues:
+                self.run_league_tasks(eligible_leagues, current_week)
+            else:
+                self.stdout.write("No tasks were scheduled to run for any leagues.")
 
     def should_run_task(self, league, current_time):
         if not league.scheduled_day or not league.scheduled_time:
@@ -63,24 +74,42 @@ class Command(BaseCommand):
         return False
 
     def run_league_tasks(self, leagues, current_week):
-        weekly_scripts_dir = f"ffjournal.management.commands.weekly_scripts.week{current_week}"
-        self.stdout.write(f"Looking for scripts in {weekly_scripts_dir}")
+        self.stdout.write(f"Looking for scripts for week {current_week}")
 
         try:
-            script_files = [f for f in os.listdir(os.path.join(settings.BASE_DIR, weekly_scripts_dir.replace(".", "/"))) if f.endswith(".py") and f != "__init__.py"]
-            self.stdout.write(f"Found script files: {script_files}")
+            script_modules = weekly_script_modules(current_week)
+            self.stdout.write(f"Found scripts: {script_modules}")
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f"Weekly scripts directory not found for week {current_week}."))
             return
 
-        for script_file in script_files:
-            script_module = f"{weekly_scripts_dir}.{script_file[:-3]}"
+        # Leagues whose articles pregenerate_articles already wrote through the Batch API only need sending
+        article_labels = [import_module(script_module).ARTICLE_LABEL for script_module in script_modules]
+        pregenerated = pregenerated_leagues(current_week, article_labels)
+        for league in leagues:
+            if league.sleeper_league_id in pregenerated:
+                self.stdout.write(f"Using pregenerated articles for league {league.name}")
+        generate_for = [league for league in leagues if league.sleeper_league_id not in pregenerated]
+
+        # Every script reads a league's matchups, rosters, teams and players from one prefetched context
+        contexts = {}
+        for league in generate_for:
+            try:
+                contexts[league.id] = LeagueWeekContext.load(league, current_week)
+            except Exception as e:
+                # One league's bad data shouldn't stop the others' articles and newsletters
+                self.stdout.write(self.style.ERROR(f"Loading week {current_week} data failed for league {league.name}. Error: {e}"))
+        generate_for = [league for league in generate_for if league.id in contexts]
+        # Scripts only queue their completions here; they all run concurrently once every league is queued
+        batch = GenerationBatch()
+
+        for script_module in script_modules:
             self.stdout.write(f"Running {script_module} for all eligible leagues...")
 
             module = import_module(script_module)
             script_instance = module.Command()
 
-            for league in leagues:
+            for league in generate_for:
                 # Determine the week the script will create articles for
                 if 'generate_last_week_recap' in script_module:
                     week_to_check = current_week - 1
@@ -89,11 +118,14 @@ class Command(BaseCommand):
 
                 try:
                     # Run the script for the league
-                    script_instance.handle(league_id=league.id)
+                    script_instance.handle(league_id=league.id, context=contexts[league.id], batch=batch)
                 except Exception as e:
                     self.stdout.write(self.style.ERROR(f"{script_module} failed for league {league.name}. Error: {e}"))
                     continue  # Continue with the next league
 
+        self.stdout.write(f"Generating {len(batch)} completions for {len(generate_for)} leagues...")
+        batch.run()
+
         for league in leagues:
             send_newsletters_instance = SendNewslettersCommand()
             self.stdout.write(f"Sending newsletters for league {league.name}...")
@@ -102,16 +134,6 @@ class Command(BaseCommand):
             league.save()
 
 
-    def fetch_current_nfl_week(self):
-        """Fetches the current NFL week from the Sleeper API."""
-        url = "https://api.sleeper.app/v1/state/nfl"
-        response = requests.get(url)
-        if response.status_code == 200:
-            nfl_state = response.json()
-            return nfl_state['week']
-        self.stdout.write(self.style.ERROR(f"Failed to fetch NFL state. Status code: {response.status_code}"))
-        return None
-
     def verify_article_creation(self, league, week, script_module):
         """Verify that at least one article was created by the script."""
         # Instead of mapping script modules to specific labels, we'll check if any new article was created for the league and week after running the script.
@@ -10,10 +10,9 @@ django.setup()
 
 from django.core.mail import send_mail, EmailMessage
 from django.template.loader import render_to_string
-from django.utils import timezone
 from django.utils.safestring import mark_safe
 from ffjournal.models import League, Article, Newsletter
-import requests
+from ffjournal.nfl_state import fetch_current_nfl_week
 import os
 from xhtml2pdf import pisa
 from django.conf import settings
@@ -71,20 +70,8 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'League with ID {league_id} does not exist'))
     
     def get_current_week(self):
-        try:
-            response = requests.get("https://api.sleeper.app/v1/state/nfl")
-            if response.status_code == 200:
-                nfl_state = response.json()
-                return nfl_state['week']
-            else:
-                self.stdout.write(self.style.WARNING(f"Failed to fetch NFL state. Status code: {response.status_code}"))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error fetching NFL state: {str(e)}"))
-
-        start_date = timezone.datetime(2024, 9, 4)
-        now = timezone.now()
-        week_number = (now - start_date).days // 7 + 1
-        return week_number
+        # Falls back to the local season calendar when Sleeper is unavailable
+        return fetch_current_nfl_week()
 
     def send_newsletter(self, league, current_week):
         # Fetch all articles for this league and week, excluding individual matchup write-ups
@@ -0,0 +1,55 @@
+import json
+import re
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ffjournal.sleeper_cache import ResponseCache
+
+class Command(BaseCommand):
+    help = 'Inspect or purge the on-disk Sleeper response cache'
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+        subparsers.add_parser('stats', help='Show entry, blob and size totals.')
+
+        list_parser = subparsers.add_parser('list', help='List cached URLs.')
+        list_parser.add_argument('--match', help='Only URLs matching this regular expression.')
+
+        show_parser = subparsers.add_parser('show', help='Print the cached body for a URL.')
+        show_parser.add_argument('url')
+
+        purge_parser = subparsers.add_parser('purge', help='Delete cached entries and unreferenced blobs.')
+        purge_parser.add_argument('--match', help='Only URLs matching this regular expression.')
+        purge_parser.add_argument('--expired', action='store_true', help='Only entries past their TTL.')
+
+    def handle(self, *args, **kwargs):
+        if not settings.SLEEPER_CACHE_DIR:
+            raise CommandError('SLEEPER_CACHE_DIR is not set; the Sleeper response cache is disabled.')
+        cache = ResponseCache(settings.SLEEPER_CACHE_DIR)
+        action = kwargs['action']
+
+        if action == 'stats':
+            stats = cache.stats()
+            self.stdout.write(
+                f"{stats['entries']} entries ({stats['fresh']} fresh), "
+                f"{stats['blobs']} blobs, {stats['bytes'] / 1024:.1f} KB in {settings.SLEEPER_CACHE_DIR}"
+            )
+
+        elif action == 'list':
+            for entry in cache.entries():
+                if kwargs['match'] and not re.search(kwargs['match'], entry['url']):
+                    continue
+                state = 'fresh' if cache.is_fresh(entry) else 'expired'
+                expires = datetime.fromtimestamp(entry['expires_at']).strftime('%Y-%m-%d %H:%M:%S')
+                self.stdout.write(f"{state:<8} {expires}  {entry['size']:>9}  {entry['url']}")
+
+        elif action == 'show':
+            entry = cache.lookup(kwargs['url'])
+            if entry is None:
+                raise CommandError(f"No cache entry for {kwargs['url']}")
+            self.stdout.write(json.dumps(entry, indent=2))
+            self.stdout.write(cache.read(entry).decode('utf-8'))
+
+        elif action == 'purge':
+            removed = cache.purge(match=kwargs['match'], expired_only=kwargs['expired'])
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} cache entries"))
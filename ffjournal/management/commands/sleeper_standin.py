@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from ffjournal.sleeper_fixtures import SLEEPER_HOSTS, fixture_path
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Replays recorded Sleeper responses. Request paths look like /<host>/<original path>."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        roll = random.random()
+        if roll < server.throttle_rate:
+            server.count('throttled')
+            return self.send_body(429, b'{"error":"rate limited"}', {'Retry-After': '1'})
+        if roll < server.throttle_rate + server.error_rate:
+            server.count('errors')
+            return self.send_body(server.error_status, b'{"error":"injected"}')
+
+        if host not in SLEEPER_HOSTS:
+            server.count('missing')
+            return self.send_body(404, b'{"error":"unknown host"}')
+        url = f"https://{host}/{path}" + (f"?{parts.query}" if parts.query else '')
+        try:
+            body = fixture_path(server.fixtures, url).read_bytes()
+        except FileNotFoundError:
+            server.count('missing')
+            return self.send_body(404, b'null')
+
+        server.count('served')
+        self.send_body(200, body)
+
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency, jitter, error_rate, error_status, throttle_rate, verbose):
+        super().__init__(address, StandinHandler)
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_rate = throttle_rate
+        self.verbose = verbose
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+class Command(BaseCommand):
+    help = 'Serve recorded Sleeper fixtures locally, with optional latency and error injection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixtures', default=settings.SLEEPER_RECORD_DIR or 'sleeper_fixtures', help='Directory of recorded responses (defaults to SLEEPER_RECORD_DIR).')
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0, help='Milliseconds added to every response.')
+        parser.add_argument('--jitter', type=float, default=0, help='Extra random milliseconds, 0 to this value.')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with --error-status.')
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of requests answered with 429 and Retry-After: 1.')
+        parser.add_argument('--verbose', action='store_true', help='Log every request.')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['error_rate'] + kwargs['throttle_rate'] > 1:
+            raise CommandError('--error-rate and --throttle-rate together cannot exceed 1.')
+
+        server = StandinServer(
+            (kwargs['host'], kwargs['port']),
+            fixtures=kwargs['fixtures'],
+            latency=kwargs['latency'] / 1000,
+            jitter=kwargs['jitter'] / 1000,
+            error_rate=kwargs['error_rate'],
+            error_status=kwargs['error_status'],
+            throttle_rate=kwargs['throttle_rate'],
+            verbose=kwargs['verbose'],
+        )
+        url = f"http://{kwargs['host']}:{server.server_port}"
+        self.stdout.write(f"Replaying {kwargs['fixtures']} at {url}")
+        self.stdout.write(f"Point the app at it with SLEEPER_STANDIN_URL={url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(', '.join(f"{count} {key}" for key, count in sorted(server.counts.items())) or 'No requests served')
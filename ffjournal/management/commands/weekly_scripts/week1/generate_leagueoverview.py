@@ -1,9 +1,10 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch, function_arguments
+from ffjournal.models import League, Roster, Article, Team
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 from django.db.models import Q
@@ -15,8 +16,8 @@ from datetime import datetime
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'league_overview'
 
 # Define the Pydantic models to structure the API responses
 class LeagueData(BaseModel):
@@ -32,13 +33,18 @@ class LeagueData(BaseModel):
     max_keepers: Optional[int] = None
     roster_positions: List[str]
 
-def parse_league_data(league: League) -> LeagueData:
+def parse_league_data(league: League, context: Optional[LeagueWeekContext] = None) -> LeagueData:
     """Parses the JSON data field and relevant columns from the League model."""
     data = league.data if isinstance(league.data, dict) else json.loads(league.data) if league.data else {}
     roster_positions = data.get('roster_positions', [])
 
     latest_league_winner_team_name = None
-    if league.latest_league_winner_roster_id:
+    if league.latest_league_winner_roster_id and context is not None:
+        roster = context.roster(int(league.latest_league_winner_roster_id))
+        team = context.team(roster)
+        if team:
+            latest_league_winner_team_name = team.team_name
+    elif league.latest_league_winner_roster_id:
         try:
             roster = Roster.objects.get(
                 sleeper_league_id=league.sleeper_league_id,
@@ -66,11 +72,12 @@ def parse_league_data(league: League) -> LeagueData:
         roster_positions=roster_positions
     )
 
-def generate_league_overview(league):
+def generate_league_overview(league, batch, on_article, context=None):
+    """Queue the league overview on `batch`; `on_article(content)` gets the result."""
     print(f"Generating league overview for League: {league.name}")
     logging.info(f"Fetching data for League: {league.name}")
     
-    league_data = parse_league_data(league)
+    league_data = parse_league_data(league, context)
 
     # Default system message
     system_message = """
@@ -100,48 +107,44 @@ def generate_league_overview(league):
 
     print(f"\nFull prompt being sent to OpenAI for League: {league.name}:\n{prompt}\n")
 
-    logging.info(f"Sending prompt to OpenAI for League: {league.name}")
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt},
-            ],
-            functions=[
-                {
-                    "name": "generate_article",
-                    "description": "Generates a league overview article",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "article": {
-                                "type": "string",
-                                "description": "The generated article content"
-                            }
-                        },
-                        "required": ["article"]
-                    }
-                }
-            ],
-            function_call={"name": "generate_article"},
-            max_tokens=7000
-        )
-
-        response_content = completion.choices[0].message.function_call.arguments
-        print(f"\nOpenAI response:\n{response_content}\n")
+    logging.info(f"Queueing prompt for League: {league.name}")
 
-        try:
-            article_content = json.loads(response_content)["article"]
-            return article_content
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"\nError parsing JSON response: {e}\nResponse content: {response_content}\n")
-            return None
+    def store(completion):
+        article_data = function_arguments(completion)
+        if not article_data or "article" not in article_data:
+            print(f"\nError generating league overview for League: {league.name}\n")
+            on_article(None)
+            return
 
-    except Exception as e:
-        print(f"\nError generating league overview for League: {league.name}: {e}\n")
-        return None
+        on_article(article_data["article"])
+
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt},
+        ],
+        functions=[
+            {
+                "name": "generate_article",
+                "description": "Generates a league overview article",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "article": {
+                            "type": "string",
+                            "description": "The generated article content"
+                        }
+                    },
+                    "required": ["article"]
+                }
+            }
+        ],
+        function_call={"name": "generate_article"},
+        max_tokens=7000,
+        label=f"{league.sleeper_league_id}:league_overview",
+        on_result=store,
+    )
 
 
 class Command(BaseCommand):
@@ -153,29 +156,24 @@ class Command(BaseCommand):
             print("Failed to fetch the current NFL week.")
             return
 
-        current_time = timezone.now()
-        leagues = League.objects.filter(Q(status='in_season') | Q(status='pre_draft'))
+        context = kwargs.get('context')
+        if context is not None:
+            # run_scheduled_tasks passes the context of one league that is already due
+            leagues = [context.league]
+        else:
+            current_time = timezone.now()
+            leagues = League.objects.filter(Q(status='in_season') | Q(status='pre_draft'))
         
+        # run_scheduled_tasks passes one batch for every script and league and runs it itself
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+
         for league in leagues:
-            if self.should_run_task(league, current_time):
+            if context is not None or self.should_run_task(league, current_time):
                 print(f"\nGenerating league overview for League: {league.name}")
                 try:
-                    content = generate_league_overview(league)
-                    print(f"Content returned: {content}")
-                    
-                    if content:
-                        article, created = Article.objects.update_or_create(
-                            sleeper_league_id=league,
-                            week=current_week,
-                            label='league_overview',
-                            defaults={'content': content}
-                        )
-                        if created:
-                            print(f"League overview for League: {league.name} created successfully.")
-                        else:
-                            print(f"League overview for League: {league.name} updated successfully.")
-                    else:
-                        print(f"Failed to generate league overview for League: {league.name}. Content was None.")
+                    generate_league_overview(league, batch, self.article_saver(league, current_week), context=context)
                 except Exception as e:
                     print(f"Error in generate_league_overview for League: {league.name}")
                     print(f"Error details: {str(e)}")
@@ -183,6 +181,29 @@ class Command(BaseCommand):
                     import traceback
                     traceback.print_exc()
 
+        if run_now:
+            batch.run()
+
+    def article_saver(self, league, current_week):
+        def save_article(content):
+            print(f"Content returned: {content}")
+
+            if content:
+                article, created = Article.objects.update_or_create(
+                    sleeper_league_id=league,
+                    week=current_week,
+                    label=ARTICLE_LABEL,
+                    defaults={'content': content}
+                )
+                if created:
+                    print(f"League overview for League: {league.name} created successfully.")
+                else:
+                    print(f"League overview for League: {league.name} updated successfully.")
+            else:
+                print(f"Failed to generate league overview for League: {league.name}. Content was None.")
+
+        return save_article
+
     def should_run_task(self, league, current_time):
         if not league.scheduled_day or not league.scheduled_time:
             print(f"League {league.name} has no scheduled day or time.")
@@ -208,14 +229,3 @@ class Command(BaseCommand):
             print(f"Not the scheduled day or time for league {league.name}")
         
         return False
-
-
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
@@ -1,21 +1,21 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch
+from ffjournal.models import League, Article
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 from django.utils import timezone
-from django.conf import settings
 import pytz
 from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'this_weeks_matchups'
 
 # Define the Pydantic models to structure the API responses
 class PlayerData(BaseModel):
@@ -29,40 +29,28 @@ class MatchupData(BaseModel):
     starters: List[PlayerData]
     points: float
 
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
-
-def generate_matchup_article(league, week):
+def generate_matchup_article(league, week, batch, on_article, context=None):
+    """Queue the matchup preview on `batch`; `on_article(content)` gets the result."""
     print(f"Entering generate_matchup_article for League: {league.name}, Week: {week}")
-    logging.info(f"Fetching matchups for League: {league.name}, Week: {week}")
-    matchups = Matchup.objects.filter(sleeper_league_id=league.sleeper_league_id, week=week)
+    context = context or LeagueWeekContext.load(league, week)
+    matchups = context.matchups.get(week, [])
     
     if not matchups:
         logging.error(f"No matchups found for League: {league.name}, Week: {week}.")
-        return None
+        on_article(None)
+        return
 
     matchup_data = []
     for matchup in matchups:
-        roster = Roster.objects.filter(sleeper_league_id=league.sleeper_league_id, roster_id=matchup.roster_id).first()
+        roster = context.roster(matchup.roster_id)
         
         if roster:
-            team = Team.objects.filter(sleeper_league_id=league.sleeper_league_id, sleeper_user_id=roster.owner_id).first()
-            team_name = team.team_name if team else f"Team {roster.owner_id}"
+            team_name = context.team_name(roster)
             
             # Add previous league winner information
             previous_league_winner = False
             if league.latest_league_winner_roster_id == roster.roster_id:
-                previous_league_winner_team = Team.objects.filter(
-                    sleeper_league_id=league.sleeper_league_id, 
-                    sleeper_user_id=roster.owner_id
-                ).first()
+                previous_league_winner_team = context.team(roster)
                 if previous_league_winner_team:
                     previous_league_winner = previous_league_winner_team.team_name
                 else:
@@ -72,11 +60,11 @@ def generate_matchup_article(league, week):
             
             starter_data = []
             for starter in starters:
-                player = Player.objects.filter(player_id=starter).first()
-                if player and player.full_name and 'fantasy_positions' in player.data:
+                player = context.player(starter)
+                if player and player.full_name and player.fantasy_positions:
                     starter_data.append(PlayerData(
                         name=player.full_name,
-                        position=player.data['fantasy_positions'][0] if isinstance(player.data['fantasy_positions'], list) else player.data['fantasy_positions'],
+                        position=player.primary_position,
                         team=player.team if hasattr(player, 'team') else None,
                         rank_ave=player.rank_ave
                     ))
@@ -95,7 +83,8 @@ def generate_matchup_article(league, week):
 
     if not matchup_data:
         logging.error(f"No valid matchup data found for League: {league.name}, Week: {week}.")
-        return None
+        on_article(None)
+        return
     
     # Default system message
     system_message = """
@@ -118,26 +107,29 @@ def generate_matchup_article(league, week):
 
     print(f"\nFull prompt being sent to OpenAI for League: {league.name}, Week: {week}:\n{prompt}\n")
 
-    logging.info(f"Sending prompt to OpenAI for League: {league.name}, Week: {week}")
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=7000
-        )
+    logging.info(f"Queueing prompt for League: {league.name}, Week: {week}")
+
+    def store(completion):
+        if completion is None:
+            print(f"\nError generating article for league {league.name}, week {week}\n")
+            on_article(None)
+            return
 
         response_content = completion.choices[0].message.content
         print(f"\nOpenAI response:\n{response_content}\n")
 
-        return response_content
+        on_article(response_content)
 
-    except Exception as e:
-        print(f"\nError generating article for league {league.name}, week {week}: {e}\n")
-        return None
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=7000,
+        label=f"{league.sleeper_league_id}:this_weeks_matchups",
+        on_result=store,
+    )
 
 
 class Command(BaseCommand):
@@ -149,29 +141,24 @@ class Command(BaseCommand):
             print("Failed to fetch the current NFL week.")
             return
 
-        current_time = timezone.now()
-        leagues = League.objects.filter(status='in_season')
+        context = kwargs.get('context')
+        if context is not None:
+            # run_scheduled_tasks passes the context of one league that is already due
+            leagues = [context.league]
+        else:
+            current_time = timezone.now()
+            leagues = League.objects.filter(status='in_season')
         
+        # run_scheduled_tasks passes one batch for every script and league and runs it itself
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+
         for league in leagues:
-            if self.should_run_task(league, current_time):
+            if context is not None or self.should_run_task(league, current_time):
                 print(f"\nGenerating article for League: {league.name}, Week: {current_week}")
                 try:
-                    content = generate_matchup_article(league, current_week)
-                    print(f"Content returned: {content}")
-                    
-                    if content:
-                        article, created = Article.objects.update_or_create(
-                            sleeper_league_id=league,
-                            week=current_week,
-                            label='this_weeks_matchups',
-                            defaults={'content': content}
-                        )
-                        if created:
-                            print(f"Article for League: {league.name}, Week: {current_week} created successfully.")
-                        else:
-                            print(f"Article for League: {league.name}, Week: {current_week} updated successfully.")
-                    else:
-                        print(f"Failed to generate article for League: {league.name}, Week: {current_week}. Content was None.")
+                    generate_matchup_article(league, current_week, batch, self.article_saver(league, current_week), context=context)
                 except Exception as e:
                     print(f"Error in generate_matchup_article for League: {league.name}, Week: {current_week}")
                     print(f"Error details: {str(e)}")
@@ -179,6 +166,29 @@ class Command(BaseCommand):
                     import traceback
                     traceback.print_exc()
 
+        if run_now:
+            batch.run()
+
+    def article_saver(self, league, current_week):
+        def save_article(content):
+            print(f"Content returned: {content}")
+
+            if content:
+                article, created = Article.objects.update_or_create(
+                    sleeper_league_id=league,
+                    week=current_week,
+                    label=ARTICLE_LABEL,
+                    defaults={'content': content}
+                )
+                if created:
+                    print(f"Article for League: {league.name}, Week: {current_week} created successfully.")
+                else:
+                    print(f"Article for League: {league.name}, Week: {current_week} updated successfully.")
+            else:
+                print(f"Failed to generate article for League: {league.name}, Week: {current_week}. Content was None.")
+
+        return save_article
+
     def should_run_task(self, league, current_time):
         if not league.scheduled_day or not league.scheduled_time:
             print(f"League {league.name} has no scheduled day or time.")
@@ -1,9 +1,10 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Roster, Player, Article, Team
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch
+from ffjournal.models import League, Article
+from ffjournal.nfl_state import fetch_current_nfl_week
 from django.db.models import Q
 import json
 from django.utils import timezone
@@ -13,34 +14,34 @@ from datetime import datetime
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'roster_roast'
 
-def generate_roast_article(league):
+def generate_roast_article(league, batch, on_article, context=None):
+    """Queue the roster roast on `batch`; `on_article(content)` gets the result."""
     print(f"Generating roast article for League: {league.name}")
-    logging.info(f"Fetching rosters for League: {league.name}")
-    
-    rosters = Roster.objects.filter(sleeper_league_id=league.sleeper_league_id)
+    context = context or LeagueWeekContext.load(league, fetch_current_nfl_week() or 1)
+    rosters = list(context.rosters.values())
     
     print(f"Found {len(rosters)} rosters for League: {league.name}")
     
     if not rosters:
         logging.error(f"No rosters found for League: {league.name}.")
-        return None
+        on_article(None)
+        return
 
     roster_data = []
     for roster in rosters:
-        team = Team.objects.filter(sleeper_league_id=league.sleeper_league_id, sleeper_user_id=roster.owner_id).first()
-        team_name = team.team_name if team else f"Team {roster.owner_id}"
+        team_name = context.team_name(roster)
         
         starters = []
         bench = []
         for player_id in roster.players:
-            player = Player.objects.filter(player_id=player_id).first()
-            if player and 'fantasy_positions' in player.data:
+            player = context.player(player_id)
+            if player and player.fantasy_positions:
                 player_data = {
                     "name": player.full_name,
-                    "position": player.data['fantasy_positions'][0] if isinstance(player.data['fantasy_positions'], list) else player.data['fantasy_positions'],
+                    "position": player.primary_position,
                     "team": player.team if hasattr(player, 'team') else None,
                     "rank_ave": player.rank_ave
                 }
@@ -58,7 +59,8 @@ def generate_roast_article(league):
 
     if not roster_data:
         logging.error(f"No valid roster data found for League: {league.name}.")
-        return None
+        on_article(None)
+        return
     
     system_message = """
     You are a savage fantasy football analyst tasked with roasting each team's roster in a league. For each team, analyze their roster and mercilessly mock their player selections, pointing out weaknesses, bad draft picks, and questionable decisions. Pay special attention to the difference between starters and bench players. The roast should be humorous, insulting, and pull no punches. Feel free to use trash talk, sarcasm, and hyperbole to exaggerate the shortcomings of each team. The goal is to entertain the reader by creatively and ruthlessly criticizing each roster.
@@ -81,26 +83,29 @@ def generate_roast_article(league):
 
     print(f"\nFull prompt being sent to OpenAI for League: {league.name}:\n{prompt}\n")
 
-    logging.info(f"Sending prompt to OpenAI for League: {league.name}")
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=7000
-        )
+    logging.info(f"Queueing prompt for League: {league.name}")
+
+    def store(completion):
+        if completion is None:
+            print(f"\nError generating roast article for League: {league.name}\n")
+            on_article(None)
+            return
 
         roast_content = completion.choices[0].message.content
         print(f"\nOpenAI response:\n{roast_content}\n")
 
-        return roast_content
+        on_article(roast_content)
 
-    except Exception as e:
-        print(f"\nError generating roast article for League: {league.name}: {e}\n")
-        return None
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=7000,
+        label=f"{league.sleeper_league_id}:roster_roast",
+        on_result=store,
+    )
 
 class Command(BaseCommand):
     help = "Generates roast articles for all leagues."
@@ -111,29 +116,24 @@ class Command(BaseCommand):
             print("Failed to fetch the current NFL week.")
             return
 
-        current_time = timezone.now()
-        leagues = League.objects.filter(Q(status='in_season') | Q(status='pre_draft'))
+        context = kwargs.get('context')
+        if context is not None:
+            # run_scheduled_tasks passes the context of one league that is already due
+            leagues = [context.league]
+        else:
+            current_time = timezone.now()
+            leagues = League.objects.filter(Q(status='in_season') | Q(status='pre_draft'))
         
+        # run_scheduled_tasks passes one batch for every script and league and runs it itself
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+
         for league in leagues:
-            if self.should_run_task(league, current_time):
+            if context is not None or self.should_run_task(league, current_time):
                 try:
                     print(f"\nGenerating roast article for League: {league.name}")
-                    content = generate_roast_article(league)
-                    print(f"Content returned: {content}")
-                    
-                    if content:
-                        article, created = Article.objects.update_or_create(
-                            sleeper_league_id=league,
-                            week=current_week,
-                            label='roster_roast',
-                            defaults={'content': content}
-                        )
-                        if created:
-                            print(f"Roast article for League: {league.name} created successfully.")
-                        else:
-                            print(f"Roast article for League: {league.name} updated successfully.")
-                    else:
-                        print(f"Failed to generate roast article for League: {league.name}. Content was None.")
+                    generate_roast_article(league, batch, self.article_saver(league, current_week), context=context)
                 except Exception as e:
                     print(f"Error in generate_roast_article for League: {league.name}")
                     print(f"Error details: {str(e)}")
@@ -141,6 +141,29 @@ class Command(BaseCommand):
                     import traceback
                     traceback.print_exc()
 
+        if run_now:
+            batch.run()
+
+    def article_saver(self, league, current_week):
+        def save_article(content):
+            print(f"Content returned: {content}")
+
+            if content:
+                article, created = Article.objects.update_or_create(
+                    sleeper_league_id=league,
+                    week=current_week,
+                    label=ARTICLE_LABEL,
+                    defaults={'content': content}
+                )
+                if created:
+                    print(f"Roast article for League: {league.name} created successfully.")
+                else:
+                    print(f"Roast article for League: {league.name} updated successfully.")
+            else:
+                print(f"Failed to generate roast article for League: {league.name}. Content was None.")
+
+        return save_article
+
     def should_run_task(self, league, current_time):
         if not league.scheduled_day or not league.scheduled_time:
             print(f"League {league.name} has no scheduled day or time.")
@@ -165,14 +188,4 @@ class Command(BaseCommand):
         else:
             print(f"Not the scheduled day or time for league {league.name}")
         
-        return False
-
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -1,21 +1,20 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
-from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team, PlayerProjection
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch, function_arguments
+from ffjournal.models import League, Article
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel
 from typing import Optional, List
 from django.utils import timezone
 import pytz
 from datetime import datetime
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'this_weeks_matchups'
 
 # Define the Pydantic models to structure the API responses
 class PlayerData(BaseModel):
@@ -31,46 +30,23 @@ class MatchupData(BaseModel):
     team_name: str
     starters: List[PlayerData]
 
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
-
-def generate_matchup_writeup(matchups_list, league, week):
+def generate_matchup_writeup(matchups_list, league, week, context, batch, on_writeup):
     matchup_data = []
     for matchup in matchups_list:
-        roster = Roster.objects.filter(
-            sleeper_league_id=league.sleeper_league_id,
-            roster_id=matchup.roster_id
-        ).first()
+        roster = context.roster(matchup.roster_id)
         if roster:
-            team = Team.objects.filter(
-                sleeper_league_id=league.sleeper_league_id,
-                sleeper_user_id=roster.owner_id
-            ).first()
-            team_name = team.team_name if team else f"Team {roster.owner_id}"
+            team_name = context.team_name(roster)
 
             starters = roster.starters or []
             starter_data = []
             for starter in starters:
-                player = Player.objects.filter(player_id=starter).first()
+                player = context.player(starter)
                 if player and player.full_name:
-                    # Fetch player projection
-                    projection = PlayerProjection.objects.filter(
-                        player__player_id=starter, week=week
-                    ).first()
-                    projected_points = projection.pts_ppr if projection else None
+                    projected_points = context.projection(starter)
 
                     player_data = PlayerData(
                         name=player.full_name,
-                        position=player.data['fantasy_positions'][0]
-                        if isinstance(player.data['fantasy_positions'], list)
-                        else player.data['fantasy_positions'],
+                        position=player.primary_position,
                         team=player.team if hasattr(player, 'team') else None,
                         rank_ave=player.rank_ave,
                         projected_points=projected_points
@@ -121,34 +97,13 @@ def generate_matchup_writeup(matchups_list, league, week):
     {matchup_data}
     """
 
-    logging.info(f"Sending prompt to OpenAI for matchup {matchups_list[0].matchup_id} in League: {league.name}, Week: {week}")
-
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            functions=[{
-                "name": "generate_writeup",
-                "description": "Generate a matchup write-up",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "content": {
-                            "type": "string",
-                            "description": "The write-up for the matchup"
-                        }
-                    },
-                    "required": ["content"]
-                }
-            }],
-            function_call={"name": "generate_writeup"}
-        )
+    logging.info(f"Queueing prompt for matchup {matchups_list[0].matchup_id} in League: {league.name}, Week: {week}")
 
-        response_content = completion.choices[0].message.function_call.arguments
-        writeup_data = json.loads(response_content)
+    def store(completion):
+        writeup_data = function_arguments(completion)
+        if not writeup_data:
+            print(f"Error generating write-up for matchup {matchups_list[0].matchup_id} in league {league.name}, week {week}")
+            return
 
         content = writeup_data['content']
 
@@ -165,11 +120,32 @@ def generate_matchup_writeup(matchups_list, league, week):
         else:
             print(f"Matchup write-up for Matchup ID {matchups_list[0].matchup_id} updated successfully.")
 
-        return content
-
-    except Exception as e:
-        print(f"Error generating write-up for matchup {matchups_list[0].matchup_id} in league {league.name}, week {week}: {e}")
-        return None
+        on_writeup(content)
+
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        functions=[{
+            "name": "generate_writeup",
+            "description": "Generate a matchup write-up",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "content": {
+                        "type": "string",
+                        "description": "The write-up for the matchup"
+                    }
+                },
+                "required": ["content"]
+            }
+        }],
+        function_call={"name": "generate_writeup"},
+        label=f"{league.sleeper_league_id}:matchup_{matchups_list[0].matchup_id}",
+        on_result=store,
+    )
 
 def combine_matchup_writeups(matchup_writeups, league, week):
     # Combine the write-ups into one article
@@ -178,30 +154,23 @@ def combine_matchup_writeups(matchup_writeups, league, week):
 
     return title, combined_content
 
-def generate_matchup_article(league, week):
+def generate_matchup_article(league, week, batch, on_article, context=None):
+    """Queue a write-up per matchup on `batch`; `on_article(title, content)` gets the combined article once they are all in."""
     print(f"Entering generate_matchup_article for League: {league.name}, Week: {week}")
-    logging.info(f"Fetching matchups for League: {league.name}, Week: {week}")
-    matchups = Matchup.objects.filter(sleeper_league_id=league.sleeper_league_id, week=week)
+    context = context or LeagueWeekContext.load(league, week)
+    matchup_dict = context.matchups_by_id(week)
     
-    if not matchups:
+    if not matchup_dict:
         logging.error(f"No matchups found for League: {league.name}, Week: {week}.")
-        return None, None
-
-    # Group matchups by matchup_id
-    matchup_dict = {}
-    for matchup in matchups:
-        matchup_dict.setdefault(matchup.matchup_id, []).append(matchup)
+        on_article(None, None)
+        return
     
     matchup_writeups = []
     for matchup_id, matchups_list in matchup_dict.items():
-        writeup = generate_matchup_writeup(matchups_list, league, week)
-        if writeup:
-            matchup_writeups.append(writeup)
+        generate_matchup_writeup(matchups_list, league, week, context, batch, matchup_writeups.append)
 
     # Now combine the write-ups into one article
-    combined_title, combined_content = combine_matchup_writeups(matchup_writeups, league, week)
-
-    return combined_title, combined_content
+    batch.then(lambda: on_article(*combine_matchup_writeups(matchup_writeups, league, week)))
 
 class Command(BaseCommand):
     help = "Generates matchup articles for a specific league for the current NFL week."
@@ -218,8 +187,11 @@ class Command(BaseCommand):
 
         try:
             league = League.objects.get(id=league_id)
-            print(f"\nGenerating article for League: {league.name}, Week: {current_week}")
-            title, content = generate_matchup_article(league, current_week)
+        except League.DoesNotExist:
+            print(f"League with ID {league_id} does not exist.")
+            return
+
+        def save_article(title, content):
             print(f"Title: {title}")
             print(f"Content returned: {content}")
             
@@ -227,7 +199,7 @@ class Command(BaseCommand):
                 article, created = Article.objects.update_or_create(
                     sleeper_league_id=league,
                     week=current_week,
-                    label='this_weeks_matchups',
+                    label=ARTICLE_LABEL,
                     defaults={'title': title, 'content': content}
                 )
                 if created:
@@ -236,5 +208,12 @@ class Command(BaseCommand):
                     print(f"Article for League: {league.name}, Week: {current_week} updated successfully.")
             else:
                 print(f"Failed to generate article for League: {league.name}, Week: {current_week}. Content or title was None.")
-        except League.DoesNotExist:
-            print(f"League with ID {league_id} does not exist.")
+
+        # run_scheduled_tasks passes one batch for every league and runs it once they have all queued
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+        print(f"\nGenerating article for League: {league.name}, Week: {current_week}")
+        generate_matchup_article(league, current_week, batch, save_article, context=kwargs.get('context'))
+        if run_now:
+            batch.run()
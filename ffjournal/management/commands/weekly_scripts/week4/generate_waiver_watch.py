@@ -1,22 +1,22 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team, PlayerProjection, TrendingUpPlayer, TrendingDownPlayer
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch, function_arguments
+from ffjournal.models import League, Article
+from ffjournal.nfl_state import fetch_current_nfl_week
+from ffjournal.trending import trend_velocity
 from pydantic import BaseModel, ValidationError
 from typing import Optional, List
 from django.utils import timezone
-from django.conf import settings
 import pytz
 from datetime import datetime
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'waiver_watch'
 
 # Define the Pydantic models to structure the API responses
 class TrendingPlayerData(BaseModel):
@@ -24,31 +24,25 @@ class TrendingPlayerData(BaseModel):
     count: int
     position: Optional[str] = None
     team: Optional[str] = None
+    count_3_days_ago: Optional[int] = None
 
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
-
-def generate_waiver_watch_article(league, week):
+def generate_waiver_watch_article(league, week, batch, on_article, context=None):
+    """Queue the waiver watch article on `batch`; `on_article(title, content)` gets the result."""
     print(f"Entering generate_waiver_watch_article for League: {league.name}, Week: {week}")
     logging.info(f"Fetching trending players for League: {league.name}, Week: {week}")
+    context = context or LeagueWeekContext.load(league, week)
 
     # Fetch trending players
-    trending_up_players = get_trending_up_players(league)
-    trending_down_players = get_trending_down_players(league)
+    trending_up_players = get_trending_up_players(league, context)
+    trending_down_players = get_trending_down_players(league, context)
 
     logging.info(f"Trending up players: {trending_up_players}")
     logging.info(f"Trending down players: {trending_down_players}")
 
     if not trending_up_players and not trending_down_players:
         logging.error(f"No trending players found for League: {league.name}, Week: {week}.")
-        return None, None
+        on_article(None, None)
+        return
 
     # Default system message
     system_message = """
@@ -70,6 +64,8 @@ def generate_waiver_watch_article(league, week):
     Discuss the following players who are trending up but not rostered in this league. The count you will receive is the number of teams worldwide that have added the player to their roster in the past 24 hours. Discuss each of these players:
     {trending_up_players}
 
+    Where count_3_days_ago is given, it is the same 24-hour count from three days earlier, so you can say whether interest in a player is building or fading.
+
     4. Trending Down Players:
     Discuss the following players who are trending down but still rostered in this league. The count you will receive is the number of teams worldwide that have dropped the player from their roster in the past 24 hours. Be sure to talk trash about the fantasy football team that currently has the player. Discuss each of these players:
     {trending_down_players}
@@ -82,52 +78,14 @@ def generate_waiver_watch_article(league, week):
 
     print(f"\nFull prompt being sent to OpenAI for League: {league.name}, Week: {week}:\n{prompt}\n")
 
-    logging.info(f"Sending prompt to OpenAI for League: {league.name}, Week: {week}")
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            functions=[{
-                "name": "generate_article",
-                "description": "Generate a fantasy football waiver watch article with a title and content",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "A catchy and informative title for the article"
-                        },
-                        "content": {
-                            "type": "string",
-                            "description": "The main content of the article, in plain text with no markdown"
-                        }
-                    },
-                    "required": ["title", "content"]
-                }
-            }],
-            function_call={"name": "generate_article"}
-        )
+    logging.info(f"Queueing prompt for League: {league.name}, Week: {week}")
 
-        response_content = completion.choices[0].message.function_call.arguments
-        
-        # Add more robust JSON parsing
-        try:
-            article_data = json.loads(response_content)
-        except json.JSONDecodeError as json_error:
-            print(f"JSON Decode Error: {json_error}")
-            print(f"Raw response content: {response_content}")
-            
-            # Attempt to clean the response content
-            cleaned_content = ''.join(char for char in response_content if ord(char) >= 32)
-            try:
-                article_data = json.loads(cleaned_content)
-            except json.JSONDecodeError:
-                print("Failed to parse JSON even after cleaning.")
-                return None, None
+    def store(completion):
+        article_data = function_arguments(completion)
+        if not article_data:
+            print(f"\nError generating waiver watch article for league {league.name}, week {week}\n")
+            on_article(None, None)
+            return
 
         title = article_data.get('title', 'No Title Generated')
         content = article_data.get('content', 'No Content Generated')
@@ -135,33 +93,59 @@ def generate_waiver_watch_article(league, week):
         print(f"\nGenerated Title: {title}")
         print(f"\nGenerated Content: {content[:100]}...")  # Print first 100 characters of content
 
-        return title, content
-
-    except Exception as e:
-        print(f"\nError generating waiver watch article for league {league.name}, week {week}: {e}\n")
-        return None, None
-
-def get_rostered_player_ids(league):
-    rostered_player_ids = set()
-    rosters = Roster.objects.filter(sleeper_league_id=league)
-    for roster in rosters:
-        rostered_player_ids.update(str(player_id) for player_id in roster.players)
+        on_article(title, content)
+
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        functions=[{
+            "name": "generate_article",
+            "description": "Generate a fantasy football waiver watch article with a title and content",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "title": {
+                        "type": "string",
+                        "description": "A catchy and informative title for the article"
+                    },
+                    "content": {
+                        "type": "string",
+                        "description": "The main content of the article, in plain text with no markdown"
+                    }
+                },
+                "required": ["title", "content"]
+            }
+        }],
+        function_call={"name": "generate_article"},
+        label=f"{league.sleeper_league_id}:waiver_watch",
+        on_result=store,
+    )
+
+def get_rostered_player_ids(league, context):
+    rostered_player_ids = context.rostered_player_ids
     logging.info(f"Rostered player IDs for league {league.name}: {rostered_player_ids}")
     return rostered_player_ids
 
-def get_trending_up_players(league):
-    rostered_player_ids = get_rostered_player_ids(league)
-    all_trending_up = TrendingUpPlayer.objects.order_by('-count')
+def get_trending_up_players(league, context):
+    rostered_player_ids = get_rostered_player_ids(league, context)
+    trending_up = trend_velocity('add')
+    # Trending adds are mostly free agents, so they are loaded into the context on demand
+    context.load_players(trending_up)
+    players = context.players
     
     trending_up_data = []
-    for trend in all_trending_up:
-        logging.info(f"Checking trending up player: {trend.player_id}, rostered: {trend.player_id in rostered_player_ids}")
-        if trend.player_id not in rostered_player_ids:
-            player = Player.objects.filter(player_id=trend.player_id).first()
+    for player_id, trend in trending_up.items():
+        logging.info(f"Checking trending up player: {player_id}, rostered: {player_id in rostered_player_ids}")
+        if player_id not in rostered_player_ids:
+            player = players.get(player_id)
             if player:
                 trending_up_data.append({
                     'name': player.full_name,
-                    'count': trend.count,
+                    'count': trend['count'],
+                    'count_3_days_ago': trend['previous'],
                     'position': player.position,
                     'team': player.team
                 })
@@ -171,28 +155,30 @@ def get_trending_up_players(league):
     logging.info(f"Trending up players for league {league.name}: {trending_up_data}")
     return trending_up_data
 
-def get_trending_down_players(league):
-    rostered_player_ids = get_rostered_player_ids(league)
-    all_trending_down = TrendingDownPlayer.objects.order_by('-count')
+def get_trending_down_players(league, context):
+    rostered_player_ids = get_rostered_player_ids(league, context)
+    trending_down = trend_velocity('drop')
+    players = context.players
     
     trending_down_data = []
-    for trend in all_trending_down:
-        logging.info(f"Checking trending down player: {trend.player_id}, rostered: {trend.player_id in rostered_player_ids}")
-        if trend.player_id in rostered_player_ids:
-            player = Player.objects.filter(player_id=trend.player_id).first()
+    for player_id, trend in trending_down.items():
+        logging.info(f"Checking trending down player: {player_id}, rostered: {player_id in rostered_player_ids}")
+        if player_id in rostered_player_ids:
+            player = players.get(player_id)
             if player:
                 # Find the roster for this player in the league
-                roster = Roster.objects.filter(sleeper_league_id=league, players__contains=[trend.player_id]).first()
+                roster = context.roster_of(player_id)
                 team_name = "Unknown"
                 if roster:
                     # Use the owner_id from the roster and the league to find the team
-                    team = Team.objects.filter(sleeper_user_id=roster.owner_id, sleeper_league_id=league).first()
+                    team = context.team(roster)
                     if team:
                         team_name = team.team_name
 
                 trending_down_data.append({
                     'name': player.full_name,
-                    'count': trend.count,
+                    'count': trend['count'],
+                    'count_3_days_ago': trend['previous'],
                     'position': player.position,
                     'team': player.team,
                     'fantasy_team': team_name
@@ -212,30 +198,24 @@ class Command(BaseCommand):
             print("Failed to fetch the current NFL week.")
             return
 
-        current_time = timezone.now()
-        leagues = League.objects.filter(status='in_season')
+        context = kwargs.get('context')
+        if context is not None:
+            # run_scheduled_tasks passes the context of one league that is already due
+            leagues = [context.league]
+        else:
+            current_time = timezone.now()
+            leagues = League.objects.filter(status='in_season')
         
+        # run_scheduled_tasks passes one batch for every script and league and runs it itself
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+
         for league in leagues:
-            if self.should_run_task(league, current_time):
+            if context is not None or self.should_run_task(league, current_time):
                 print(f"\nGenerating waiver watch article for League: {league.name}, Week: {current_week}")
                 try:
-                    title, content = generate_waiver_watch_article(league, current_week)
-                    print(f"Title: {title}")
-                    print(f"Content returned: {content}")
-                    
-                    if title and content:
-                        article, created = Article.objects.update_or_create(
-                            sleeper_league_id=league,
-                            week=current_week,
-                            label='waiver_watch',
-                            defaults={'title': title, 'content': content}
-                        )
-                        if created:
-                            print(f"Waiver watch article for League: {league.name}, Week: {current_week} created successfully.")
-                        else:
-                            print(f"Waiver watch article for League: {league.name}, Week: {current_week} updated successfully.")
-                    else:
-                        print(f"Failed to generate waiver watch article for League: {league.name}, Week: {current_week}. Content or title was None.")
+                    generate_waiver_watch_article(league, current_week, batch, self.article_saver(league, current_week), context=context)
                 except Exception as e:
                     print(f"Error in generate_waiver_watch_article for League: {league.name}, Week: {current_week}")
                     print(f"Error details: {str(e)}")
@@ -243,6 +223,30 @@ class Command(BaseCommand):
                     import traceback
                     traceback.print_exc()
 
+        if run_now:
+            batch.run()
+
+    def article_saver(self, league, current_week):
+        def save_article(title, content):
+            print(f"Title: {title}")
+            print(f"Content returned: {content}")
+
+            if title and content:
+                article, created = Article.objects.update_or_create(
+                    sleeper_league_id=league,
+                    week=current_week,
+                    label=ARTICLE_LABEL,
+                    defaults={'title': title, 'content': content}
+                )
+                if created:
+                    print(f"Waiver watch article for League: {league.name}, Week: {current_week} created successfully.")
+                else:
+                    print(f"Waiver watch article for League: {league.name}, Week: {current_week} updated successfully.")
+            else:
+                print(f"Failed to generate waiver watch article for League: {league.name}, Week: {current_week}. Content or title was None.")
+
+        return save_article
+
     def should_run_task(self, league, current_time):
         if not league.scheduled_day or not league.scheduled_time:
             print(f"League {league.name} has no scheduled day or time.")
@@ -1,22 +1,21 @@
-import requests
 import logging
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from openai import OpenAI
-from ffjournal.models import League, Matchup, Roster, Player, Article, Team, PlayerStats
+from ffjournal.league_context import LeagueWeekContext
+from ffjournal.llm import GenerationBatch, function_arguments
+from ffjournal.models import League, Article
+from ffjournal.nfl_state import fetch_current_nfl_week
 from pydantic import BaseModel
 from typing import Optional, List
 from django.utils import timezone
-from django.conf import settings
 import pytz
 from datetime import datetime
-import json
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
-# OpenAI setup
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# The Article this script saves for each league; run_scheduled_tasks checks for it
+ARTICLE_LABEL = 'last_week_recap'
 
 # Define the Pydantic models to structure the API responses
 class PlayerData(BaseModel):
@@ -30,20 +29,10 @@ class TeamData(BaseModel):
     points: float
     starters: List[PlayerData]
 
-def fetch_current_nfl_week():
-    """Fetches the current NFL week from the Sleeper API."""
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    if response.status_code == 200:
-        nfl_state = response.json()
-        return nfl_state['week']
-    logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
-    return None
-
-def generate_matchup_recap(matchup_teams, league, week):
+def generate_matchup_recap(matchup_teams, league, week, batch, on_recap):
     if len(matchup_teams) != 2:
         logging.error("Expected 2 teams in matchup_teams")
-        return None
+        return
 
     team_data_list = []
     for team_info in matchup_teams:
@@ -82,34 +71,13 @@ def generate_matchup_recap(matchup_teams, league, week):
     {team_data_list}
     """
 
-    logging.info(f"Sending prompt to OpenAI for matchup in League: {league.name}, Week: {week}")
-
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini-2024-07-18",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            functions=[{
-                "name": "generate_writeup",
-                "description": "Generate a matchup recap write-up",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "content": {
-                            "type": "string",
-                            "description": "The write-up for the matchup recap"
-                        }
-                    },
-                    "required": ["content"]
-                }
-            }],
-            function_call={"name": "generate_writeup"}
-        )
+    logging.info(f"Queueing prompt for matchup in League: {league.name}, Week: {week}")
 
-        response_content = completion.choices[0].message.function_call.arguments
-        writeup_data = json.loads(response_content)
+    def store(completion):
+        writeup_data = function_arguments(completion)
+        if not writeup_data:
+            print(f"Error generating recap for matchup {matchup_teams[0]['matchup_id']} in league {league.name}, week {week}")
+            return
 
         content = writeup_data['content']
 
@@ -126,11 +94,32 @@ def generate_matchup_recap(matchup_teams, league, week):
         else:
             print(f"Matchup recap for Matchup ID {matchup_teams[0]['matchup_id']} updated successfully.")
 
-        return content
-
-    except Exception as e:
-        print(f"Error generating recap for matchup {matchup_teams[0]['matchup_id']} in league {league.name}, week {week}: {e}")
-        return None
+        on_recap(content)
+
+    batch.add(
+        model="gpt-4o-mini-2024-07-18",
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        functions=[{
+            "name": "generate_writeup",
+            "description": "Generate a matchup recap write-up",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "content": {
+                        "type": "string",
+                        "description": "The write-up for the matchup recap"
+                    }
+                },
+                "required": ["content"]
+            }
+        }],
+        function_call={"name": "generate_writeup"},
+        label=f"{league.sleeper_league_id}:matchup_recap_{matchup_teams[0]['matchup_id']}",
+        on_result=store,
+    )
 
 def combine_matchup_recaps(matchup_recaps, league, week):
     # Combine the recaps into one article
@@ -139,39 +128,37 @@ def combine_matchup_recaps(matchup_recaps, league, week):
 
     return title, combined_content
 
-def generate_last_week_recap(league, week):
+def generate_last_week_recap(league, week, batch, on_article, context=None):
+    """Queue a recap per matchup on `batch`; `on_article(title, content)` gets the combined article once they are all in."""
     print(f"Generating recap for League: {league.name}, Week: {week}")
-    logging.info(f"Fetching matchups for League: {league.name}, Week: {week}")
-
-    matchups = Matchup.objects.filter(sleeper_league_id=league.sleeper_league_id, week=week)
+    context = context or LeagueWeekContext.load(league, week)
+    matchups = context.matchups.get(week, [])
 
     if not matchups:
         logging.error(f"No matchups found for League: {league.name}, Week: {week}.")
-        return None, None
+        on_article(None, None)
+        return
 
     # Organize matchups by matchup_id
     matchup_data = {}
     for matchup in matchups:
-        roster = Roster.objects.filter(sleeper_league_id=league.sleeper_league_id, roster_id=matchup.roster_id).first()
+        roster = context.roster(matchup.roster_id)
         if matchup.matchup_id not in matchup_data:
             matchup_data[matchup.matchup_id] = []
 
         if roster:
-            team = Team.objects.filter(sleeper_league_id=league.sleeper_league_id, sleeper_user_id=roster.owner_id).first()
-            team_name = team.team_name if team else f"Team {roster.owner_id}"
+            team_name = context.team_name(roster)
         else:
             team_name = f"Team {matchup.roster_id}"
 
         starters_data = []
         for player_id, points in zip(matchup.starters, matchup.starters_points):
-            player = Player.objects.filter(player_id=player_id).first()
+            player = context.player(player_id)
             if player and player.full_name:
                 starters_data.append({
                     'name': player.full_name,
                     'points': points,
-                    'position': player.data['fantasy_positions'][0]
-                    if isinstance(player.data['fantasy_positions'], list)
-                    else player.data['fantasy_positions'],
+                    'position': player.primary_position,
                     'team': player.team if hasattr(player, 'team') else None,
                 })
 
@@ -184,14 +171,10 @@ def generate_last_week_recap(league, week):
 
     matchup_recaps = []
     for matchup_id, matchup_teams in matchup_data.items():
-        recap = generate_matchup_recap(matchup_teams, league, week)
-        if recap:
-            matchup_recaps.append(recap)
+        generate_matchup_recap(matchup_teams, league, week, batch, matchup_recaps.append)
 
     # Now combine the recaps into one article
-    combined_title, combined_content = combine_matchup_recaps(matchup_recaps, league, week)
-
-    return combined_title, combined_content
+    batch.then(lambda: on_article(*combine_matchup_recaps(matchup_recaps, league, week)))
 
 class Command(BaseCommand):
     help = "Generates recap articles for a specific league for the previous NFL week."
@@ -213,14 +196,16 @@ class Command(BaseCommand):
 
         try:
             league = League.objects.get(id=league_id)
-            print(f"\nGenerating recap for League: {league.name}, Week: {last_week}")
-            title, content = generate_last_week_recap(league, last_week)
-            
+        except League.DoesNotExist:
+            print(f"League with ID {league_id} does not exist.")
+            return
+
+        def save_article(title, content):
             if title and content:
                 article, created = Article.objects.update_or_create(
                     sleeper_league_id=league,
                     week=current_week,
-                    label='last_week_recap',
+                    label=ARTICLE_LABEL,
                     defaults={'title': title, 'content': content}
                 )
                 if created:
@@ -230,8 +215,16 @@ class Command(BaseCommand):
             else:
                 print(f"Failed to generate recap article for League: {league.name}, Week: {last_week}. Content or title was None.")
 
-        except League.DoesNotExist:
-            print(f"League with ID {league_id} does not exist.")
+        # run_scheduled_tasks passes one batch for every script and league and runs it itself
+        batch = kwargs.get('batch')
+        run_now = batch is None
+        batch = batch or GenerationBatch()
+
+        print(f"\nGenerating recap for League: {league.name}, Week: {last_week}")
+        generate_last_week_recap(league, last_week, batch, save_article, context=kwargs.get('context'))
+
+        if run_now:
+            batch.run()
 
 
     def should_run_task(self, league, current_time):
@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-18 10:02
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_rows(apps, schema_editor):
+    """Keep the newest row for each natural key so the unique constraints can be added."""
+    Roster = apps.get_model('ffjournal', 'Roster')
+    Matchup = apps.get_model('ffjournal', 'Matchup')
+
+    roster_keys = ['sleeper_league_id', 'roster_id']
+    matchup_keys = ['sleeper_league_id', 'week', 'matchup_id', 'roster_id']
+
+    for model, keys in ((Roster, roster_keys), (Matchup, matchup_keys)):
+        duplicates = (
+            model.objects.values(*keys)
+            .annotate(keep_id=Max('id'), row_count=Count('id'))
+            .filter(row_count__gt=1)
+        )
+        for duplicate in duplicates:
+            lookup = {key: duplicate[key] for key in keys}
+            model.objects.filter(**lookup).exclude(id=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0016_alter_event_consenter_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roster',
+            constraint=models.UniqueConstraint(fields=('sleeper_league_id', 'roster_id'), name='unique_roster_per_league'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchup',
+            constraint=models.UniqueConstraint(fields=('sleeper_league_id', 'week', 'matchup_id', 'roster_id'), name='unique_matchup_roster_per_week', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 10:31
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0017_roster_matchup_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeagueSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('finalized_matchup_weeks', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sleeper_league_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sync_state', to='ffjournal.league', to_field='sleeper_league_id')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0018_leaguesyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NFLState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.CharField(max_length=10)),
+                ('week', models.IntegerField()),
+                ('data', models.JSONField()),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0019_nflstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='data_digest',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
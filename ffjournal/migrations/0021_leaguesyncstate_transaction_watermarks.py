@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-18 12:05
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0020_player_data_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguesyncstate',
+            name='closed_transaction_weeks',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='leaguesyncstate',
+            name='transaction_watermarks',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
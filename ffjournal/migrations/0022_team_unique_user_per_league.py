@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-18 12:48
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_teams(apps, schema_editor):
+    """Keep the newest team for each league and user so the unique constraint can be added."""
+    Team = apps.get_model('ffjournal', 'Team')
+    keys = ['sleeper_league_id', 'sleeper_user_id']
+    duplicates = (
+        Team.objects.values(*keys)
+        .annotate(keep_id=Max('id'), row_count=Count('id'))
+        .filter(row_count__gt=1)
+    )
+    for duplicate in duplicates:
+        lookup = {key: duplicate[key] for key in keys}
+        Team.objects.filter(**lookup).exclude(id=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0021_leaguesyncstate_transaction_watermarks'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_teams, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='team',
+            constraint=models.UniqueConstraint(fields=('sleeper_league_id', 'sleeper_user_id'), name='unique_team_user_per_league'),
+        ),
+    ]
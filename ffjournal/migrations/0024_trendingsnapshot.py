@@ -0,0 +1,51 @@
+# Generated by Django 5.1 on 2026-10-18 14:02
+
+import django.contrib.postgres.fields
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_current_trending(apps, schema_editor):
+    """Carry the last fetched trending lists over as the first snapshots."""
+    TrendingSnapshot = apps.get_model('ffjournal', 'TrendingSnapshot')
+    for kind, model_name in (('add', 'TrendingUpPlayer'), ('drop', 'TrendingDownPlayer')):
+        rows = list(apps.get_model('ffjournal', model_name).objects.exclude(player_id=None).order_by('-count'))
+        if rows:
+            TrendingSnapshot.objects.create(
+                kind=kind,
+                fetched_at=max(row.created_at for row in rows),
+                player_ids=[row.player_id for row in rows],
+                counts=[row.count for row in rows],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0023_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('add', 'Trending up'), ('drop', 'Trending down')], max_length=4)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('lookback_hours', models.IntegerField(default=24)),
+                ('player_ids', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), default=list, size=None)),
+                ('counts', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('is_rollup', models.BooleanField(default=False)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', '-fetched_at'], name='trending_latest')],
+            },
+        ),
+        migrations.RunPython(copy_current_trending, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='TrendingDownPlayer',
+        ),
+        migrations.DeleteModel(
+            name='TrendingUpPlayer',
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1 on 2026-10-18 14:40
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0024_trendingsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeagueSeason',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sleeper_league_id', models.CharField(max_length=255, unique=True)),
+                ('season', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=255)),
+                ('previous_league_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('champion_roster_id', models.IntegerField(blank=True, null=True)),
+                ('data', models.JSONField()),
+                ('fetched_at', models.DateTimeField(auto_now_add=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seasons', to='ffjournal.league', to_field='sleeper_league_id')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeasonMatchup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.IntegerField()),
+                ('matchup_id', models.IntegerField(blank=True, null=True)),
+                ('roster_id', models.IntegerField()),
+                ('points', models.FloatField(blank=True, null=True)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matchups', to='ffjournal.leagueseason')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season', 'week', 'matchup_id'], name='season_matchup_pairing')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonRoster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('roster_id', models.IntegerField()),
+                ('owner_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('display_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('team_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('ties', models.IntegerField(default=0)),
+                ('points_for', models.FloatField(default=0)),
+                ('points_against', models.FloatField(default=0)),
+                ('players', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), blank=True, default=list, size=None)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rosters', to='ffjournal.leagueseason')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id'], name='season_roster_owner')],
+                'constraints': [models.UniqueConstraint(fields=('season', 'roster_id'), name='unique_season_roster')],
+            },
+        ),
+    ]
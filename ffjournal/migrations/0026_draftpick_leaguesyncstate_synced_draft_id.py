@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0025_leagueseason_seasonroster_seasonmatchup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaguesyncstate',
+            name='synced_draft_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='DraftPick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draft_id', models.CharField(max_length=255)),
+                ('pick_no', models.IntegerField()),
+                ('round', models.IntegerField()),
+                ('draft_slot', models.IntegerField()),
+                ('roster_id', models.IntegerField(blank=True, null=True)),
+                ('player_id', models.CharField(max_length=20)),
+                ('picked_by', models.CharField(blank=True, max_length=255, null=True)),
+                ('position', models.CharField(blank=True, max_length=10, null=True)),
+                ('team', models.CharField(blank=True, max_length=10, null=True)),
+                ('is_keeper', models.BooleanField(default=False)),
+                ('sleeper_league_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_picks', to='ffjournal.league', to_field='sleeper_league_id')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sleeper_league_id', 'roster_id'], name='draft_pick_roster'), models.Index(fields=['player_id'], name='draft_pick_player')],
+                'constraints': [models.UniqueConstraint(fields=('draft_id', 'pick_no'), name='unique_draft_pick')],
+            },
+        ),
+    ]
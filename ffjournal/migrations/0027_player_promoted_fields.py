@@ -0,0 +1,94 @@
+# Generated by Django 5.1 on 2026-10-18 15:30
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+# Mirrors fetch_players.PLAYER_COLUMNS as of this migration
+PLAYER_COLUMNS = [
+    'first_name', 'last_name', 'full_name', 'position', 'team', 'age', 'college', 'status',
+    'height', 'weight', 'injury_status', 'injury_body_part', 'injury_start_date', 'injury_notes',
+    'practice_participation', 'practice_description', 'birth_date', 'birth_city', 'birth_state',
+    'birth_country', 'years_exp', 'high_school',
+]
+PROMOTED_FIELDS = ['fantasy_positions', 'number', 'depth_chart_position', 'depth_chart_order', 'search_rank']
+DROPPED_KEYS = set(PLAYER_COLUMNS + PROMOTED_FIELDS + ['player_id'])
+BATCH_SIZE = 1000
+
+
+def promote_player_fields(apps, schema_editor):
+    Player = apps.get_model('ffjournal', 'Player')
+    batch = []
+    for player in Player.objects.only('pk', 'data').iterator(chunk_size=BATCH_SIZE):
+        data = player.data or {}
+        for field in PROMOTED_FIELDS:
+            setattr(player, field, data.get(field))
+        if isinstance(player.fantasy_positions, str):
+            player.fantasy_positions = [player.fantasy_positions]
+        player.data = {
+            key: value for key, value in data.items()
+            if key not in DROPPED_KEYS and value not in (None, '', [], {})
+        }
+        batch.append(player)
+        if len(batch) >= BATCH_SIZE:
+            Player.objects.bulk_update(batch, PROMOTED_FIELDS + ['data'])
+            batch = []
+    if batch:
+        Player.objects.bulk_update(batch, PROMOTED_FIELDS + ['data'])
+
+
+def restore_player_data(apps, schema_editor):
+    # Only the columns are put back; empty values dropped from the blob are gone until the next fetch_players
+    Player = apps.get_model('ffjournal', 'Player')
+    batch = []
+    for player in Player.objects.iterator(chunk_size=BATCH_SIZE):
+        data = dict(player.data or {}, player_id=player.player_id)
+        for field in PLAYER_COLUMNS + PROMOTED_FIELDS:
+            data[field] = getattr(player, field)
+        player.data = data
+        batch.append(player)
+        if len(batch) >= BATCH_SIZE:
+            Player.objects.bulk_update(batch, ['data'])
+            batch = []
+    if batch:
+        Player.objects.bulk_update(batch, ['data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0026_draftpick_leaguesyncstate_synced_draft_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='fantasy_positions',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=10), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='depth_chart_position',
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='depth_chart_order',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='search_rank',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='player',
+            name='data',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(promote_player_fields, restore_player_data),
+    ]
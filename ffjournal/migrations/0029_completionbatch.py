@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-18 17:25
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ffjournal', '0028_datasetversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletionBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(max_length=255, unique=True)),
+                ('input_sha256', models.CharField(db_index=True, max_length=64)),
+                ('input_file', models.CharField(max_length=500)),
+                ('week', models.IntegerField(blank=True, null=True)),
+                ('leagues', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, size=None)),
+                ('status', models.CharField(default='validating', max_length=20)),
+                ('request_count', models.IntegerField(default=0)),
+                ('succeeded_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
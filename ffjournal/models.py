@@ -65,6 +65,11 @@ class Roster(models.Model):
     players = models.JSONField()
     starters = models.JSONField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sleeper_league_id', 'roster_id'], name='unique_roster_per_league'),
+        ]
+
 class Team(models.Model):
     sleeper_user_id = models.CharField(max_length=255)
     display_name = models.CharField(max_length=255)
@@ -75,6 +80,11 @@ class Team(models.Model):
     is_team_owner = models.BooleanField(null=True, blank=True)
     is_co_owner = models.BooleanField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sleeper_league_id', 'sleeper_user_id'], name='unique_team_user_per_league'),
+        ]
+
 class Matchup(models.Model):
     sleeper_league_id = models.ForeignKey(League, on_delete=models.CASCADE, to_field='sleeper_league_id')
     matchup_id = models.IntegerField(null=True, blank=True)
@@ -87,6 +97,188 @@ class Matchup(models.Model):
     starters_points = ArrayField(models.FloatField(), blank=True, null=True)
     players_points = JSONField(null=True, blank=True)  # This should now use the built-in JSONField
 
+    class Meta:
+        constraints = [
+            # Bye weeks come back with a null matchup_id, so nulls must collide too
+            models.UniqueConstraint(
+                fields=['sleeper_league_id', 'week', 'matchup_id', 'roster_id'],
+                name='unique_matchup_roster_per_week',
+                nulls_distinct=False,
+            ),
+        ]
+
+class LeagueSyncState(models.Model):
+    sleeper_league_id = models.OneToOneField(League, on_delete=models.CASCADE, to_field='sleeper_league_id', related_name='sync_state')
+    finalized_matchup_weeks = ArrayField(models.IntegerField(), default=list, blank=True)  # Weeks that will not be re-fetched
+    transaction_watermarks = models.JSONField(default=dict, blank=True)  # Week -> latest status_updated written
+    closed_transaction_weeks = ArrayField(models.IntegerField(), default=list, blank=True)  # Only re-polled on a full sync
+    synced_draft_id = models.CharField(max_length=255, null=True, blank=True)  # Draft whose picks are stored; never re-fetched
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sync state - {self.sleeper_league_id_id}"
+
+class DraftPick(models.Model):
+    # One pick of a completed draft; drafts don't change once complete, so rows are only ever inserted
+    sleeper_league_id = models.ForeignKey(League, on_delete=models.CASCADE, to_field='sleeper_league_id', related_name='draft_picks')
+    draft_id = models.CharField(max_length=255)
+    pick_no = models.IntegerField()
+    round = models.IntegerField()
+    draft_slot = models.IntegerField()
+    roster_id = models.IntegerField(null=True, blank=True)
+    player_id = models.CharField(max_length=20)
+    picked_by = models.CharField(max_length=255, null=True, blank=True)
+    position = models.CharField(max_length=10, null=True, blank=True)  # As of draft day
+    team = models.CharField(max_length=10, null=True, blank=True)  # As of draft day
+    is_keeper = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['draft_id', 'pick_no'], name='unique_draft_pick'),
+        ]
+        indexes = [
+            models.Index(fields=['sleeper_league_id', 'roster_id'], name='draft_pick_roster'),
+            models.Index(fields=['player_id'], name='draft_pick_player'),
+        ]
+
+    def __str__(self):
+        return f"{self.draft_id} pick {self.pick_no} - {self.player_id}"
+
+class LeagueSeason(models.Model):
+    # A completed earlier season of a league, reached through previous_league_id; written once, never refreshed
+    league = models.ForeignKey(League, on_delete=models.CASCADE, to_field='sleeper_league_id', related_name='seasons')
+    sleeper_league_id = models.CharField(max_length=255, unique=True)  # The old season's own league ID
+    season = models.CharField(max_length=10)
+    name = models.CharField(max_length=255)
+    previous_league_id = models.CharField(max_length=255, null=True, blank=True)
+    champion_roster_id = models.IntegerField(null=True, blank=True)
+    data = models.JSONField()
+    fetched_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.season})"
+
+class SeasonRoster(models.Model):
+    season = models.ForeignKey(LeagueSeason, on_delete=models.CASCADE, related_name='rosters')
+    roster_id = models.IntegerField()
+    owner_id = models.CharField(max_length=255, null=True, blank=True)
+    display_name = models.CharField(max_length=255, null=True, blank=True)
+    team_name = models.CharField(max_length=255, null=True, blank=True)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    ties = models.IntegerField(default=0)
+    points_for = models.FloatField(default=0)
+    points_against = models.FloatField(default=0)
+    players = ArrayField(models.CharField(max_length=20), default=list, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['season', 'roster_id'], name='unique_season_roster'),
+        ]
+        indexes = [
+            models.Index(fields=['owner_id'], name='season_roster_owner'),
+        ]
+
+class SeasonMatchup(models.Model):
+    season = models.ForeignKey(LeagueSeason, on_delete=models.CASCADE, related_name='matchups')
+    week = models.IntegerField()
+    matchup_id = models.IntegerField(null=True, blank=True)
+    roster_id = models.IntegerField()
+    points = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['season', 'week', 'matchup_id'], name='season_matchup_pairing'),
+        ]
+
+class NFLState(models.Model):
+    # Single-row cache of Sleeper's /state/nfl shared by every process
+    season = models.CharField(max_length=10)
+    week = models.IntegerField()
+    data = models.JSONField()
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.season} Week {self.week}"
+
+class DatasetVersion(models.Model):
+    # Version stamps that per-process caches compare against to know when to reload
+    name = models.CharField(max_length=50, unique=True)
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class Job(models.Model):
+    # Background work queued from web requests and run by the run_jobs worker
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    priority = models.IntegerField(default=0)  # Higher runs first
+    progress = models.IntegerField(default=0)  # Percent complete
+    message = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)
+    sleeper_league_id = models.ForeignKey(League, on_delete=models.CASCADE, to_field='sleeper_league_id', null=True, blank=True, related_name='jobs')
+    worker = models.CharField(max_length=255, blank=True, default='')
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Refreshed by the worker while it holds the job
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'created_at'], name='job_claim_order'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+class CompletionBatch(models.Model):
+    # A JSONL file of completions sent through the provider's Batch API; see ffjournal.llm.BatchExecutor
+    TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+    batch_id = models.CharField(max_length=255, unique=True)  # Provider's batch id
+    input_sha256 = models.CharField(max_length=64, db_index=True)  # Same prompts, same file: re-runs resume this batch
+    input_file = models.CharField(max_length=500)
+    week = models.IntegerField(null=True, blank=True)
+    leagues = ArrayField(models.CharField(max_length=255), default=list, blank=True)  # sleeper_league_ids with prompts in the file
+    status = models.CharField(max_length=20, default='validating')  # Provider's batch status
+    request_count = models.IntegerField(default=0)
+    succeeded_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Batch {self.batch_id} week {self.week} ({self.status})"
+
+class CachedCompletion(models.Model):
+    # Completions keyed by a hash of model, messages and parameters; see ffjournal.llm.GenerationBatch
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.key[:12]}"
+
+# Columns the article generators read; ffjournal.player_table keeps these in memory for every player
+PLAYER_CARD_FIELDS = (
+    'player_id', 'full_name', 'position', 'fantasy_positions', 'team', 'rank_ave', 'injury_status', 'injury_body_part',
+)
+
 class Player(models.Model):
     player_id = models.CharField(max_length=255, unique=True)
     first_name = models.CharField(max_length=255, null=True, blank=True)
@@ -111,9 +303,19 @@ class Player(models.Model):
     birth_country = models.CharField(max_length=255, null=True, blank=True)
     years_exp = models.IntegerField(null=True, blank=True)
     high_school = models.CharField(max_length=255, null=True, blank=True)
-    data = models.JSONField()
+    fantasy_positions = ArrayField(models.CharField(max_length=10), null=True, blank=True)
+    number = models.IntegerField(null=True, blank=True)
+    depth_chart_position = models.CharField(max_length=10, null=True, blank=True)
+    depth_chart_order = models.IntegerField(null=True, blank=True)
+    search_rank = models.IntegerField(null=True, blank=True)
+    data = models.JSONField(default=dict, blank=True)  # Non-empty Sleeper keys that have no column of their own
+    data_digest = models.CharField(max_length=64, null=True, blank=True)  # sha256 of the Sleeper payload, used to skip unchanged rows
     rank_ave = models.FloatField(null=True, blank=True)
 
+    @property
+    def primary_position(self):
+        return self.fantasy_positions[0] if self.fantasy_positions else self.position
+
 class Event(models.Model):
     sleeper_league_id = models.ForeignKey(League, on_delete=models.CASCADE, to_field='sleeper_league_id')
     transaction_id = models.CharField(max_length=255, unique=True)
@@ -187,18 +389,24 @@ class PlayerStats(models.Model):
     def __str__(self):
         return f"{self.player.full_name} - Week {self.week}"
     
-class TrendingUpPlayer(models.Model):
-    player_id = models.CharField(max_length=255, null=True, blank=True)  # Changed from ForeignKey to CharField
-    count = models.IntegerField()
-    created_at = models.DateTimeField(default=timezone.now)
+class TrendingSnapshot(models.Model):
+    # One row per fetch of Sleeper's trending add/drop list; player_ids and counts are parallel arrays
+    KIND_CHOICES = [
+        ('add', 'Trending up'),
+        ('drop', 'Trending down'),
+    ]
 
-    def __str__(self):
-        return f"{self.player.full_name} - Up {self.count}"
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    lookback_hours = models.IntegerField(default=24)
+    player_ids = ArrayField(models.CharField(max_length=20), default=list)  # Highest count first
+    counts = ArrayField(models.IntegerField(), default=list)
+    is_rollup = models.BooleanField(default=False)  # Kept as the day's representative after pruning
 
-class TrendingDownPlayer(models.Model):
-    player_id = models.CharField(max_length=255, null=True, blank=True)  # Changed from ForeignKey to CharField
-    count = models.IntegerField()
-    created_at = models.DateTimeField(default=timezone.now)
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', '-fetched_at'], name='trending_latest'),
+        ]
 
     def __str__(self):
-        return f"{self.player_id} - Down {self.count}"
\ No newline at end of file
+        return f"{self.get_kind_display()} - {self.fetched_at:%Y-%m-%d %H:%M}"
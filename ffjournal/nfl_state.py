@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import NFLState
+from .sleeper_client import get_client
+
+logger = logging.getLogger(__name__)
+
+# Wednesday of week 1 for each season, used when Sleeper's state endpoint is unavailable
+SEASON_CALENDAR = {
+    2024: date(2024, 9, 4),
+    2025: date(2025, 9, 3),
+    2026: date(2026, 9, 9),
+}
+REGULAR_SEASON_WEEKS = 18
+
+_cache = {'state': None, 'expires_at': 0.0}
+_cache_lock = threading.Lock()
+
+
+def get_nfl_state():
+    """Return Sleeper's NFL state, served from the in-process cache, then the DB cache, then the API."""
+    if _cache['state'] is not None and time.monotonic() < _cache['expires_at']:
+        return _cache['state']
+
+    with _cache_lock:
+        # Another thread may have refreshed the cache while we waited
+        if _cache['state'] is not None and time.monotonic() < _cache['expires_at']:
+            return _cache['state']
+
+        state = load_nfl_state()
+        _cache['state'] = state
+        _cache['expires_at'] = time.monotonic() + settings.NFL_STATE_CACHE_TTL
+        return state
+
+
+def load_nfl_state():
+    ttl = timedelta(seconds=settings.NFL_STATE_DB_CACHE_TTL)
+    cached = NFLState.objects.filter(pk=1).first()
+    if cached and timezone.now() - cached.fetched_at < ttl:
+        return cached.data
+
+    try:
+        state = get_client().get("state/nfl")
+    except Exception as e:
+        logger.error(f"Error fetching NFL state: {e}")
+        state = None
+
+    if state:
+        NFLState.objects.update_or_create(
+            pk=1,
+            defaults={
+                'season': str(state.get('season')),
+                'week': state.get('week') or 0,
+                'data': state,
+                'fetched_at': timezone.now(),
+            }
+        )
+        return state
+
+    if cached:
+        logger.warning(f"Using stale NFL state from {cached.fetched_at}")
+        return cached.data
+
+    logger.warning("NFL state unavailable, falling back to the local season calendar")
+    return calendar_state()
+
+
+def calendar_state(today=None):
+    """Approximate Sleeper's NFL state from SEASON_CALENDAR."""
+    today = today or timezone.localdate()
+    started = [season for season, week_one in SEASON_CALENDAR.items() if week_one <= today]
+    season = max(started) if started else min(SEASON_CALENDAR)
+    week = (today - SEASON_CALENDAR[season]).days // 7 + 1
+    week = max(1, min(week, REGULAR_SEASON_WEEKS))
+    return {
+        'season': str(season),
+        'season_type': 'regular',
+        'week': week,
+        'display_week': week,
+    }
+
+
+def fetch_current_nfl_week():
+    """Return the current NFL week number."""
+    return get_nfl_state()['week']
+
+
+def get_current_season():
+    """Return the current NFL season as an int, e.g. 2024."""
+    return int(get_nfl_state()['season'])
+
+
+@contextmanager
+def pinned_nfl_state():
+    """Serve the same NFL state for the whole block, however long it runs."""
+    state = get_nfl_state()
+    with _cache_lock:
+        _cache['state'] = state
+        _cache['expires_at'] = float('inf')
+    try:
+        yield state
+    finally:
+        with _cache_lock:
+            _cache['expires_at'] = time.monotonic() + settings.NFL_STATE_CACHE_TTL
+
+
+def clear_nfl_state_cache():
+    with _cache_lock:
+        _cache['state'] = None
+        _cache['expires_at'] = 0.0
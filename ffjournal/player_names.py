@@ -0,0 +1,96 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from .models import Player
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# FantasyPros abbreviations that differ from Sleeper's
+TEAM_ALIASES = {
+    'JAC': 'JAX',
+    'WSH': 'WAS',
+    'LA': 'LAR',
+    'OAK': 'LV',
+    'SD': 'LAC',
+    'STL': 'LAR',
+}
+
+POSITION_ALIASES = {
+    'DST': 'DEF',
+    'D/ST': 'DEF',
+    'PK': 'K',
+}
+
+
+def normalize_name(name):
+    """Lowercase ASCII name with punctuation and generational suffixes removed.
+
+    "Odell Beckham Jr." and "odell beckham", or "Ja'Marr Chase" and
+    "JaMarr Chase", normalize to the same key.
+    """
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    # Apostrophes and periods join ("d'andre" -> "dandre", "a.j." -> "aj"); hyphens split
+    name = re.sub(r"['.`]", '', name)
+    name = re.sub(r'[^a-z0-9]+', ' ', name)
+    tokens = name.split()
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def normalize_team(team):
+    team = (team or '').upper()
+    return TEAM_ALIASES.get(team, team)
+
+
+def normalize_position(position):
+    position = (position or '').upper()
+    return POSITION_ALIASES.get(position, position)
+
+
+class PlayerNameIndex:
+    """In-memory lookup of Player primary keys by normalized name, team and position.
+
+    Built with a single query. `match` tries the exact name/team/position
+    key first, then falls back to name/position (players who changed teams)
+    and finally name alone, accepting a fallback only when it is unambiguous.
+    """
+
+    def __init__(self, rows):
+        self.by_name_team_position = {}
+        self.by_name_position = defaultdict(set)
+        self.by_name = defaultdict(set)
+        for pk, full_name, team, position in rows:
+            name = normalize_name(full_name)
+            if not name:
+                continue
+            position = normalize_position(position)
+            self.by_name_team_position.setdefault((name, normalize_team(team), position), pk)
+            self.by_name_position[(name, position)].add(pk)
+            self.by_name[name].add(pk)
+
+    @classmethod
+    def build(cls):
+        return cls(Player.objects.values_list('pk', 'full_name', 'team', 'position'))
+
+    def match(self, name, team, position):
+        """Return (pk, rule) for the best match, or (None, None)."""
+        name = normalize_name(name)
+        position = normalize_position(position)
+
+        pk = self.by_name_team_position.get((name, normalize_team(team), position))
+        if pk is not None:
+            return pk, 'exact'
+
+        candidates = self.by_name_position.get((name, position), ())
+        if len(candidates) == 1:
+            return next(iter(candidates)), 'team changed'
+
+        candidates = self.by_name.get(name, ())
+        if len(candidates) == 1:
+            return next(iter(candidates)), 'name only'
+
+        return None, None
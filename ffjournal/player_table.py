@@ -0,0 +1,110 @@
+import logging
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PLAYER_CARD_FIELDS, DatasetVersion, Player
+
+logger = logging.getLogger(__name__)
+
+PLAYERS_DATASET = 'players'
+
+
+class PlayerCard:
+    """Read-only, slotted copy of the Player columns the generators use."""
+
+    __slots__ = PLAYER_CARD_FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(PLAYER_CARD_FIELDS, values):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PlayerCard is read-only")
+
+    @property
+    def primary_position(self):
+        return self.fantasy_positions[0] if self.fantasy_positions else self.position
+
+    def __repr__(self):
+        return f"<PlayerCard {self.player_id} {self.full_name}>"
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def build_card(row):
+    """PlayerCard from a values_list row in PLAYER_CARD_FIELDS order.
+
+    Positions, teams and injury labels repeat across thousands of players,
+    so they are interned and shared instead of stored once per player.
+    """
+    values = dict(zip(PLAYER_CARD_FIELDS, row))
+    fantasy_positions = values['fantasy_positions']
+    values['fantasy_positions'] = tuple(_intern(position) for position in fantasy_positions) if fantasy_positions else ()
+    for field in ('position', 'team', 'injury_status', 'injury_body_part'):
+        values[field] = _intern(values[field])
+    return PlayerCard(*(values[field] for field in PLAYER_CARD_FIELDS))
+
+
+def current_version(name=PLAYERS_DATASET):
+    return DatasetVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def bump_version(name=PLAYERS_DATASET):
+    """Mark a dataset as changed so every process reloads its copy on the next check."""
+    DatasetVersion.objects.get_or_create(name=name)
+    DatasetVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+_table = {'cards': None, 'version': None, 'checked_at': 0.0}
+_table_lock = threading.Lock()
+
+
+def get_player_table():
+    """{player_id: PlayerCard} for every player, loaded once per process.
+
+    The DatasetVersion stamp is checked at most every
+    PLAYER_TABLE_CHECK_INTERVAL seconds; the table is reloaded only when
+    fetch_players has bumped it since the last load.
+    """
+    if _table['cards'] is not None and time.monotonic() - _table['checked_at'] < settings.PLAYER_TABLE_CHECK_INTERVAL:
+        return _table['cards']
+
+    with _table_lock:
+        # Another thread may have checked while we waited
+        if _table['cards'] is not None and time.monotonic() - _table['checked_at'] < settings.PLAYER_TABLE_CHECK_INTERVAL:
+            return _table['cards']
+
+        version = current_version()
+        if _table['cards'] is None or version != _table['version']:
+            start = time.perf_counter()
+            _table['cards'] = {
+                row[0]: build_card(row) for row in Player.objects.values_list(*PLAYER_CARD_FIELDS).iterator(chunk_size=2000)
+            }
+            _table['version'] = version
+            logger.info(f"Loaded {len(_table['cards'])} players (version {version}) in {time.perf_counter() - start:.2f}s")
+        _table['checked_at'] = time.monotonic()
+        return _table['cards']
+
+
+def get_player(player_id):
+    return get_player_table().get(str(player_id))
+
+
+def get_players(player_ids):
+    """{player_id: PlayerCard} for the ids that exist."""
+    table = get_player_table()
+    return {str(player_id): table[str(player_id)] for player_id in player_ids if str(player_id) in table}
+
+
+def clear_player_table():
+    with _table_lock:
+        _table['cards'] = None
+        _table['version'] = None
+        _table['checked_at'] = 0.0
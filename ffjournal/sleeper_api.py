@@ -1,25 +1,38 @@
-import requests
-from .models import League, Roster, Team, Matchup, Event, generate_default_owner_id
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from django.conf import settings
+from django.db import connection, transaction
+from .bulk import bulk_upsert
+from .nfl_state import fetch_current_nfl_week
+from .models import DraftPick, League, LeagueSyncState, Roster, Team, Matchup, Event, generate_default_owner_id
+from .sleeper_client import get_client
 import json
 import logging
 
 # Configure logging
 logging.basicConfig(filename='detailed_comparison.log', level=logging.INFO, format='%(asctime)s - %(message)s')
 
-def fetch_league_data(league_id: str, owner=None):
-    url = f"https://api.sleeper.app/v1/league/{league_id}"
-    response = requests.get(url)
-    
-    if response.status_code != 200:
-        logging.error(f"Failed to fetch league data. Status code: {response.status_code}, Response: {response.text}")
-        return None
+# Natural keys backing the unique constraints used for upserts
+ROSTER_UNIQUE_FIELDS = ['sleeper_league_id', 'roster_id']
+MATCHUP_UNIQUE_FIELDS = ['sleeper_league_id', 'week', 'matchup_id', 'roster_id']
+TEAM_UNIQUE_FIELDS = ['sleeper_league_id', 'sleeper_user_id']
+TEAM_UPDATE_FIELDS = ['display_name', 'avatar', 'team_name', 'is_owner', 'is_team_owner', 'is_co_owner']
+EVENT_UNIQUE_FIELDS = ['transaction_id']
+EVENT_UPDATE_FIELDS = [
+    'sleeper_league_id', 'type', 'status', 'settings', 'event_metadata', 'created', 'leg', 'draft_picks',
+    'creator', 'consenter_ids', 'roster_ids', 'adds', 'drops', 'waiver_budget', 'status_updated'
+]
 
-    league_data = response.json()
+def fetch_league_data(league_id: str, owner=None):
+    league_data = get_client().get(f"league/{league_id}")
     
     if not league_data:
         logging.error(f"Received empty response for league_id: {league_id}")
         return None
 
+    return save_league_data(league_id, league_data, owner=owner)
+
+def save_league_data(league_id: str, league_data, owner=None):
     # Try to get existing league
     existing_league = League.objects.filter(sleeper_league_id=league_id).first()
 
@@ -68,235 +81,399 @@ def fetch_league_data(league_id: str, owner=None):
 
 
 def fetch_roster_data(league_id: str):
-    url = f"https://api.sleeper.app/v1/league/{league_id}/rosters"
-    response = requests.get(url)
+    rosters_data = get_client().get(f"league/{league_id}/rosters")
     
-    if response.status_code == 200:
-        rosters_data = response.json()
-        
-        for roster in rosters_data:
-            roster_dict = {
-                'sleeper_league_id_id': league_id,  # Use '_id' suffix because it's a ForeignKey field
-                'roster_id': roster.get('roster_id'),
-                'owner_id': roster.get('owner_id') or generate_default_owner_id(),
-                'co_owners': roster.get('co_owners'),
-                'keepers': roster.get('keepers'),
-                'players': roster.get('players'),
-                'starters': roster.get('starters')
-            }
-            
-            existing_roster = Roster.objects.filter(
-                sleeper_league_id=league_id,
-                roster_id=roster_dict['roster_id']
-            ).first()
-            
-            if existing_roster:
-                for key, value in roster_dict.items():
-                    setattr(existing_roster, key, value)
-                existing_roster.save()
-            else:
-                Roster.objects.create(**roster_dict)
-
-def fetch_team_data(league_id: str):
-    logging.info(f"==== Starting fetch_team_data for league ID {league_id} ====")
-    
-    url = f"https://api.sleeper.app/v1/league/{league_id}/users"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        users_data = response.json()
-        
-        # Fetch existing teams for the league
-        existing_teams = Team.objects.filter(sleeper_league_id=league_id)
-        existing_team_dict = {team.sleeper_user_id: team for team in existing_teams}
-        
-        # Fetch all rosters for the league
-        rosters = Roster.objects.filter(sleeper_league_id=league_id)
-        roster_dict = {roster.owner_id: roster for roster in rosters}
-        
-        # Create a set of all sleeper_user_ids for comparison
-        all_user_ids = set(existing_team_dict.keys())
-        
-        # Process each user returned by the API
-        for user in users_data:
-            team_dict = {
-                'sleeper_user_id': user.get('user_id'),
-                'display_name': user.get('display_name'),
-                'avatar': user.get('metadata', {}).get('avatar'),
-                'team_name': user.get('metadata', {}).get('team_name'),
-                'is_owner': user.get('is_owner', False),
-                'sleeper_league_id_id': league_id,  # ForeignKey requires _id
-                'is_team_owner': False,
-                'is_co_owner': False
-            }
-            
-            # Determine if the user is a team owner or co-owner
-            roster = roster_dict.get(team_dict['sleeper_user_id'])
-            if roster:
-                team_dict['is_team_owner'] = True
-                co_owners = roster.co_owners or []
-                if isinstance(co_owners, str):
-                    co_owners = json.loads(co_owners)  # Parse the JSON string into a Python list
-                
-                # Debugging logs for co-owner check
-                logging.info(f"Checking co-owners for team: {team_dict['sleeper_user_id']}, co_owners: {co_owners}")
-
-                for co_owner in co_owners:
-                    if str(co_owner) in all_user_ids:
-                        team_dict['is_co_owner'] = True
-                        logging.info(f"User {team_dict['sleeper_user_id']} is a co-owner.")
-                        break  # Exit loop once a match is found
-                else:
-                    logging.info(f"User {team_dict['sleeper_user_id']} is NOT a co-owner.")
-            
-            # Update existing team or create a new one
-            existing_team = existing_team_dict.get(team_dict['sleeper_user_id'])
-            if existing_team:
-                for key, value in team_dict.items():
-                    setattr(existing_team, key, value)
-                existing_team.save()
-                logging.info(f"Updated existing team: {team_dict['sleeper_user_id']} in league {league_id}")
-            else:
-                Team.objects.create(**team_dict)
-                logging.info(f"Created new team: {team_dict['sleeper_user_id']} in league {league_id}")
-        
-        # Update team names for teams with null names and who are team owners
-        teams_to_update = Team.objects.filter(
-            sleeper_league_id=league_id,
-            team_name__isnull=True,
-            is_team_owner=True
+    if rosters_data is not None:
+        save_roster_data(league_id, rosters_data)
+
+def save_roster_data(league_id: str, rosters_data):
+    rosters = [
+        Roster(
+            sleeper_league_id_id=league_id,  # Use '_id' suffix because it's a ForeignKey field
+            roster_id=roster.get('roster_id'),
+            owner_id=roster.get('owner_id') or generate_default_owner_id(),
+            co_owners=roster.get('co_owners'),
+            keepers=roster.get('keepers'),
+            players=roster.get('players'),
+            starters=roster.get('starters'),
         )
-        
-        for team in teams_to_update:
-            team.team_name = f"Team {team.display_name}"
-            team.save()
-            logging.info(f"Updated team name: user_id={team.sleeper_user_id}, new_name='{team.team_name}'")
-        
-        logging.info(f"Updated team names for {len(teams_to_update)} teams in league ID {league_id}")
-        
-        # Verify the updates
-        verified_teams = Team.objects.filter(sleeper_league_id=league_id)
-        for team in verified_teams:
-            logging.info(f"Verified team: user_id={team.sleeper_user_id}, name='{team.team_name}', is_owner={team.is_team_owner}")
-
-        logging.info(f"==== Completed fetch_team_data for league ID {league_id} ====")
-
-        # Log any remaining teams with null names
-        null_name_teams = Team.objects.filter(
-            sleeper_league_id=league_id,
-            team_name__isnull=True,
-            is_team_owner=True
+        for roster in rosters_data
+    ]
+    bulk_upsert(
+        Roster,
+        rosters,
+        unique_fields=ROSTER_UNIQUE_FIELDS,
+        update_fields=['owner_id', 'co_owners', 'keepers', 'players', 'starters'],
+    )
+
+def fetch_team_data(league_id: str, verify=None):
+    users_data = get_client().get(f"league/{league_id}/users")
+    
+    if users_data is not None:
+        save_team_data(league_id, users_data, verify=verify)
+
+def parse_co_owners(co_owners):
+    """Roster.co_owners as a list of user ids; older rows stored it as a JSON string."""
+    if isinstance(co_owners, str):
+        co_owners = json.loads(co_owners)
+    return [str(user_id) for user_id in co_owners or []]
+
+def save_team_data(league_id: str, users_data, verify=None):
+    """Reconcile a league's users into Teams in one pass and one upsert.
+
+    A user is a team owner if they own a roster and a co-owner if they are
+    listed in any roster's co_owners. Owners without a team name fall back
+    to "Team <display name>". Set `verify` (or SLEEPER_VERIFY_TEAM_SYNC)
+    to log the stored teams afterwards.
+    """
+    roster_owner_ids = set()
+    co_owner_ids = set()
+    for owner_id, co_owners in Roster.objects.filter(sleeper_league_id=league_id).values_list('owner_id', 'co_owners'):
+        roster_owner_ids.add(owner_id)
+        co_owner_ids.update(parse_co_owners(co_owners))
+
+    teams = {}
+    for user in users_data:
+        user_id = user.get('user_id')
+        metadata = user.get('metadata') or {}
+        is_team_owner = user_id in roster_owner_ids
+        team_name = metadata.get('team_name')
+        if team_name is None and is_team_owner:
+            team_name = f"Team {user.get('display_name')}"
+
+        teams[user_id] = Team(
+            sleeper_league_id_id=league_id,  # ForeignKey requires _id
+            sleeper_user_id=user_id,
+            display_name=user.get('display_name'),
+            avatar=metadata.get('avatar'),
+            team_name=team_name,
+            is_owner=user.get('is_owner', False),
+            is_team_owner=is_team_owner,
+            is_co_owner=user_id in co_owner_ids,
         )
-        
-        if null_name_teams.exists():
-            logging.warning(f"Found {null_name_teams.count()} teams still with null names in league ID {league_id}")
-            for team in null_name_teams:
-                logging.warning(f"Null name team: user_id={team.sleeper_user_id}, display_name='{team.display_name}', is_owner={team.is_team_owner}")
-        else:
-            logging.info(f"No teams with null names remaining in league ID {league_id}")
 
+    written = bulk_upsert(Team, list(teams.values()), TEAM_UNIQUE_FIELDS, TEAM_UPDATE_FIELDS)
+    logging.info(f"Synced {written} teams for league {league_id} ({len(co_owner_ids & teams.keys())} co-owners)")
+
+    if settings.SLEEPER_VERIFY_TEAM_SYNC if verify is None else verify:
+        verify_team_data(league_id)
+
+def verify_team_data(league_id: str):
+    """Debug helper: log every stored team and flag owners still missing a name."""
+    null_names = 0
+    for team in Team.objects.filter(sleeper_league_id=league_id).order_by('sleeper_user_id'):
+        logging.info(f"Verified team: user_id={team.sleeper_user_id}, name='{team.team_name}', is_owner={team.is_team_owner}, is_co_owner={team.is_co_owner}")
+        if team.team_name is None and team.is_team_owner:
+            null_names += 1
+            logging.warning(f"Null name team: user_id={team.sleeper_user_id}, display_name='{team.display_name}'")
+    if null_names:
+        logging.warning(f"Found {null_names} teams still with null names in league ID {league_id}")
 
 def fetch_matchup_data(league_id: str, week: int):
-    url = f"https://api.sleeper.app/v1/league/{league_id}/matchups/{week}"
-    response = requests.get(url)
+    matchups_data = get_client().get(f"league/{league_id}/matchups/{week}")
     
-    if response.status_code == 200:
-        matchups_data = response.json()
-        
-        grouped_matchups = {}
-        for matchup in matchups_data:
-            matchup_id = matchup.get('matchup_id')
-            if matchup_id not in grouped_matchups:
-                grouped_matchups[matchup_id] = []
-            grouped_matchups[matchup_id].append(matchup)
-        
-        for matchup_id, matchups in grouped_matchups.items():
-            for matchup in matchups:
-                matchup_dict = {
-                    'sleeper_league_id_id': league_id,
-                    'matchup_id': matchup_id,
-                    'roster_id': matchup.get('roster_id'),
-                    'points': matchup.get('points'),
-                    'custom_points': matchup.get('custom_points'),
-                    'week': week,
-                    'players': matchup.get('players'),
-                    'starters': matchup.get('starters'),
-                    'starters_points': matchup.get('starters_points'),
-                    'players_points': matchup.get('players_points')
-                }
-                
-                existing_matchup = Matchup.objects.filter(
-                    sleeper_league_id=league_id,
-                    matchup_id=matchup_id,
-                    roster_id=matchup_dict['roster_id'],
-                    week=week
-                ).first()
-                
-                if existing_matchup:
-                    for key, value in matchup_dict.items():
-                        setattr(existing_matchup, key, value)
-                    existing_matchup.save()
-                else:
-                    Matchup.objects.create(**matchup_dict)
-
-def fetch_all_matchup_data(league_id: str):
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
+    if matchups_data is not None:
+        save_matchup_data(league_id, week, matchups_data)
+
+def save_matchup_data(league_id: str, week: int, matchups_data):
+    matchups = [
+        Matchup(
+            sleeper_league_id_id=league_id,
+            matchup_id=matchup.get('matchup_id'),
+            roster_id=matchup.get('roster_id'),
+            points=matchup.get('points'),
+            custom_points=matchup.get('custom_points'),
+            week=week,
+            players=matchup.get('players'),
+            starters=matchup.get('starters'),
+            starters_points=matchup.get('starters_points'),
+            players_points=matchup.get('players_points'),
+        )
+        for matchup in matchups_data
+    ]
+    bulk_upsert(
+        Matchup,
+        matchups,
+        unique_fields=MATCHUP_UNIQUE_FIELDS,
+        update_fields=['points', 'custom_points', 'players', 'starters', 'starters_points', 'players_points'],
+    )
+
+def matchup_weeks_to_sync(sync_state, current_week: int, full: bool = False):
+    """Weeks up to `current_week` whose matchups still need fetching."""
+    finalized_weeks = set() if full or sync_state is None else set(sync_state.finalized_matchup_weeks)
+    return [week for week in range(1, current_week + 1) if week not in finalized_weeks]
+
+def apply_matchup_data(league_id: str, current_week: int, matchups_by_week):
+    """Write fetched matchup weeks and mark the ones old enough as finalized. Returns the weeks written."""
+    sync_state, _ = LeagueSyncState.objects.get_or_create(sleeper_league_id_id=league_id)
+    synced_weeks = []
+    for week, matchups_data in sorted(matchups_by_week.items()):
+        if matchups_data is not None:
+            save_matchup_data(league_id, week, matchups_data)
+            synced_weeks.append(week)
     
-    if response.status_code == 200:
-        nfl_state = response.json()
-        current_week = nfl_state['week']
-        
-        for week in range(1, current_week + 1):
-            fetch_matchup_data(league_id, week)
+    # A week is final once it is far enough behind the current week for stat corrections to have landed
+    last_final_week = current_week - 1 - settings.SLEEPER_FINALIZED_WEEK_LAG
+    newly_finalized = {week for week in synced_weeks if week <= last_final_week}
+    if newly_finalized:
+        sync_state.finalized_matchup_weeks = sorted(set(sync_state.finalized_matchup_weeks) | newly_finalized)
+        sync_state.save(update_fields=['finalized_matchup_weeks', 'updated_at'])
+    return synced_weeks
 
-def fetch_transactions_data_for_week(league_id: str, week: int):
-    url = f"https://api.sleeper.app/v1/league/{league_id}/transactions/{week}"
-    response = requests.get(url)
+def fetch_all_matchup_data(league_id: str, full: bool = False):
+    """Sync matchups for every week that is not yet final.
+
+    Weeks recorded as finalized in the league's LeagueSyncState are skipped
+    unless `full` is set, which re-fetches the whole season (for backfills).
+    """
+    client = get_client()
+    current_week = fetch_current_nfl_week()
     
-    if response.status_code == 200:
-        transactions_data = response.json()
+    if current_week:
+        sync_state = LeagueSyncState.objects.filter(sleeper_league_id_id=league_id).first()
+        weeks = matchup_weeks_to_sync(sync_state, current_week, full)
         
-        for transaction in transactions_data:
-            event_dict = {
-                'sleeper_league_id_id': league_id,  # Use '_id' suffix because it's a ForeignKey field
-                'transaction_id': transaction['transaction_id'],
-                'type': transaction['type'],
-                'status': transaction['status'],
-                'settings': transaction.get('settings'),
-                'event_metadata': transaction.get('metadata'),
-                'created': transaction['created'],
-                'leg': transaction['leg'],
-                'draft_picks': transaction.get('draft_picks', []),
-                'creator': transaction['creator'],
-                'consenter_ids': transaction['consenter_ids'],
-                'roster_ids': transaction['roster_ids'],
-                'adds': transaction.get('adds'),
-                'drops': transaction.get('drops'),
-                'waiver_budget': transaction.get('waiver_budget', []),
-                'status_updated': transaction['status_updated']
-            }
-            
-            existing_event = Event.objects.filter(transaction_id=transaction['transaction_id']).first()
-            
-            if existing_event:
-                for key, value in event_dict.items():
-                    setattr(existing_event, key, value)
-                existing_event.save()
-                logging.info(f"Updated existing event: {transaction['transaction_id']}")
-            else:
-                Event.objects.create(**event_dict)
-                logging.info(f"Created new event: {transaction['transaction_id']}")
-
-def fetch_all_transactions_data(league_id: str):
-    url = "https://api.sleeper.app/v1/state/nfl"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        nfl_state = response.json()
-        current_week = nfl_state['week']
+        # Fetch the open weeks concurrently, then write them one after another
+        results = client.get_many(f"league/{league_id}/matchups/{week}" for week in weeks)
+        synced_weeks = apply_matchup_data(league_id, current_week, dict(zip(weeks, results)))
         
-        for week in range(1, current_week + 1):
-            fetch_transactions_data_for_week(league_id, week)
-    else:
-        logging.error(f"Failed to fetch NFL state. Status code: {response.status_code}")
+        logging.info(f"Synced matchups for league {league_id}: weeks {synced_weeks}, {current_week - len(weeks)} finalized weeks skipped")
+
+def fetch_transactions_data_for_week(league_id: str, week: int):
+    transactions_data = get_client().get(f"league/{league_id}/transactions/{week}")
+    
+    if transactions_data is not None:
+        save_transactions_data(league_id, transactions_data)
+
+def build_event(league_id: str, transaction):
+    return Event(
+        sleeper_league_id_id=league_id,  # Use '_id' suffix because it's a ForeignKey field
+        transaction_id=transaction['transaction_id'],
+        type=transaction['type'],
+        status=transaction['status'],
+        settings=transaction.get('settings'),
+        event_metadata=transaction.get('metadata'),
+        created=transaction['created'],
+        leg=transaction['leg'],
+        draft_picks=transaction.get('draft_picks', []),
+        creator=transaction['creator'],
+        consenter_ids=transaction['consenter_ids'],
+        roster_ids=transaction['roster_ids'],
+        adds=transaction.get('adds'),
+        drops=transaction.get('drops'),
+        waiver_budget=transaction.get('waiver_budget', []),
+        status_updated=transaction['status_updated']
+    )
+
+def save_transactions_data(league_id: str, transactions_data):
+    """Upsert a batch of Sleeper transactions as Events in one statement per batch."""
+    events = {transaction['transaction_id']: build_event(league_id, transaction) for transaction in transactions_data}
+    return bulk_upsert(Event, list(events.values()), EVENT_UNIQUE_FIELDS, EVENT_UPDATE_FIELDS)
+
+def transaction_weeks_to_sync(sync_state, current_week: int, full: bool = False):
+    """Weeks up to `current_week` whose transactions still need polling."""
+    closed_weeks = set() if full or sync_state is None else set(sync_state.closed_transaction_weeks)
+    return [week for week in range(1, current_week + 1) if week not in closed_weeks]
+
+def apply_transactions_data(league_id: str, current_week: int, transactions_by_week, full: bool = False):
+    """Upsert transactions newer than each week's watermark and advance the watermarks.
+
+    With `full` the watermarks are ignored and every event is rewritten.
+    Returns the number of events written.
+    """
+    sync_state, _ = LeagueSyncState.objects.get_or_create(sleeper_league_id_id=league_id)
+    watermarks = dict(sync_state.transaction_watermarks)
+    changed = []
+    polled_weeks = []
+    for week, transactions_data in sorted(transactions_by_week.items()):
+        if transactions_data is None:
+            continue
+        polled_weeks.append(week)
+        watermark = 0 if full else watermarks.get(str(week), 0)
+        fresh = [transaction for transaction in transactions_data if transaction['status_updated'] > watermark]
+        if fresh:
+            changed.extend(fresh)
+            watermarks[str(week)] = max(watermarks.get(str(week), 0), *(transaction['status_updated'] for transaction in fresh))
+
+    written = save_transactions_data(league_id, changed)
+
+    # Waivers and trades for a week settle on the same schedule as its matchups
+    last_closed_week = current_week - 1 - settings.SLEEPER_FINALIZED_WEEK_LAG
+    closed = set(sync_state.closed_transaction_weeks) | {week for week in polled_weeks if week <= last_closed_week}
+    if watermarks != sync_state.transaction_watermarks or closed != set(sync_state.closed_transaction_weeks):
+        sync_state.transaction_watermarks = watermarks
+        sync_state.closed_transaction_weeks = sorted(closed)
+        sync_state.save(update_fields=['transaction_watermarks', 'closed_transaction_weeks', 'updated_at'])
+    return written
+
+def fetch_all_transactions_data(league_id: str, full: bool = False):
+    """Sync transactions, writing only events newer than each week's watermark.
+
+    The latest `status_updated` written for each week is kept in the league's
+    LeagueSyncState. Closed weeks are not requested again unless `full` is
+    set, which also ignores the watermarks and rewrites every event.
+    """
+    client = get_client()
+    current_week = fetch_current_nfl_week()
+    if not current_week:
+        return
+
+    sync_state = LeagueSyncState.objects.filter(sleeper_league_id_id=league_id).first()
+    weeks = transaction_weeks_to_sync(sync_state, current_week, full)
+    results = client.get_many(f"league/{league_id}/transactions/{week}" for week in weeks)
+    written = apply_transactions_data(league_id, current_week, dict(zip(weeks, results)), full=full)
+
+    logging.info(f"Synced transactions for league {league_id}: {written} events written from weeks {weeks}, {current_week - len(weeks)} closed weeks skipped")
+
+# League statuses in which the draft is over and its picks are final
+DRAFT_COMPLETE_STATUSES = ('in_season', 'post_season', 'complete')
+
+def draft_to_sync(draft_id, league_status, sync_state):
+    """`draft_id` if the draft is over and its picks are not stored yet, else None."""
+    if not draft_id or league_status not in DRAFT_COMPLETE_STATUSES:
+        return None
+    if sync_state is not None and sync_state.synced_draft_id == draft_id:
+        return None
+    return draft_id
+
+def save_draft_picks(league_id: str, draft_id: str, picks_data):
+    """Store a completed draft's picks once and mark the draft as synced so it is never fetched again."""
+    picks = [
+        DraftPick(
+            sleeper_league_id_id=league_id,
+            draft_id=draft_id,
+            pick_no=pick['pick_no'],
+            round=pick['round'],
+            draft_slot=pick['draft_slot'],
+            roster_id=int(pick['roster_id']) if pick.get('roster_id') is not None else None,
+            player_id=str(pick['player_id']),
+            picked_by=pick.get('picked_by') or None,
+            position=(pick.get('metadata') or {}).get('position') or None,
+            team=(pick.get('metadata') or {}).get('team') or None,
+            is_keeper=bool(pick.get('is_keeper')),
+        )
+        for pick in picks_data
+        if pick.get('player_id')
+    ]
+    DraftPick.objects.bulk_create(picks, ignore_conflicts=True)
+    LeagueSyncState.objects.update_or_create(sleeper_league_id_id=league_id, defaults={'synced_draft_id': draft_id})
+    return len(picks)
+
+@dataclass
+class LeagueSnapshot:
+    """Everything fetched from Sleeper for one league refresh, before any of it is written."""
+    league_id: str
+    league_data: dict
+    full: bool = False
+    current_week: int = 0
+    rosters: list = None
+    users: list = None
+    matchups: dict = field(default_factory=dict)  # Week -> matchup rows (None if the request failed)
+    transactions: dict = field(default_factory=dict)  # Week -> transactions (None if the request failed)
+    draft_id: str = None  # Set when the draft's picks were fetched in this snapshot
+    draft_picks: list = None
+
+    @property
+    def is_complete(self):
+        return self.league_data.get('status') == 'complete'
+
+def fetch_league_snapshot(league_id: str, full: bool = False, history: bool = True):
+    """Fetch phase of a refresh: every request the league needs, with no writes and no open transaction.
+
+    With `history=False` only the league, rosters and users are fetched;
+    matchups and transactions are left for a later backfill.
+    """
+    client = get_client()
+    league_data = client.get(f"league/{league_id}")
+    if not league_data:
+        raise ValueError(f"Could not fetch league {league_id} from Sleeper")
+
+    snapshot = LeagueSnapshot(league_id=league_id, league_data=league_data, full=full)
+    if snapshot.is_complete:
+        return snapshot
+
+    if not history:
+        snapshot.rosters, snapshot.users = client.get_many([f"league/{league_id}/rosters", f"league/{league_id}/users"])
+        return snapshot
+
+    snapshot.current_week = fetch_current_nfl_week() or 0
+    sync_state = LeagueSyncState.objects.filter(sleeper_league_id_id=league_id).first()
+    matchup_weeks = matchup_weeks_to_sync(sync_state, snapshot.current_week, full)
+    transaction_weeks = transaction_weeks_to_sync(sync_state, snapshot.current_week, full)
+    draft_id = draft_to_sync(league_data.get('draft_id'), league_data.get('status'), sync_state)
+
+    # One concurrent batch for the whole league
+    paths = [f"league/{league_id}/rosters", f"league/{league_id}/users"]
+    paths += [f"league/{league_id}/matchups/{week}" for week in matchup_weeks]
+    paths += [f"league/{league_id}/transactions/{week}" for week in transaction_weeks]
+    if draft_id:
+        paths.append(f"draft/{draft_id}/picks")
+    results = client.get_many(paths)
+
+    snapshot.rosters, snapshot.users = results[0], results[1]
+    snapshot.matchups = dict(zip(matchup_weeks, results[2:2 + len(matchup_weeks)]))
+    snapshot.transactions = dict(zip(transaction_weeks, results[2 + len(matchup_weeks):2 + len(matchup_weeks) + len(transaction_weeks)]))
+    if draft_id and results[-1] is not None:
+        snapshot.draft_id, snapshot.draft_picks = draft_id, results[-1]
+    return snapshot
+
+def apply_league_snapshot(snapshot: LeagueSnapshot, owner=None):
+    """Apply phase of a refresh: write a fetched snapshot in one short transaction."""
+    league_id = snapshot.league_id
+    with transaction.atomic():
+        league = save_league_data(league_id, snapshot.league_data, owner=owner)
+        if snapshot.is_complete:
+            return league
+
+        if snapshot.rosters is not None:
+            save_roster_data(league_id, snapshot.rosters)
+        if snapshot.users is not None:
+            save_team_data(league_id, snapshot.users)
+        if snapshot.draft_picks is not None:
+            save_draft_picks(league_id, snapshot.draft_id, snapshot.draft_picks)
+        if snapshot.current_week:
+            synced_weeks = apply_matchup_data(league_id, snapshot.current_week, snapshot.matchups)
+            written = apply_transactions_data(league_id, snapshot.current_week, snapshot.transactions, full=snapshot.full)
+            logging.info(f"Applied snapshot for league {league_id}: matchup weeks {synced_weeks}, {written} events written")
+    return league
+
+def refresh_league(league_id: str, full: bool = False, owner=None):
+    """Refresh a league and, unless it is complete, its rosters, teams, matchups and transactions.
+
+    All network requests happen first, outside any transaction; the writes
+    then run in one short transaction. Pass `full=True` to re-fetch weeks
+    that were already finalized.
+    """
+    snapshot = fetch_league_snapshot(league_id, full=full)
+    return apply_league_snapshot(snapshot, owner=owner)
+
+def refresh_leagues(leagues, max_workers=None, full=False, on_result=None):
+    """Refresh many leagues concurrently.
+
+    Returns a list of (league, error) tuples in the same order as `leagues`,
+    where error is None for leagues that refreshed successfully. `on_result`
+    is called with each (league, error) pair, in order, from the calling thread.
+    """
+    leagues = list(leagues)
+    if not leagues:
+        return []
+
+    def refresh(league):
+        try:
+            refresh_league(league.sleeper_league_id, full=full)
+            return league, None
+        except Exception as e:
+            logging.error(f"Error refreshing league {league.sleeper_league_id}: {e}")
+            return league, e
+        finally:
+            # Each worker thread holds its own DB connection
+            connection.close()
+
+    max_workers = max_workers or settings.SLEEPER_REFRESH_WORKERS
+    results = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(leagues))) as executor:
+        for result in executor.map(refresh, leagues):
+            results.append(result)
+            if on_result:
+                on_result(*result)
+    return results
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Seconds a response is served without touching the network, by URL path.
+# The first matching pattern wins; paths that match nothing are never cached.
+CACHE_TTLS = [
+    (r'/state/nfl$', 0),  # Cached separately by ffjournal.nfl_state
+    (r'/players/nfl$', 6 * 60 * 60),
+    (r'/league/\d+$', 15 * 60),
+    (r'/league/\d+/users$', 60 * 60),
+    (r'/league/\d+/rosters$', 2 * 60),
+    (r'/league/\d+/matchups/\d+$', 60),
+    (r'/league/\d+/transactions/\d+$', 60),
+    (r'/user/[^/]+$', 60 * 60),
+    (r'/(projections|stats)/nfl/', 10 * 60),
+]
+
+
+def ttl_for(url):
+    """Return the cache TTL for a URL, or 0 if it should not be cached."""
+    path = urlsplit(url).path
+    for pattern, ttl in CACHE_TTLS:
+        if re.search(pattern, path):
+            return ttl
+    return 0
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ResponseCache:
+    """On-disk, content-addressed cache of Sleeper response bodies.
+
+    Each cached URL has a small JSON entry under `entries/` (keyed by a hash
+    of the URL) that points at a body stored under `blobs/` by the sha256 of
+    its content, so identical responses share one file. Entries also keep
+    the ETag/Last-Modified validators for conditional revalidation.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.entries_dir = self.root / 'entries'
+        self.blobs_dir = self.root / 'blobs'
+
+    def _entry_path(self, url):
+        return self.entries_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _blob_path(self, digest):
+        return self.blobs_dir / digest[:2] / digest
+
+    def lookup(self, url):
+        """Return the entry for a URL, or None. Check `is_fresh` before trusting it."""
+        try:
+            entry = json.loads(self._entry_path(url).read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+        if not self._blob_path(entry['blob']).exists():
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return entry['expires_at'] > time.time()
+
+    def read(self, entry):
+        return self._blob_path(entry['blob']).read_bytes()
+
+    def store(self, url, body, headers, ttl):
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            _atomic_write(blob_path, body)
+
+        now = time.time()
+        entry = {
+            'url': url,
+            'blob': digest,
+            'size': len(body),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': now,
+            'expires_at': now + ttl,
+        }
+        _atomic_write(self._entry_path(url), json.dumps(entry).encode('utf-8'))
+        return entry
+
+    def revalidated(self, entry, ttl):
+        """Extend an entry after the server answered 304 Not Modified."""
+        entry = dict(entry, expires_at=time.time() + ttl)
+        _atomic_write(self._entry_path(entry['url']), json.dumps(entry).encode('utf-8'))
+        return entry
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def entries(self):
+        if not self.entries_dir.exists():
+            return
+        for path in sorted(self.entries_dir.glob('*.json')):
+            try:
+                yield json.loads(path.read_bytes())
+            except ValueError:
+                continue
+
+    def purge(self, match=None, expired_only=False):
+        """Delete matching entries and any blobs no longer referenced. Returns the number of entries removed."""
+        removed = 0
+        for entry in list(self.entries()):
+            if match and not re.search(match, entry['url']):
+                continue
+            if expired_only and self.is_fresh(entry):
+                continue
+            self._entry_path(entry['url']).unlink(missing_ok=True)
+            removed += 1
+
+        referenced = {entry['blob'] for entry in self.entries()}
+        if self.blobs_dir.exists():
+            for blob_path in self.blobs_dir.glob('*/*'):
+                if blob_path.name not in referenced:
+                    blob_path.unlink(missing_ok=True)
+        return removed
+
+    def stats(self):
+        entries = list(self.entries())
+        blobs = list(self.blobs_dir.glob('*/*')) if self.blobs_dir.exists() else []
+        return {
+            'entries': len(entries),
+            'fresh': sum(1 for entry in entries if self.is_fresh(entry)),
+            'blobs': len(blobs),
+            'bytes': sum(blob_path.stat().st_size for blob_path in blobs),
+        }
@@ -0,0 +1,207 @@
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from .sleeper_cache import ResponseCache, ttl_for
+from .sleeper_fixtures import SLEEPER_HOSTS, record_fixture
+from .sleeper_throttle import CircuitBreaker, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SleeperAPIError(Exception):
+    """Raised when a Sleeper request keeps failing after every retry."""
+
+
+class SleeperClient:
+    """Shared HTTP client for the Sleeper API.
+
+    Keeps a pooled keep-alive session and caps the number of requests in
+    flight across every thread using the client. When SLEEPER_CACHE_DIR is
+    set, responses are cached on disk (see ffjournal.sleeper_cache).
+
+    Every request shares one adaptive rate limiter and circuit breaker.
+    Timeouts, 429s and 5xx responses are retried with jittered exponential
+    backoff; once the retries run out a SleeperAPIError is raised.
+
+    SLEEPER_STANDIN_URL sends every Sleeper request to a local stand-in
+    server instead, and SLEEPER_RECORD_DIR saves each successful response
+    as a fixture the stand-in can replay (see the sleeper_standin command).
+    """
+
+    def __init__(self, base_url=None, max_concurrency=None, cache_dir=None):
+        self.base_url = (base_url or settings.SLEEPER_API_BASE_URL).rstrip('/')
+        self.max_concurrency = max_concurrency or settings.SLEEPER_MAX_CONCURRENCY
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        cache_dir = settings.SLEEPER_CACHE_DIR if cache_dir is None else cache_dir
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+
+        self.timeout = settings.SLEEPER_TIMEOUT
+        self.max_retries = settings.SLEEPER_MAX_RETRIES
+        self.limiter = TokenBucket(settings.SLEEPER_RATE_LIMIT)
+        self.breaker = CircuitBreaker(settings.SLEEPER_BREAKER_THRESHOLD, settings.SLEEPER_BREAKER_COOLDOWN)
+
+        self.standin_url = settings.SLEEPER_STANDIN_URL.rstrip('/')
+        self.record_dir = settings.SLEEPER_RECORD_DIR
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, path, params=None):
+        """Absolute URL for an API path (or a full URL), with `params` applied."""
+        if path.startswith('http://') or path.startswith('https://'):
+            url = path
+        else:
+            url = f"{self.base_url}/{path.lstrip('/')}"
+        if params:
+            url = requests.Request('GET', url, params=params).prepare().url
+        return url
+
+    def route(self, url):
+        """The URL actually requested for `url`: itself, or its stand-in server equivalent."""
+        parts = urlsplit(url)
+        if not self.standin_url or parts.netloc not in SLEEPER_HOSTS:
+            return url
+        return f"{self.standin_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _send(self, url, headers=None, stream=False):
+        """Send a GET through the rate limiter and breaker, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            probe = self.breaker.wait()
+            try:
+                self.limiter.acquire()
+                self._count('requests')
+                try:
+                    with self._slots:
+                        response = self.session.get(url, headers=headers, stream=stream, timeout=self.timeout)
+                except requests.RequestException as e:
+                    response, failure = None, repr(e)
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        self.breaker.record_success()
+                        self.limiter.record_success()
+                        return response
+                    failure = f"status {response.status_code}"
+
+                retry_after = None
+                if response is not None and response.status_code == 429:
+                    retry_after = self._retry_after(response)
+                    self.limiter.record_throttled(retry_after)
+                    if probe:
+                        # A throttled probe hasn't shown the upstream is healthy
+                        self.breaker.record_failure()
+                else:
+                    self.breaker.record_failure()
+                if response is not None:
+                    response.close()
+            finally:
+                if probe:
+                    # Whatever happened, the probe never leaves the breaker half-open
+                    self.breaker.release_probe()
+
+            if attempt < self.max_retries:
+                self._count('retries')
+                # Full jitter keeps parallel workers from retrying in lockstep
+                delay = retry_after or random.uniform(0, min(30, 0.5 * 2 ** attempt))
+                logger.warning(f"Sleeper request {url} failed ({failure}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+        raise SleeperAPIError(f"Sleeper request {url} failed after {self.max_retries + 1} attempts ({failure})")
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, path, params=None):
+        """GET a Sleeper endpoint and return the decoded JSON, or None on a non-200 response.
+
+        Raises SleeperAPIError if the request still fails after retrying.
+        """
+        url = self.url(path, params)
+        target = self.route(url)
+
+        ttl = ttl_for(target) if self.cache else 0
+        entry = self.cache.lookup(target) if ttl else None
+        if entry and self.cache.is_fresh(entry):
+            self._count('cache_hits')
+            return json.loads(self.cache.read(entry))
+
+        headers = self.cache.conditional_headers(entry) if entry else None
+        response = self._send(target, headers=headers)
+
+        if response.status_code == 304 and entry:
+            self.cache.revalidated(entry, ttl)
+            return json.loads(self.cache.read(entry))
+        if response.status_code != 200:
+            logger.error(f"Sleeper request failed: {target} Status code: {response.status_code}, Response: {response.text[:200]}")
+            return None
+        if ttl:
+            self.cache.store(target, response.content, response.headers, ttl)
+        if self.record_dir:
+            record_fixture(self.record_dir, url, response.content)
+        return response.json()
+
+    def get_stream(self, path, params=None):
+        """GET a Sleeper endpoint without reading the body, or None on a non-200 response.
+
+        The caller owns the returned response and should close it (use it as a
+        context manager) once `iter_content` has been consumed.
+        """
+        url = self.url(path, params)
+        target = self.route(url)
+        response = self._send(target, stream=True)
+
+        if response.status_code != 200:
+            logger.error(f"Sleeper request failed: {target} Status code: {response.status_code}, Response: {response.text[:200]}")
+            response.close()
+            return None
+        if self.record_dir:
+            # Recording reads the whole body; iter_content then replays it from memory
+            record_fixture(self.record_dir, url, response.content)
+        return response
+
+    def get_many(self, paths):
+        """Fetch several endpoints concurrently. Results come back in the order of `paths`."""
+        paths = list(paths)
+        if not paths:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(paths))) as executor:
+            return list(executor.map(self.get, paths))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide SleeperClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SleeperClient()
+    return _client
@@ -0,0 +1,26 @@
+import hashlib
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Hosts the app talks to; requests to them can be recorded and replayed
+SLEEPER_HOSTS = ('api.sleeper.app', 'api.sleeper.com')
+
+
+def fixture_path(root, url):
+    """File a response for `url` is recorded to and replayed from.
+
+    Laid out as <root>/<host>/<path>.json so fixtures are easy to browse;
+    a query string adds a short hash of itself to the file name.
+    """
+    parts = urlsplit(url)
+    name = parts.path.strip('/') or 'index'
+    if parts.query:
+        name += f"__{hashlib.sha256(parts.query.encode('utf-8')).hexdigest()[:12]}"
+    return Path(root) / parts.netloc / f"{name}.json"
+
+
+def record_fixture(root, url, body):
+    path = fixture_path(root, url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    return path
@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase / multiplicative-decrease.
+
+    Starts at `rate` requests per second. Each throttling response halves
+    the rate (down to `min_rate`) and can push every caller back by the
+    server's Retry-After; a second's worth of clean responses raises it by
+    one request per second again, up to the configured ceiling.
+    """
+
+    def __init__(self, rate, min_rate=1.0):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.tokens = self.max_rate
+        self.updated = time.monotonic()
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def record_success(self):
+        with self._lock:
+            self._successes += 1
+            if self.rate < self.max_rate and self._successes >= self.rate:
+                self.rate = min(self.max_rate, self.rate + 1)
+                self._successes = 0
+
+    def record_throttled(self, retry_after=None):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._successes = 0
+            # Going into debt holds every caller back until the server's window has passed
+            self.tokens = min(self.tokens, -(retry_after or 0) * self.rate)
+            logger.warning(f"Sleeper throttled us; rate limit lowered to {self.rate:.1f} req/s")
+
+
+class CircuitBreaker:
+    """Stops all callers while the upstream is failing.
+
+    After `threshold` consecutive failures the breaker opens and `wait`
+    blocks every thread for `cooldown` seconds. Then a single probe request
+    is let through: success closes the breaker, failure re-opens it. The
+    probe must call `release_probe` however it ends; a probe that never
+    reports back is replaced after `probe_timeout` seconds.
+    """
+
+    def __init__(self, threshold, cooldown, probe_timeout=None):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout or cooldown
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._condition = threading.Condition()
+
+    def wait(self):
+        """Block while the breaker is open; returns True if this caller is the half-open probe."""
+        with self._condition:
+            while True:
+                if self.state == 'closed':
+                    return False
+                now = time.monotonic()
+                if self.state == 'open':
+                    remaining = self.opened_at + self.cooldown - now
+                else:
+                    # A probe is in flight; if it has gone quiet for too long, take its place
+                    remaining = self.probe_started_at + self.probe_timeout - now
+                    if remaining <= 0:
+                        logger.warning("Sleeper circuit breaker probe never reported back; sending another")
+                if remaining <= 0:
+                    self.state = 'half_open'
+                    self.probe_started_at = now
+                    return True
+                self._condition.wait(remaining)
+
+    def release_probe(self):
+        """Called when a probe finishes; re-opens the breaker if the probe recorded no outcome."""
+        with self._condition:
+            if self.state == 'half_open':
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._condition.notify_all()
+
+    def record_success(self):
+        with self._condition:
+            self.failures = 0
+            if self.state != 'closed':
+                logger.info("Sleeper circuit breaker closed")
+                self.state = 'closed'
+                self._condition.notify_all()
+
+    def record_failure(self):
+        with self._condition:
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+                logger.error(f"Sleeper circuit breaker open for {self.cooldown}s after {self.failures} consecutive failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._condition.notify_all()
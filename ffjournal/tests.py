@@ -1,3 +1,51 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .sleeper_client import SleeperClient
+from .sleeper_throttle import CircuitBreaker, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+    def close(self):
+        pass
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_throttled_probe_reopens_instead_of_hanging(self):
+        client = SleeperClient(cache_dir='')
+        client.max_retries = 3
+        client.limiter = TokenBucket(1000)
+        client.breaker = CircuitBreaker(threshold=1, cooldown=0.01)
+        client.breaker.record_failure()
+        time.sleep(0.02)
+
+        responses = iter([FakeResponse(429), FakeResponse(200)])
+        client.session = mock.Mock()
+        client.session.get.side_effect = lambda *args, **kwargs: next(responses)
+
+        result = {}
+        with mock.patch('ffjournal.sleeper_client.random.uniform', return_value=0):
+            worker = threading.Thread(target=lambda: result.update(response=client._send('https://api.sleeper.app/v1/state/nfl')))
+            worker.start()
+            worker.join(timeout=5)
+
+        self.assertFalse(worker.is_alive(), "a 429 on the half-open probe left the breaker stuck")
+        self.assertEqual(result['response'].status_code, 200)
+        self.assertEqual(client.breaker.state, 'closed')
+
+    def test_lost_probe_is_replaced(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0.01, probe_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.wait())  # Probe that never reports back
+
+        start = time.monotonic()
+        self.assertTrue(breaker.wait())
+        self.assertLess(time.monotonic() - start, 1)
@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import TrendingSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def record_trending_snapshots(trending_by_kind, lookback_hours=24, fetched_at=None):
+    """Store one snapshot per kind ('add'/'drop') from Sleeper's [{player_id, count}] lists in one insert."""
+    fetched_at = fetched_at or timezone.now()
+    snapshots = []
+    for kind, items in trending_by_kind.items():
+        items = sorted(items, key=lambda item: item['count'], reverse=True)
+        snapshots.append(TrendingSnapshot(
+            kind=kind,
+            fetched_at=fetched_at,
+            lookback_hours=lookback_hours,
+            player_ids=[str(item['player_id']) for item in items],
+            counts=[item['count'] for item in items],
+        ))
+    return TrendingSnapshot.objects.bulk_create(snapshots)
+
+
+def latest_snapshot(kind, before=None):
+    """Newest snapshot of a kind, optionally the newest taken at or before `before`."""
+    snapshots = TrendingSnapshot.objects.filter(kind=kind)
+    if before is not None:
+        snapshots = snapshots.filter(fetched_at__lte=before)
+    return snapshots.order_by('-fetched_at').first()
+
+
+def current_trending(kind):
+    """(player_id, count) pairs from the newest snapshot, highest count first."""
+    snapshot = latest_snapshot(kind)
+    if snapshot is None:
+        return []
+    return list(zip(snapshot.player_ids, snapshot.counts))
+
+
+def trend_velocity(kind, days=3):
+    """Change in each currently trending player's count over `days`.
+
+    Returns {player_id: {'count', 'previous', 'per_day'}}; `previous` and
+    `per_day` are None when there is no snapshot that old or the player
+    was not trending then.
+    """
+    latest = latest_snapshot(kind)
+    if latest is None:
+        return {}
+    earlier = latest_snapshot(kind, before=latest.fetched_at - timedelta(days=days))
+    previous_counts = dict(zip(earlier.player_ids, earlier.counts)) if earlier else {}
+
+    velocity = {}
+    for player_id, count in zip(latest.player_ids, latest.counts):
+        previous = previous_counts.get(player_id)
+        velocity[player_id] = {
+            'count': count,
+            'previous': previous,
+            'per_day': round((count - previous) / days, 1) if previous is not None else None,
+        }
+    return velocity
+
+
+def prune_trending_snapshots(now=None):
+    """Apply the retention policy and return the number of snapshots deleted.
+
+    Snapshots newer than TRENDING_RAW_RETENTION_DAYS are all kept. Older
+    ones are rolled up to the last snapshot of each day per kind, and
+    anything older than TRENDING_RETENTION_DAYS is dropped.
+    """
+    now = now or timezone.now()
+    raw_cutoff = now - timedelta(days=settings.TRENDING_RAW_RETENTION_DAYS)
+    expired, _ = TrendingSnapshot.objects.filter(
+        fetched_at__lt=now - timedelta(days=settings.TRENDING_RETENTION_DAYS)
+    ).delete()
+
+    older = (
+        TrendingSnapshot.objects.filter(fetched_at__lt=raw_cutoff, is_rollup=False)
+        .annotate(day=TruncDate('fetched_at'))
+        .order_by('kind', 'day', '-fetched_at')
+        .values_list('pk', 'kind', 'day')
+    )
+    keep = {}
+    drop = []
+    for pk, kind, day in older:
+        if (kind, day) in keep:
+            drop.append(pk)
+        else:
+            keep[(kind, day)] = pk
+
+    rolled_up, _ = TrendingSnapshot.objects.filter(pk__in=drop).delete()
+    TrendingSnapshot.objects.filter(pk__in=list(keep.values())).update(is_rollup=True)
+    if expired or rolled_up:
+        logger.info(f"Pruned trending snapshots: {expired} expired, {rolled_up} rolled up")
+    return expired + rolled_up
@@ -8,6 +8,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('leagues/', views.leagues, name='leagues'),
     path('refresh/', views.refresh_data, name='refresh_data'),
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),
     path('ffjournal/manage-league-emails/<int:league_id>/', manage_league_emails_view, name='manage_league_emails'),
     path('ffjournal/admin/dashboard/', admin_dashboard_view, name='admin_dashboard'),
     path('dashboard/', admin_dashboard_view, name='admin_dashboard'),
@@ -1,10 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.urls import reverse
-from django.core.management import call_command
-from .models import League, LeagueMemberEmail, Article, Newsletter
+from .models import League, LeagueMemberEmail, Article, Newsletter, Job
 from accounts.models import CustomUser  # This is your custom user model
-from .sleeper_api import fetch_league_data, fetch_team_data, fetch_all_matchup_data, fetch_roster_data, fetch_all_transactions_data
+from .jobs import enqueue
+from .sleeper_api import fetch_league_data
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
@@ -32,11 +32,8 @@ logger = logging.getLogger(__name__)
 
 
 def fetch_players(request):
-    try:
-        call_command('fetch_players')
-        messages.success(request, 'Player data fetched successfully.')
-    except Exception as e:
-        messages.error(request, f'Error fetching player data: {str(e)}')
+    job = enqueue('fetch_players')
+    messages.success(request, f'Player fetch queued (job #{job.pk}).')
     return HttpResponseRedirect(reverse('admin:index'))
 
 def home(request):
@@ -53,18 +50,33 @@ def leagues(request):
 def refresh_data(request):
     if request.method == 'POST':
         try:
-            leagues = League.objects.all()  # Use Django ORM to fetch all League instances
-            for league in leagues:
-                fetch_league_data(league.sleeper_league_id)  # Removed the db argument
-                if league.status != 'complete':
-                    fetch_roster_data(league.sleeper_league_id)  # Removed the db argument
-                    fetch_team_data(league.sleeper_league_id)  # Removed the db argument
-                    fetch_all_matchup_data(league.sleeper_league_id)  # Removed the db argument
-                    fetch_all_transactions_data(league.sleeper_league_id)  # Removed the db argument
-            return JsonResponse({"message": "Data refreshed successfully"}, status=200)
+            job = enqueue('refresh_leagues')
+            return JsonResponse({
+                "message": "Data refresh queued",
+                "job_id": job.pk,
+                "status_url": reverse('job_status', args=[job.pk]),
+            }, status=202)
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
 
+@login_required
+def job_status_view(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if not request.user.is_staff:
+        if job.sleeper_league_id is None or not job.sleeper_league_id.profiles.filter(user=request.user).exists():
+            return HttpResponseForbidden()
+    return JsonResponse({
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "progress": job.progress,
+        "message": job.message,
+        "error": job.error.strip().splitlines()[-1] if job.error else "",
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    })
+
 @login_required
 def my_leagues_view(request):
     # Placeholder context; you can add data later
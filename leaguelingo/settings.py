@@ -21,6 +21,42 @@ ALLOWED_HOSTS = ['localhost']
 
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '16'))  # Completions in flight at once
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))  # Keep below the account's RPM limit
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '200000'))  # Keep below the account's TPM limit
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '5'))  # Per completion, on rate limits and transient errors
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')  # e.g. http://127.0.0.1:8766/v1 for the openai_standin command
+OPENAI_BATCH_DIR = os.getenv('OPENAI_BATCH_DIR', str(BASE_DIR / 'openai_batches'))  # JSONL files submitted to the Batch API
+OPENAI_BATCH_POLL_INTERVAL = int(os.getenv('OPENAI_BATCH_POLL_INTERVAL', '60'))  # Seconds between batch status checks
+OPENAI_CACHE_TTL = int(os.getenv('OPENAI_CACHE_TTL', str(7 * 24 * 3600)))  # Seconds to reuse a completion for identical prompts; 0 disables
+
+# Sleeper API
+SLEEPER_API_BASE_URL = os.getenv('SLEEPER_API_BASE_URL', 'https://api.sleeper.app/v1')
+SLEEPER_MAX_CONCURRENCY = int(os.getenv('SLEEPER_MAX_CONCURRENCY', '8'))  # Requests in flight across all threads
+SLEEPER_REFRESH_WORKERS = int(os.getenv('SLEEPER_REFRESH_WORKERS', '4'))  # Leagues refreshed in parallel
+SLEEPER_RATE_LIMIT = float(os.getenv('SLEEPER_RATE_LIMIT', '15'))  # Requests per second, shared by all threads
+SLEEPER_TIMEOUT = float(os.getenv('SLEEPER_TIMEOUT', '10'))  # Seconds per request
+SLEEPER_MAX_RETRIES = int(os.getenv('SLEEPER_MAX_RETRIES', '4'))
+SLEEPER_BREAKER_THRESHOLD = int(os.getenv('SLEEPER_BREAKER_THRESHOLD', '5'))  # Consecutive failures before pausing all requests
+SLEEPER_BREAKER_COOLDOWN = int(os.getenv('SLEEPER_BREAKER_COOLDOWN', '30'))  # Seconds to pause before probing again
+SLEEPER_VERIFY_TEAM_SYNC = os.getenv('SLEEPER_VERIFY_TEAM_SYNC', 'False') == 'True'  # Log stored teams after each sync (debugging)
+SLEEPER_FINALIZED_WEEK_LAG = int(os.getenv('SLEEPER_FINALIZED_WEEK_LAG', '1'))  # Extra weeks to keep re-syncing for stat corrections
+NFL_STATE_CACHE_TTL = int(os.getenv('NFL_STATE_CACHE_TTL', '300'))  # Seconds, per process
+NFL_STATE_DB_CACHE_TTL = int(os.getenv('NFL_STATE_DB_CACHE_TTL', '900'))  # Seconds, shared via the NFLState table
+SLEEPER_CACHE_DIR = os.getenv('SLEEPER_CACHE_DIR', str(BASE_DIR / '.sleeper_cache'))  # Set to an empty string to disable
+SLEEPER_STANDIN_URL = os.getenv('SLEEPER_STANDIN_URL', '')  # e.g. http://127.0.0.1:8765 to replay fixtures offline
+SLEEPER_RECORD_DIR = os.getenv('SLEEPER_RECORD_DIR', '')  # Record every successful response as a fixture here
+PLAYER_TABLE_CHECK_INTERVAL = int(os.getenv('PLAYER_TABLE_CHECK_INTERVAL', '60'))  # Seconds between version checks of the in-process player table
+
+# Trending players
+TRENDING_RAW_RETENTION_DAYS = int(os.getenv('TRENDING_RAW_RETENTION_DAYS', '7'))  # Every snapshot kept this long
+TRENDING_RETENTION_DAYS = int(os.getenv('TRENDING_RETENTION_DAYS', '120'))  # Daily rollups kept this long
+
+# Background jobs
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))  # Seconds between polls of an empty queue
+JOB_HEARTBEAT_INTERVAL = float(os.getenv('JOB_HEARTBEAT_INTERVAL', '30'))  # Seconds between lease refreshes of a running job
+JOB_STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', '300'))  # Seconds without a heartbeat before a running job is assumed orphaned
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))  # Orphaned runs before a job is failed instead of requeued
 
 # Stripe Keys
 STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY')